@@ -0,0 +1,47 @@
+"""
+Benchmark of the cold start from the behavior description and from the compiled artifact
+
+Run from the repository root:
+
+    python -m benchmarks.bench_artifact --rules 100000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.generators import generate_description
+from fribe.loader import load_engine_from_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the cold start with and without the artifact.')
+    parser.add_argument('--antecedents', type=int, default=4)
+    parser.add_argument('--terms', type=int, default=5)
+    parser.add_argument('--rules', type=int, default=10000)
+    parser.add_argument('--scanner', action='store_true')
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'behavior.txt')
+        with open(path, 'w') as source_file:
+            source_file.write(generate_description(args.antecedents, args.terms, args.rules))
+        start = time.perf_counter()
+        load_engine_from_file(path, use_scanner=args.scanner)
+        parse_duration = time.perf_counter() - start
+        print('parse and save: {:.3f} s'.format(parse_duration))
+        start = time.perf_counter()
+        engine = load_engine_from_file(path, use_scanner=args.scanner)
+        load_duration = time.perf_counter() - start
+        print('artifact load: {:.4f} s, speedup {:.1f}'.format(load_duration, parse_duration / load_duration))
+        start = time.perf_counter()
+        engine.calc_consequences_batch({'x{}'.format(i): [0.5] for i in range(args.antecedents)})
+        print('first batch evaluation: {:.4f} s'.format(time.perf_counter() - start))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
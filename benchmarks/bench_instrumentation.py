@@ -0,0 +1,77 @@
+"""
+Benchmark of the overhead of the instrumentation
+
+Run from the repository root:
+
+    python -m benchmarks.bench_instrumentation --rules 1000 --calls 5000
+"""
+
+import argparse
+import time
+
+from benchmarks.generators import generate_engine
+from benchmarks.generators import generate_observation_stream
+
+
+# The instrumentation settings of the measured modes
+MODES = [
+    ('disabled', None),
+    ('timing only', False),
+    ('with rule counters', True)
+]
+
+
+def measure_calls(engine, observations):
+    """
+    Measure the mean duration of the calc_consequences calls.
+    :param engine: the engine object
+    :param observations: the list of observation dictionaries
+    :return: the duration per call in seconds
+    """
+    start = time.perf_counter()
+    for observation in observations:
+        engine.calc_consequences(observation)
+    return (time.perf_counter() - start) / len(observations)
+
+
+def measure_modes(engine, observations, repeats):
+    """
+    Measure the modes in turns for the same conditions.
+    :param engine: the engine object
+    :param observations: the list of observation dictionaries
+    :param repeats: the number of the turns, the fastest duration of the modes is used
+    :return: the durations per call in a dictionary with mode names
+    """
+    durations = {name: [] for name, _ in MODES}
+    for _ in range(repeats):
+        for name, rule_counters in MODES:
+            if rule_counters is None:
+                engine.disable_instrumentation()
+            else:
+                engine.enable_instrumentation(rule_counters)
+            durations[name].append(measure_calls(engine, observations))
+    engine.disable_instrumentation()
+    return {name: min(values) for name, values in durations.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the overhead of the instrumentation.')
+    parser.add_argument('--antecedents', type=int, default=4)
+    parser.add_argument('--terms', type=int, default=7)
+    parser.add_argument('--rules', type=int, default=1000)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=7)
+    args = parser.parse_args()
+    engine = generate_engine(args.antecedents, args.terms, args.rules)
+    engine.enable_compilation()
+    observations = list(generate_observation_stream(args.antecedents, args.terms, args.calls))
+    measure_calls(engine, observations)
+    durations = measure_modes(engine, observations, args.repeats)
+    baseline = durations['disabled']
+    for name, _ in MODES:
+        overhead = durations[name] / baseline - 1
+        print('{}: {:.2f} us/call, overhead {:+.1%}'.format(name, durations[name] * 1e6, overhead))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark of the per load cost of the behavior descriptions with and without the grammar cache
+
+Run from the repository root:
+
+    python -m benchmarks.bench_loader --loads 100
+"""
+
+import argparse
+import time
+
+from fribe.loader import Loader
+from fribe.loader import clear_grammar_cache
+from fribe.loader import load_engine_from_string
+
+
+BEHAVIOR_DESCRIPTION = """
+universe "x"
+    "low" 0 0
+    "high" 1 1
+end
+
+universe "y"
+    "low" 0 0
+    "high" 1 1
+end
+
+universe "z"
+    "low" 0 0
+    "high" 1 1
+end
+
+rulebase "z"
+    rule "high" when "x" is "high" and "y" is "high" end
+    rule "low" when "x" is "low" end
+    rule "low" when "y" is "low" end
+end
+"""
+
+
+def measure(load, n_loads):
+    """
+    Measure the mean duration of the loads.
+    :param load: a function without parameters which loads an engine
+    :param n_loads: the number of the loads
+    :return: the mean duration in seconds
+    """
+    start = time.perf_counter()
+    for _ in range(n_loads):
+        load()
+    return (time.perf_counter() - start) / n_loads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the per load cost of the behavior descriptions.')
+    parser.add_argument('--loads', type=int, default=100)
+    args = parser.parse_args()
+
+    def load_without_cache():
+        clear_grammar_cache()
+        load_engine_from_string(BEHAVIOR_DESCRIPTION)
+
+    loader = Loader()
+    results = [
+        ('without grammar cache', measure(load_without_cache, args.loads)),
+        ('load_engine_from_string', measure(lambda: load_engine_from_string(BEHAVIOR_DESCRIPTION), args.loads)),
+        ('Loader.load_from_string', measure(lambda: loader.load_from_string(BEHAVIOR_DESCRIPTION), args.loads))
+    ]
+    for name, duration in results:
+        print('{}: {:.3f} ms per load'.format(name, duration * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark of the memory usage of the rules
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory --rules 1000000
+
+The rules are created one by one with new name strings as the parser does,
+and they are kept as rule objects or collected into a rule table.
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from benchmarks.generators import get_antecedent_names
+from benchmarks.generators import generate_rule_tables
+from fribe.names import NameTable
+from fribe.rule import Rule
+from fribe.ruletable import RuleTableBuilder
+
+
+def generate_rules(n_antecedents, n_terms, n_rules, n_predicates=None):
+    """
+    Generate rule objects with separate name strings.
+    :param n_antecedents: the number of the antecedent universes
+    :param n_terms: the number of terms in each universe
+    :param n_rules: the number of rules
+    :param n_predicates: the number of predicates per rule, all antecedents are used when it is None
+    :return: the generator of rule objects
+    """
+    names = get_antecedent_names(n_antecedents)
+    terms, consequents = generate_rule_tables(n_antecedents, n_terms, n_rules, n_predicates)
+    for row, consequent in zip(terms.tolist(), consequents.tolist()):
+        rule = Rule()
+        for name, term_index in zip(names, row):
+            if term_index >= 0:
+                rule.add_predicate(''.join(name), 't{}'.format(term_index))
+        rule.set_consequent('t{}'.format(consequent))
+        yield rule
+
+
+def measure_memory(create):
+    """
+    Measure the memory which is kept by the created object.
+    :param create: a function without parameters
+    :return: the allocated bytes of the result
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = create()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def build_table(rules):
+    """
+    Collect the rules into a rule table.
+    :param rules: an iterable of rule objects
+    :return: a rule table
+    """
+    rule_rows = RuleTableBuilder(NameTable())
+    for rule in rules:
+        rule_rows.add_rule(rule)
+    return rule_rows.build()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the bytes per rule of the rule representations.')
+    parser.add_argument('--antecedents', type=int, default=4)
+    parser.add_argument('--terms', type=int, default=7)
+    parser.add_argument('--rules', type=int, default=100000)
+    parser.add_argument('--predicates', type=int, default=None)
+    args = parser.parse_args()
+    parameters = (args.antecedents, args.terms, args.rules, args.predicates)
+    objects_size = measure_memory(lambda: list(generate_rules(*parameters)))
+    table_size = measure_memory(lambda: build_table(generate_rules(*parameters)))
+    print('rule objects: {:.1f} bytes/rule'.format(objects_size / args.rules))
+    print('rule table: {:.1f} bytes/rule, {:.1f}x smaller'.format(table_size / args.rules, objects_size / table_size))
+
+
+if __name__ == '__main__':
+    main()
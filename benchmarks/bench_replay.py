@@ -0,0 +1,97 @@
+"""
+Benchmark of the replay of an observation log
+
+Run from the repository root:
+
+    python -m benchmarks.bench_replay --rows 200000
+
+The row by row loop is measured on the first rows only, its throughput is extrapolated.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.generators import generate_engine
+from benchmarks.generators import generate_observations
+from benchmarks.generators import get_antecedent_names
+from fribe.replay import replay_files
+
+
+def write_log(path, n_antecedents, n_terms, n_rows, chunk_size=65536):
+    """
+    Write a CSV observation log chunk by chunk.
+    :param path: the path of the log
+    :param n_antecedents: the number of the antecedent universes
+    :param n_terms: the number of terms in each universe
+    :param n_rows: the number of observations
+    :param chunk_size: the number of rows which are generated at once
+    :return: None
+    """
+    names = get_antecedent_names(n_antecedents)
+    with open(path, 'w') as log_file:
+        log_file.write(','.join(names) + '\n')
+        for seed, start in enumerate(range(0, n_rows, chunk_size)):
+            columns = generate_observations(n_antecedents, n_terms, min(chunk_size, n_rows - start), seed)
+            np.savetxt(log_file, np.column_stack([columns[name] for name in names]), fmt='%.17g', delimiter=',')
+
+
+def measure_row_loop(engine, path, n_rows):
+    """
+    Measure the throughput of the row by row evaluation.
+    :param engine: the engine object
+    :param path: the path of the CSV log
+    :param n_rows: the number of the evaluated rows
+    :return: the observations per second
+    """
+    start = time.perf_counter()
+    with open(path) as log_file:
+        names = log_file.readline().strip().split(',')
+        for _, line in zip(range(n_rows), log_file):
+            engine.calc_consequences(dict(zip(names, map(float, line.split(',')))))
+            [engine.get_state(name) for name in engine.rulebase_names]
+    return n_rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the throughput and the memory of the replay.')
+    parser.add_argument('--antecedents', type=int, default=4)
+    parser.add_argument('--terms', type=int, default=7)
+    parser.add_argument('--rules', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=16384)
+    parser.add_argument('--loop-rows', type=int, default=2000)
+    args = parser.parse_args()
+    engine = generate_engine(args.antecedents, args.terms, args.rules)
+    engine.enable_compilation()
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'observations.csv')
+        write_log(path, args.antecedents, args.terms, args.rows)
+        print('row by row loop: {:.0f} observations/s'.format(measure_row_loop(engine, path, args.loop_rows)))
+        output_path = os.path.join(directory, 'consequences.npy')
+        with open(output_path, 'wb') as output_file:
+            tracemalloc.start()
+            try:
+                start = time.perf_counter()
+                n_rows = replay_files(
+                    engine, [path], lambda consequences: np.save(output_file, consequences['z']), args.chunk_size
+                )
+                duration = time.perf_counter() - start
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        print('replay: {:.0f} observations/s, peak memory {:.1f} MB for {} rows'.format(
+            n_rows / duration, peak_memory / 1e6, n_rows
+        ))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Scaling benchmark of the shared memory, multi-process evaluation
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sharding --rules 5000 --observations 100000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.generators import generate_description
+from fribe.loader import load_engine_from_string
+from fribe.sharding import ShardedEvaluator
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the scaling of the sharded evaluation.')
+    parser.add_argument('--antecedents', type=int, default=4)
+    parser.add_argument('--terms', type=int, default=5)
+    parser.add_argument('--rules', type=int, default=2000)
+    parser.add_argument('--observations', type=int, default=20000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    engine = load_engine_from_string(generate_description(args.antecedents, args.terms, args.rules))
+    generator = np.random.default_rng(0)
+    columns = {
+        'x{}'.format(i): generator.uniform(0, args.terms - 1, args.observations) for i in range(args.antecedents)
+    }
+    start = time.perf_counter()
+    expected = engine.calc_consequences_batch(columns)['z']
+    baseline = time.perf_counter() - start
+    print('in-process batch: {:.3f} s'.format(baseline))
+    for n_workers in range(1, args.max_workers + 1):
+        with ShardedEvaluator(engine, n_workers=n_workers) as evaluator:
+            evaluator.calc_consequences({name: values[:n_workers] for name, values in columns.items()})
+            start = time.perf_counter()
+            consequences = evaluator.calc_consequences(columns)['z']
+            duration = time.perf_counter() - start
+        assert np.array_equal(consequences, expected)
+        print('{} workers: {:.3f} s, speedup {:.2f}'.format(n_workers, duration, baseline / duration))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Synthetic model and observation generators of the benchmarks
+
+The antecedent universes are x0, x1, ... and the consequent universe is z.
+Every universe has the terms t0, t1, ... with centers 0, 1, ... and values 0, 1, 4, ...
+"""
+
+import random
+
+import numpy as np
+
+from fribe.builder import build_rulebase
+from fribe.builder import build_universe
+from fribe.engine import Engine
+
+
+def get_antecedent_names(n_antecedents):
+    """
+    Get the names of the antecedent universes.
+    :param n_antecedents: the number of the antecedents
+    :return: the list of names
+    """
+    return ['x{}'.format(j) for j in range(n_antecedents)]
+
+
+def generate_rule_tables(n_antecedents, n_terms, n_rules, n_predicates=None, seed=0):
+    """
+    Generate random term index tables.
+    :param n_antecedents: the number of the antecedent universes
+    :param n_terms: the number of terms in each universe
+    :param n_rules: the number of rules
+    :param n_predicates: the number of predicates per rule, all antecedents are used when it is None
+    :param seed: the seed of the random rules
+    :return: the term indices as a rules x antecedents array with -1 for the missing predicates
+        and the consequent term indices
+    """
+    generator = np.random.default_rng(seed)
+    if n_predicates is None or n_predicates >= n_antecedents:
+        terms = generator.integers(0, n_terms, (n_rules, n_antecedents))
+    else:
+        terms = np.full((n_rules, n_antecedents), -1)
+        columns = np.argsort(generator.random((n_rules, n_antecedents)), axis=1)[:, :n_predicates]
+        rows = np.repeat(np.arange(n_rules), n_predicates)
+        terms[rows, columns.reshape(-1)] = generator.integers(0, n_terms, n_rules * n_predicates)
+    return terms, generator.integers(0, n_terms, n_rules)
+
+
+def generate_engine(n_antecedents, n_terms, n_rules, n_predicates=None, seed=0):
+    """
+    Generate an engine with a single rule base by the bulk builder.
+    :param n_antecedents: the number of the antecedent universes
+    :param n_terms: the number of terms in each universe
+    :param n_rules: the number of rules
+    :param n_predicates: the number of predicates per rule, all antecedents are used when it is None
+    :param seed: the seed of the random rules
+    :return: an engine object
+    """
+    engine = Engine()
+    term_names = ['t{}'.format(i) for i in range(n_terms)]
+    for name in get_antecedent_names(n_antecedents) + ['z']:
+        engine.add_universe(build_universe(name, term_names, range(n_terms), [i * i for i in range(n_terms)]))
+    terms, consequents = generate_rule_tables(n_antecedents, n_terms, n_rules, n_predicates, seed)
+    engine.add_rulebase(build_rulebase('z', engine.universes, get_antecedent_names(n_antecedents), terms, consequents))
+    return engine
+
+
+def generate_description(n_antecedents, n_terms, n_rules, n_predicates=None, seed=0):
+    """
+    Generate the source of a behavior description with a single rule base.
+    :param n_antecedents: the number of the antecedent universes
+    :param n_terms: the number of terms in each universe
+    :param n_rules: the number of rules
+    :param n_predicates: the number of predicates per rule, all antecedents are used when it is None
+    :param seed: the seed of the random rules
+    :return: the source text
+    """
+    names = get_antecedent_names(n_antecedents)
+    lines = []
+    for name in names + ['z']:
+        lines.append('universe "{}"'.format(name))
+        for i in range(n_terms):
+            lines.append('    "t{}" {} {}'.format(i, i, i * i))
+        lines.append('end')
+    lines.append('rulebase "z"')
+    terms, consequents = generate_rule_tables(n_antecedents, n_terms, n_rules, n_predicates, seed)
+    for row, consequent in zip(terms.tolist(), consequents.tolist()):
+        predicates = ' and '.join(
+            '"{}" is "t{}"'.format(name, term_index) for name, term_index in zip(names, row) if term_index >= 0
+        )
+        lines.append('    rule "t{}" when {} end'.format(consequent, predicates))
+    lines.append('end')
+    return '\n'.join(lines)
+
+
+def generate_observations(n_antecedents, n_terms, n_rows, seed=0):
+    """
+    Generate observation columns on the domains of the antecedent universes.
+    :param n_antecedents: the number of the antecedent universes
+    :param n_terms: the number of terms in each universe
+    :param n_rows: the number of observations
+    :param seed: the seed of the random values
+    :return: a dictionary with antecedent names and arrays of values
+    """
+    generator = np.random.default_rng(seed)
+    return {name: generator.uniform(0, n_terms - 1, n_rows) for name in get_antecedent_names(n_antecedents)}
+
+
+def generate_observation_stream(n_antecedents, n_terms, n_rows, seed=0):
+    """
+    Generate single observations one after the other.
+    :param n_antecedents: the number of the antecedent universes
+    :param n_terms: the number of terms in each universe
+    :param n_rows: the number of observations
+    :param seed: the seed of the random values
+    :return: the generator of observation dictionaries
+    """
+    generator = random.Random(seed)
+    names = get_antecedent_names(n_antecedents)
+    for _ in range(n_rows):
+        yield {name: generator.uniform(0, n_terms - 1) for name in names}
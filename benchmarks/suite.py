@@ -0,0 +1,190 @@
+"""
+Benchmark suite with regression tracking
+
+Run from the repository root:
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json --tolerance 0.2
+
+The results are written as JSON. With a baseline the metrics which are worse
+than the tolerance are reported and the exit status is 1.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.generators import generate_description
+from benchmarks.generators import generate_engine
+from benchmarks.generators import generate_observation_stream
+from benchmarks.generators import generate_observations
+
+
+SCENARIOS = {
+    'small': {'antecedents': 2, 'terms': 5, 'rules': 50, 'predicates': None},
+    'medium': {'antecedents': 4, 'terms': 7, 'rules': 2000, 'predicates': None},
+    'large': {'antecedents': 6, 'terms': 9, 'rules': 50000, 'predicates': None},
+    'wide-sparse': {'antecedents': 200, 'terms': 5, 'rules': 5000, 'predicates': 4}
+}
+
+# The direction of the metrics: 1 when the higher value is better, -1 when the lower value is better
+METRICS = {
+    'load_time': -1,
+    'default_latency_p50': -1,
+    'default_latency_p99': -1,
+    'latency_p50': -1,
+    'latency_p99': -1,
+    'batch_throughput': 1,
+    'peak_memory': -1
+}
+
+
+def measure_load_time(scenario, seed=0):
+    """
+    Measure the load time of the behavior description.
+    :param scenario: the parameters of the generated model
+    :param seed: the seed of the random rules
+    :return: the duration in seconds, None when the parser is not available
+    """
+    try:
+        from fribe.loader import load_engine_from_string
+    except ImportError:
+        return None
+    source = generate_description(
+        scenario['antecedents'], scenario['terms'], scenario['rules'], scenario['predicates'], seed
+    )
+    start = time.perf_counter()
+    load_engine_from_string(source)
+    return time.perf_counter() - start
+
+
+def measure_latencies(engine, scenario, n_calls, seed=0):
+    """
+    Measure the latencies of the single calls of the calc_consequences.
+    :param engine: the engine object
+    :param scenario: the parameters of the generated model
+    :param n_calls: the number of the calls
+    :param seed: the seed of the random observations
+    :return: the median and the 99th percentile of the latencies in seconds
+    """
+    latencies = []
+    for observations in generate_observation_stream(scenario['antecedents'], scenario['terms'], n_calls, seed):
+        start = time.perf_counter()
+        engine.calc_consequences(observations)
+        latencies.append(time.perf_counter() - start)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+def measure_batch(engine, scenario, n_rows, seed=0):
+    """
+    Measure the throughput and the peak memory of the batch evaluation.
+    :param engine: the engine object
+    :param scenario: the parameters of the generated model
+    :param n_rows: the number of observations in the batch
+    :param seed: the seed of the random observations
+    :return: the observations per second and the peak of the traced memory in bytes
+    """
+    columns = generate_observations(scenario['antecedents'], scenario['terms'], n_rows, seed)
+    engine.calc_consequences_batch({name: values[:1] for name, values in columns.items()})
+    start = time.perf_counter()
+    engine.calc_consequences_batch(columns)
+    throughput = n_rows / (time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        engine.calc_consequences_batch(columns)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return throughput, peak_memory
+
+
+def run_scenario(scenario, n_calls=200, n_rows=10000, load=True):
+    """
+    Run the benchmarks of a scenario.
+    :param scenario: the parameters of the generated model
+    :param n_calls: the number of single calls for the latencies
+    :param n_rows: the number of observations in the batch
+    :param load: measure the load time of the behavior description when it is True
+    :return: the metrics in a dictionary, the default_ prefixed latencies are measured rule by rule
+    """
+    layout = 'dense' if scenario['predicates'] is None else 'sparse'
+    engine = generate_engine(scenario['antecedents'], scenario['terms'], scenario['rules'], scenario['predicates'])
+    default_latency_p50, default_latency_p99 = measure_latencies(engine, scenario, n_calls)
+    engine.enable_compilation(layout)
+    latency_p50, latency_p99 = measure_latencies(engine, scenario, n_calls)
+    throughput, peak_memory = measure_batch(engine, scenario, n_rows)
+    return {
+        'parameters': dict(scenario, layout=layout),
+        'load_time': measure_load_time(scenario) if load else None,
+        'default_latency_p50': default_latency_p50,
+        'default_latency_p99': default_latency_p99,
+        'latency_p50': latency_p50,
+        'latency_p99': latency_p99,
+        'batch_throughput': throughput,
+        'peak_memory': peak_memory
+    }
+
+
+def compare_results(baseline, results, tolerance):
+    """
+    Find the regressions of the results.
+    :param baseline: the baseline results
+    :param results: the current results
+    :param tolerance: the allowed relative change in the worse direction
+    :return: the list of (scenario, metric, baseline value, current value) tuples
+    """
+    regressions = []
+    for name, metrics in results['scenarios'].items():
+        if name not in baseline['scenarios']:
+            continue
+        for metric, direction in METRICS.items():
+            old = baseline['scenarios'][name].get(metric)
+            new = metrics.get(metric)
+            if old is None or new is None or old == 0:
+                continue
+            change = (new - old) / old * direction
+            if change < -tolerance:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark suite.')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=['small', 'medium', 'wide-sparse'])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--no-load', action='store_true', help='skip the load time of the behavior descriptions')
+    parser.add_argument('--output', help='the path of the JSON results, the standard output when it is missing')
+    parser.add_argument('--baseline', help='the path of the JSON results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scenarios': {
+            name: run_scenario(SCENARIOS[name], args.calls, args.rows, not args.no_load) for name in args.scenarios
+        }
+    }
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_results(baseline, results, args.tolerance)
+        for name, metric, old, new in regressions:
+            print('REGRESSION {} {}: {:.6g} -> {:.6g}'.format(name, metric, old, new), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+"""
+Binary engine artifacts with memory mapped rule tables
+
+The artifact starts with a fixed prefix (magic, format version, header length),
+which is followed by a JSON header and the aligned numeric tables of the rule bases.
+"""
+
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from fribe.compiled import CompiledRuleBase
+from fribe.engine import Engine
+from fribe.rulebase import RuleBase
+from fribe.ruletable import RuleTable
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+MAGIC = b'FRIBEENG'
+VERSION = 2
+PREFIX = struct.Struct('<8sIQ')
+ALIGNMENT = 64
+
+TABLE_NAMES = ['terms', 'consequents', 'multiplicities', 'centers', 'mask', 'values', 'ranges']
+
+
+def calc_content_hash(data):
+    """
+    Calculate the content hash of a behavior description.
+    :param data: the source as bytes or string
+    :return: the hexadecimal SHA-256 digest
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def calc_files_hash(paths):
+    """
+    Calculate the common content hash of the files.
+    :param paths: the paths of the files
+    :return: the hexadecimal SHA-256 digest
+    :raise OSError: when a file cannot be read
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as content_file:
+            for chunk in iter(lambda: content_file.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _collect_rule_tables(rulebase, universes, compiled):
+    """
+    Collect the term index tables of the rules.
+    :param rulebase: a rule base object
+    :param universes: all available universes in the behavior description
+    :param compiled: the compiled form of the rule base
+    :return: the term name lists of the antecedents and the consequent, the term index, the multiplicity arrays,
+        the descriptions and the predicate orders which differ from the column order
+    """
+    antecedent_names = compiled.antecedent_names
+    term_names = [[term.name for term in universes[name].terms] for name in antecedent_names]
+    consequent_names = [term.name for term in universes[rulebase.name].terms]
+    term_indices = [{name: k for k, name in enumerate(names)} for names in term_names]
+    consequent_indices = {name: k for k, name in enumerate(consequent_names)}
+    rules = rulebase.rules
+    if isinstance(rules, RuleTable) and not rules.is_materialized:
+        return _collect_table_rows(rules, term_names, consequent_names, antecedent_names)
+    columns = {name: j for j, name in enumerate(antecedent_names)}
+    terms = np.full((len(rulebase.rules), len(antecedent_names)), -1, dtype=np.int32)
+    consequents = np.zeros(len(rulebase.rules), dtype=np.int32)
+    multiplicities = np.ones(len(rulebase.rules), dtype=np.int32)
+    descriptions = {}
+    predicate_orders = {}
+    for i, rule in enumerate(rulebase.rules):
+        order = []
+        for antecedent, symbol in rule.predicates.items():
+            j = columns[antecedent]
+            terms[i, j] = term_indices[j][symbol]
+            order.append(j)
+        if order != sorted(order):
+            predicate_orders[str(i)] = order
+        consequents[i] = consequent_indices[rule.consequent]
+        multiplicities[i] = rule.multiplicity
+        if rule.description:
+            descriptions[str(i)] = rule.description
+    return term_names, consequent_names, terms, consequents, multiplicities, descriptions, predicate_orders
+
+
+def _collect_table_rows(table, term_names, consequent_names, antecedent_names):
+    """
+    Map the term indices of a rule table to the term order of the universes.
+    :param table: an unmaterialized rule table
+    :param term_names: the term name lists of the antecedent universes
+    :param consequent_names: the term names of the consequent universe
+    :param antecedent_names: the antecedent names in column order
+    :return: the same tuple as the _collect_rule_tables
+    """
+    table_columns = {name: k for k, name in enumerate(table.antecedent_names)}
+    columns = [table_columns[name] for name in antecedent_names]
+    terms = np.full((len(table), len(antecedent_names)), -1, dtype=np.int32)
+    for j, k in enumerate(columns):
+        positions = {symbol: i for i, symbol in enumerate(term_names[j])}
+        mapping = np.array([positions[symbol] for symbol in table.term_names[k]] + [-1], dtype=np.int32)
+        terms[:, j] = mapping[table.terms[:, k]]
+    positions = {symbol: i for i, symbol in enumerate(consequent_names)}
+    consequent_mapping = np.array([positions[symbol] for symbol in table.consequent_names], dtype=np.int32)
+    consequents = consequent_mapping[table.consequents]
+    descriptions = {str(i): description for i, description in table.descriptions.items() if description}
+    positions = {k: j for j, k in enumerate(columns)}
+    if columns == sorted(columns):
+        rows = table.predicate_orders.keys()
+    else:
+        rows = range(len(table))
+    predicate_orders = {}
+    for i in rows:
+        order = [positions[k] for k in table.get_predicate_columns(i)]
+        if order != sorted(order):
+            predicate_orders[str(i)] = order
+    return (
+        term_names, consequent_names, terms, consequents, table.multiplicities.astype(np.int32), descriptions,
+        predicate_orders
+    )
+
+
+def save_artifact(engine, path, content_hash='', dependencies=None):
+    """
+    Save the universes and the compiled rule bases of the engine.
+    :param engine: the engine object
+    :param path: the path of the artifact file
+    :param content_hash: the content hash of the source of the engine
+    :param dependencies: the paths of the included files of the source
+    :return: None
+    :raise ValueError: when a universe or a term of the rules is missing
+    """
+    universes = engine.universes
+    header = {
+        'content_hash': content_hash,
+        'dependencies': list(dependencies or []),
+        'layout': engine.layout if engine.is_compilation_enabled else None,
+        'universes': [],
+        'rulebases': []
+    }
+    for universe in universes.values():
+        header['universes'].append({
+            'name': universe.name,
+            'description': universe.description,
+            'terms': [[term.name, term.center, term.value] for term in universe.terms]
+        })
+    arrays = []
+    offset = 0
+    for name in engine.rulebase_names:
+        rulebase = engine.get_rulebase(name)
+        compiled = engine.get_compiled_rulebase(name)
+        term_names, consequent_names, terms, consequents, multiplicities, descriptions, predicate_orders = (
+            _collect_rule_tables(rulebase, universes, compiled)
+        )
+        tables = {
+            'terms': terms, 'consequents': consequents, 'multiplicities': multiplicities,
+            'centers': compiled.centers, 'mask': compiled.mask,
+            'values': compiled.values, 'ranges': compiled.ranges
+        }
+        entries = {}
+        for table_name in TABLE_NAMES:
+            array = np.ascontiguousarray(tables[table_name])
+            offset = _align(offset)
+            entries[table_name] = {'offset': offset, 'shape': list(array.shape), 'dtype': array.dtype.str}
+            arrays.append((offset, array))
+            offset += array.nbytes
+        header['rulebases'].append({
+            'name': name,
+            'description': rulebase.description,
+            'antecedent_names': compiled.antecedent_names,
+            'term_names': term_names,
+            'consequent_names': consequent_names,
+            'descriptions': descriptions,
+            'predicate_orders': predicate_orders,
+            'tables': entries
+        })
+    header_data = json.dumps(header).encode('utf-8')
+    data_start = _align(PREFIX.size + len(header_data))
+    with open(path, 'wb') as artifact_file:
+        artifact_file.write(PREFIX.pack(MAGIC, VERSION, len(header_data)))
+        artifact_file.write(header_data)
+        for offset, array in arrays:
+            artifact_file.seek(data_start + offset)
+            artifact_file.write(array.tobytes())
+
+
+def read_artifact_header(path):
+    """
+    Read the header of the artifact.
+    :param path: the path of the artifact file
+    :return: the header dictionary with the data start offset
+    :raise ValueError: when the file is not an artifact of the current version
+    """
+    with open(path, 'rb') as artifact_file:
+        prefix = artifact_file.read(PREFIX.size)
+        if len(prefix) != PREFIX.size:
+            raise ValueError('Invalid artifact file!')
+        magic, version, header_length = PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError('Invalid artifact file!')
+        if version != VERSION:
+            raise ValueError('The artifact version {} is not supported!'.format(version))
+        header_data = artifact_file.read(header_length)
+    if len(header_data) != header_length:
+        raise ValueError('Invalid artifact file!')
+    header = json.loads(header_data.decode('utf-8'))
+    header['data_start'] = _align(PREFIX.size + header_length)
+    return header
+
+
+def load_artifact(path):
+    """
+    Load the engine from the artifact.
+    The numeric tables are memory mapped read only, so the processes share their pages.
+    The rule objects are created at the first rule by rule access.
+    The evaluation mode of the saved engine is restored, so the consequences are the same as the ones of the saved
+    engine. The rule by rule evaluation also reads the mapped term index tables without creating rule objects.
+    :param path: the path of the artifact file
+    :return: an engine object
+    :raise ValueError: when the file is not an artifact of the current version
+    """
+    header = read_artifact_header(path)
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    data_start = header['data_start']
+    engine = Engine()
+    for description in header['universes']:
+        universe = Universe()
+        universe.set_name(description['name'])
+        universe.set_description(description['description'])
+        for name, center, value in description['terms']:
+            universe.add_term(Term(name, center, value))
+        engine.add_universe(universe)
+    for description in header['rulebases']:
+        tables = {}
+        for table_name, entry in description['tables'].items():
+            dtype = np.dtype(entry['dtype'])
+            start = data_start + entry['offset']
+            size = int(np.prod(entry['shape'])) * dtype.itemsize
+            if start + size > len(data):
+                raise ValueError('Invalid artifact file!')
+            tables[table_name] = data[start:start + size].view(dtype).reshape(entry['shape'])
+        rulebase = RuleBase(description['name'])
+        rulebase.set_description(description['description'])
+        rule_descriptions = {int(i): text for i, text in description['descriptions'].items()}
+        predicate_orders = {int(i): tuple(order) for i, order in description.get('predicate_orders', {}).items()}
+        rule_table = RuleTable(
+            description['antecedent_names'], description['term_names'], description['consequent_names'],
+            tables['terms'], tables['consequents'], rule_descriptions, tables['multiplicities'], predicate_orders
+        )
+        rulebase.set_rules(rule_table, description['antecedent_names'])
+        engine.add_rulebase(rulebase)
+        compiled = CompiledRuleBase.from_tables(
+            rulebase.name, description['antecedent_names'],
+            tables['centers'], tables['mask'], tables['values'], tables['ranges'],
+            tables['multiplicities'].astype(float)
+        )
+        compiled.bind(rulebase, engine.universes)
+        engine.set_compiled_rulebase(compiled)
+    if header.get('layout') is not None:
+        engine.enable_compilation(header['layout'])
+    return engine
+
+
+def load_up_to_date_artifact(path, artifact_path):
+    """
+    Load the engine from the artifact when it has built from the current behavior description.
+    :param path: the path of the behavior description
+    :param artifact_path: the path of the artifact
+    :return: an engine object, None when the artifact is missing, invalid or outdated
+    """
+    if not os.path.exists(artifact_path):
+        return None
+    try:
+        header = read_artifact_header(artifact_path)
+        if header['content_hash'] == calc_files_hash([path] + header['dependencies']):
+            return load_artifact(artifact_path)
+    except (ValueError, KeyError, OSError):
+        pass
+    return None
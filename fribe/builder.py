@@ -0,0 +1,170 @@
+"""
+Bulk construction of universes and rule bases from arrays and CSV streams
+"""
+
+import csv
+
+import numpy as np
+
+from fribe.rulebase import RuleBase
+from fribe.ruletable import RuleTable
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+def build_universe(name, term_names, centers, values, description=''):
+    """
+    Build a universe from term arrays.
+    :param name: the name of the universe
+    :param term_names: the names of the terms
+    :param centers: the centers of the terms
+    :param values: the values of the terms
+    :param description: the description of the universe
+    :return: a universe object
+    :raise ValueError: when the arrays are inconsistent
+    """
+    term_names = [str(term_name) for term_name in term_names]
+    centers = np.asarray(centers, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if centers.shape != (len(term_names),) or values.shape != (len(term_names),):
+        raise ValueError('The term arrays of the universe "{}" have different lengths!'.format(name))
+    if not (np.isfinite(centers).all() and np.isfinite(values).all()):
+        raise ValueError('The terms of the universe "{}" have invalid centers or values!'.format(name))
+    if len(set(term_names)) != len(term_names):
+        raise ValueError('The universe "{}" has duplicated term names!'.format(name))
+    universe = Universe()
+    universe.set_name(name)
+    universe.set_description(description)
+    for term_name, center, value in zip(term_names, centers.tolist(), values.tolist()):
+        universe.add_term(Term(term_name, center, value))
+    return universe
+
+
+def _check_term_indices(indices, n_terms, name):
+    """
+    Check that the term indices are valid.
+    :param indices: the array of term indices
+    :param n_terms: the number of the terms in the universe
+    :param name: the name of the universe
+    :return: None
+    :raise ValueError: when an index is out of the range of the terms
+    """
+    invalid = np.flatnonzero((indices < -1) | (indices >= n_terms))
+    if len(invalid) > 0:
+        raise ValueError('Invalid term index {} for the {} in the rule {}!'.format(
+            indices[invalid[0]], name, invalid[0]
+        ))
+
+
+def build_rulebase(name, universes, antecedent_names, terms, consequents, description=''):
+    """
+    Build a rule base from term index tables.
+    The indices refer to the terms of the universes in the order of their addition.
+    The rule base of zero rules has an empty rule table without antecedent columns.
+    :param name: the name of the rule base, which is the name of the consequent universe
+    :param universes: all available universes in the behavior description
+    :param antecedent_names: the antecedent names in the column order of the term indices
+    :param terms: the term indices as a rules x antecedents array, -1 for the missing predicates
+    :param consequents: the consequent term indices of the rules
+    :param description: the description of the rule base
+    :return: a rule base object
+    :raise ValueError: when a universe is missing or an index is invalid
+    """
+    antecedent_names = list(antecedent_names)
+    terms = np.asarray(terms)
+    consequents = np.asarray(consequents)
+    if terms.ndim != 2 or terms.shape[1] != len(antecedent_names):
+        raise ValueError('The term index table does not match with the antecedents!')
+    if consequents.shape != (terms.shape[0],):
+        raise ValueError('The consequents do not match with the rules!')
+    if not (np.issubdtype(terms.dtype, np.integer) or terms.size == 0):
+        raise ValueError('The term indices should be integers!')
+    if not (np.issubdtype(consequents.dtype, np.integer) or consequents.size == 0):
+        raise ValueError('The consequent indices should be integers!')
+    if len(set(antecedent_names)) != len(antecedent_names):
+        raise ValueError('The antecedent names are duplicated!')
+    for antecedent in antecedent_names + [name]:
+        if antecedent not in universes:
+            raise ValueError('The universe is missing for the {}!'.format(antecedent))
+    term_names = []
+    for j, antecedent in enumerate(antecedent_names):
+        universe_terms = universes[antecedent].terms
+        _check_term_indices(terms[:, j], len(universe_terms), antecedent)
+        term_names.append([term.name for term in universe_terms])
+    consequent_names = [term.name for term in universes[name].terms]
+    _check_term_indices(consequents, len(consequent_names), name)
+    # NOTE: The indices are narrowed after the range checks, so the large indices cannot wrap around.
+    terms = terms.astype(np.int32)
+    consequents = consequents.astype(np.int32)
+    if len(consequents) > 0 and consequents.min() < 0:
+        raise ValueError('The consequent is missing from the rule {}!'.format(np.flatnonzero(consequents < 0)[0]))
+    rulebase = RuleBase(name)
+    rulebase.set_description(description)
+    if len(terms) == 0:
+        rule_table = RuleTable([], [], consequent_names, np.zeros((0, 0), dtype=np.int32), consequents)
+        rulebase.set_rules(rule_table, [])
+        return rulebase
+    mask = terms >= 0
+    empty_rules = np.flatnonzero(~mask.any(axis=1))
+    if len(empty_rules) > 0:
+        raise ValueError('The rule {} has no predicates!'.format(empty_rules[0]))
+    # NOTE: The antecedents are ordered by their first occurrence in the rules as in the rule objects.
+    present = mask.any(axis=0)
+    first_rows = np.where(present, mask.argmax(axis=0), len(terms))
+    order = [j for j in np.lexsort((np.arange(len(antecedent_names)), first_rows)) if present[j]]
+    rule_table = RuleTable(antecedent_names, term_names, consequent_names, terms, consequents)
+    rulebase.set_rules(rule_table, [antecedent_names[j] for j in order])
+    return rulebase
+
+
+def build_rulebase_from_csv(name, universes, stream, chunk_size=65536, description=''):
+    """
+    Build a rule base from a CSV stream with term names.
+    The header contains the antecedent names and the name of the rule base as the consequent column.
+    The empty cells are the missing predicates. The rows are processed in chunks.
+    :param name: the name of the rule base, which is the name of the consequent universe
+    :param universes: all available universes in the behavior description
+    :param stream: a text stream of the CSV data
+    :param chunk_size: the number of rows which are processed at once
+    :param description: the description of the rule base
+    :return: a rule base object
+    :raise ValueError: when the header is invalid, a universe is missing or a term is undefined
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    header = [column.strip() for column in header or []]
+    if name not in header:
+        raise ValueError('The consequent column "{}" is missing from the CSV header!'.format(name))
+    consequent_column = header.index(name)
+    antecedent_columns = [j for j in range(len(header)) if j != consequent_column]
+    antecedent_names = [header[j] for j in antecedent_columns]
+    for antecedent in antecedent_names + [name]:
+        if antecedent not in universes:
+            raise ValueError('The universe is missing for the {}!'.format(antecedent))
+    lookups = []
+    for j in range(len(header)):
+        lookup = {term.name: k for k, term in enumerate(universes[header[j]].terms)}
+        if j != consequent_column:
+            lookup[''] = -1
+        lookups.append(lookup)
+    chunks = []
+    rows = []
+    row_index = 0
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != len(header):
+            raise ValueError('The row {} has {} columns instead of {}!'.format(row_index, len(row), len(header)))
+        try:
+            rows.append([lookups[j][cell.strip()] for j, cell in enumerate(row)])
+        except KeyError as error:
+            raise ValueError('The term {} in the row {} is not defined!'.format(error, row_index))
+        row_index += 1
+        if len(rows) == chunk_size:
+            chunks.append(np.array(rows, dtype=np.int32))
+            rows = []
+    chunks.append(np.array(rows, dtype=np.int32).reshape(-1, len(header)))
+    table = np.concatenate(chunks)
+    return build_rulebase(
+        name, universes, antecedent_names, table[:, antecedent_columns], table[:, consequent_column], description
+    )
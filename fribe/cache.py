@@ -0,0 +1,127 @@
+"""
+Consequence cache class definition
+"""
+
+from collections import OrderedDict
+
+
+class ConsequenceCache(object):
+    """Represents a bounded least recently used cache of rule base consequences."""
+
+    def __init__(self, max_size=1024, steps=None):
+        """
+        Initialize an empty cache.
+        :param max_size: the maximal number of the cached consequences
+        :param steps: the quantization steps of the observations in a dictionary with universe names,
+            the observations are used exactly when it is None
+        :raise ValueError: when the size or a step is not positive
+        """
+        if max_size <= 0:
+            raise ValueError('The size of the cache should be positive!')
+        if steps is not None:
+            for name, step in steps.items():
+                if step <= 0:
+                    raise ValueError('The quantization step of "{}" should be positive!'.format(name))
+        self._max_size = max_size
+        self._steps = steps if steps is not None else {}
+        self._entries = OrderedDict()
+        self._signature = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def evictions(self):
+        return self._evictions
+
+    def count_entries(self):
+        """
+        Count the cached consequences.
+        :return: the number of entries
+        """
+        return len(self._entries)
+
+    def get_statistics(self):
+        """
+        Get the usage statistics of the cache.
+        :return: a dictionary with the hits, misses, evictions and the size
+        """
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+            'size': len(self._entries)
+        }
+
+    def clear(self):
+        """
+        Remove all cached consequences.
+        :return: None
+        """
+        self._entries.clear()
+
+    def validate(self, signature):
+        """
+        Clear the cache when the rules or the terms have changed.
+        :param signature: a hashable value which changes together with the rules and the terms
+        :return: None
+        """
+        if signature != self._signature:
+            self._entries.clear()
+            self._signature = signature
+
+    def create_key(self, antecedent_names, observations):
+        """
+        Create the key of the observation.
+        :param antecedent_names: the names of the antecedents in key order
+        :param observations: a dictionary with antecedent names and values
+        :return: the key as a tuple, or None when an antecedent is missing from the observation
+        """
+        key = []
+        for name in antecedent_names:
+            if name not in observations:
+                return None
+            value = observations[name]
+            if name in self._steps:
+                value = round(value / self._steps[name])
+            key.append(value)
+        return tuple(key)
+
+    def lookup(self, key):
+        """
+        Find the cached consequence and mark it as recently used.
+        :param key: the key of the observation
+        :return: the consequence, or None when it has not cached
+        """
+        consequence = self._entries.get(key)
+        if consequence is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+            self._entries.move_to_end(key)
+        return consequence
+
+    def store(self, key, consequence):
+        """
+        Store the consequence and evict the least recently used one when the cache is full.
+        :param key: the key of the observation
+        :param consequence: the calculated consequence
+        :return: None
+        """
+        self._entries[key] = consequence
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
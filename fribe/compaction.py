@@ -0,0 +1,128 @@
+"""
+Compaction of the rule bases
+
+The rules which have the same predicate terms and the same consequent term
+have the same distance and weight in every observation, so they are merged into one rule
+with the sum of their multiplicities. The rules of different terms are kept apart,
+even when the terms have the same centers or values. The dominated rules (see docs/dominancy) are kept,
+because every distinct rule has a positive inverse distance weight
+and its removal would change the consequences.
+"""
+
+import time
+
+import numpy as np
+
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.ruletable import RuleTable
+
+
+def find_duplicated_rules(rulebase):
+    """
+    Group the rules which have the same predicate terms and consequent term.
+    :param rulebase: a rule base object
+    :return: the indices of the first rules of the groups in rule order and the summed multiplicities of the groups
+    """
+    rules = rulebase.rules
+    if len(rules) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    if isinstance(rules, RuleTable) and not rules.is_materialized:
+        keys = np.column_stack([rules.terms, rules.consequents])
+        _, first_indices, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        multiplicities = np.bincount(inverse, weights=rules.multiplicities, minlength=len(first_indices))
+        order = np.argsort(first_indices)
+        return first_indices[order], multiplicities[order].astype(int)
+    groups = {}
+    for index, rule in enumerate(rules):
+        key = (tuple(sorted(rule.predicates.items())), rule.consequent)
+        if key in groups:
+            groups[key][1] += rule.multiplicity
+        else:
+            groups[key] = [index, rule.multiplicity]
+    first_indices = np.array([index for index, _ in groups.values()], dtype=int)
+    multiplicities = np.array([multiplicity for _, multiplicity in groups.values()], dtype=int)
+    return first_indices, multiplicities
+
+
+def compact_rulebase(rulebase, universes):
+    """
+    Merge the duplicated rules of the rule base.
+    :param rulebase: a rule base object
+    :param universes: all available universes in the behavior description
+    :return: a new rule base object with the merged rules
+    :raise ValueError: when a universe or a term of the rules is missing
+    """
+    # NOTE: The compilation checks that the universes and the terms of the rules are available.
+    rulebase.compile(universes)
+    indices, multiplicities = find_duplicated_rules(rulebase)
+    compacted = RuleBase(rulebase.name)
+    compacted.set_description(rulebase.description)
+    rules = rulebase.rules
+    if isinstance(rules, RuleTable) and not rules.is_materialized:
+        positions = {int(index): k for k, index in enumerate(indices)}
+        descriptions = {
+            positions[index]: description for index, description in rules.descriptions.items() if index in positions
+        }
+        predicate_orders = {
+            positions[index]: columns for index, columns in rules.predicate_orders.items() if index in positions
+        }
+        table = RuleTable(
+            rules.antecedent_names, rules.term_names, rules.consequent_names,
+            rules.terms[indices], rules.consequents[indices], descriptions, multiplicities.astype(np.int32),
+            predicate_orders
+        )
+        compacted.set_rules(table, rulebase.collect_antecedent_names())
+    else:
+        for index, multiplicity in zip(indices.tolist(), multiplicities.tolist()):
+            rule = Rule(dict(rules[index].predicates), rules[index].consequent)
+            rule.set_description(rules[index].description)
+            rule.set_multiplicity(multiplicity)
+            compacted.add_rule(rule)
+    return compacted
+
+
+def measure_evaluation_time(rulebase, universes, samples):
+    """
+    Measure the rule by rule evaluation time of the observations.
+    :param rulebase: a rule base object
+    :param universes: all available universes in the behavior description
+    :param samples: the list of observation dictionaries
+    :return: the total duration in seconds
+    """
+    start = time.perf_counter()
+    for observations in samples:
+        rulebase.calc_consequence(universes, observations)
+    return time.perf_counter() - start
+
+
+def compact_engine(engine, samples=None):
+    """
+    Create an engine with the compacted rule bases of the engine.
+    :param engine: an engine object
+    :param samples: the list of observation dictionaries for measuring the speedup, it is not measured when it is None
+    :return: the new engine and the report in a dictionary with rule base names
+        and {'rules', 'removed', 'speedup'} dictionaries
+    :raise ValueError: when a universe or a term of the rules is missing
+    """
+    compacted_engine = Engine()
+    for universe in engine.universes.values():
+        compacted_engine.add_universe(universe)
+    report = {}
+    for name in engine.rulebase_names:
+        rulebase = engine.get_rulebase(name)
+        compacted = compact_rulebase(rulebase, engine.universes)
+        compacted_engine.add_rulebase(compacted)
+        speedup = None
+        if samples:
+            duration = measure_evaluation_time(rulebase, engine.universes, samples)
+            compacted_duration = measure_evaluation_time(compacted, engine.universes, samples)
+            speedup = duration / compacted_duration if compacted_duration > 0 else None
+        report[name] = {
+            'rules': len(rulebase.rules),
+            'removed': len(rulebase.rules) - len(compacted.rules),
+            'speedup': speedup
+        }
+    return compacted_engine, report
@@ -0,0 +1,314 @@
+"""
+Compiled rule base class definition
+"""
+
+import numpy as np
+
+
+class CompiledRuleBase(object):
+    """Represents a rule base in matrix form for fast evaluation."""
+
+    # The maximal number of observation and rule pairs evaluated at once in batch mode
+    CHUNK_SIZE = 1 << 20
+
+    LAYOUT = 'dense'
+
+    def __init__(self, rulebase, universes):
+        """
+        Compile the rules of the rule base.
+        :param rulebase: a rule base object
+        :param universes: all available universes in the behavior description
+        :raise ValueError: when a universe or a term of the rules is missing
+        """
+        self._name = rulebase.name
+        self._antecedent_names = []
+        columns = {}
+        for rule in rulebase.rules:
+            for antecedent in rule.predicates:
+                if antecedent not in columns:
+                    if antecedent not in universes:
+                        raise ValueError('The universe is missing for the {}!'.format(antecedent))
+                    columns[antecedent] = len(self._antecedent_names)
+                    self._antecedent_names.append(antecedent)
+        if self._name not in universes:
+            raise ValueError('The universe is missing for the {}!'.format(self._name))
+        n_rules = len(rulebase.rules)
+        n_antecedents = len(self._antecedent_names)
+        self._centers = np.zeros((n_rules, n_antecedents))
+        self._mask = np.zeros((n_rules, n_antecedents), dtype=bool)
+        self._values = np.zeros(n_rules)
+        self._multiplicities = np.ones(n_rules)
+        consequent_universe = universes[self._name]
+        for i, rule in enumerate(rulebase.rules):
+            for antecedent, symbol in rule.predicates.items():
+                universe = universes[antecedent]
+                j = columns[antecedent]
+                self._centers[i, j] = universe.calc_value(universe.get_term(symbol).center)
+                self._mask[i, j] = True
+            self._values[i] = consequent_universe.get_term(rule.consequent).value
+            self._multiplicities[i] = rule.multiplicity
+        self._ranges = np.array([universes[name].calc_value_range() for name in self._antecedent_names])
+        self._counts = self._mask.sum(axis=1)
+        self._rulebase_revision = rulebase.revision
+        self._universe_revisions = {
+            name: universes[name].revision for name in self._antecedent_names + [self._name]
+        }
+
+    @classmethod
+    def from_tables(cls, name, antecedent_names, centers, mask, values, ranges, multiplicities=None):
+        """
+        Create a compiled rule base from existing tables.
+        It is never up to date with a rule base object.
+        :param name: the name of the rule base
+        :param antecedent_names: the antecedent names in column order
+        :param centers: the mapped term centers as a rules x antecedents array
+        :param mask: the presence of the predicates as a rules x antecedents array
+        :param values: the consequent values of the rules
+        :param ranges: the lengths of the ranges of the antecedent universes
+        :param multiplicities: the multiplicities of the rules, all rules are single when it is None
+        :return: a compiled rule base object
+        """
+        compiled = cls.__new__(cls)
+        compiled._name = name
+        compiled._antecedent_names = list(antecedent_names)
+        compiled._centers = centers
+        compiled._mask = mask
+        compiled._values = values
+        compiled._ranges = ranges
+        compiled._multiplicities = np.ones(len(values)) if multiplicities is None else multiplicities
+        compiled._counts = mask.sum(axis=1)
+        compiled._rulebase_revision = None
+        compiled._universe_revisions = {}
+        return compiled
+
+    @classmethod
+    def from_rule_table(cls, rulebase, universes):
+        """
+        Compile the term index tables of a rule base at once without creating the rule objects.
+        :param rulebase: a rule base object which rules are in a rule table
+        :param universes: all available universes in the behavior description
+        :return: a compiled rule base object
+        :raise ValueError: when a universe of the rules is missing
+        """
+        table = rulebase.rules
+        antecedent_names = rulebase.collect_antecedent_names()
+        for name in antecedent_names + [rulebase.name]:
+            if name not in universes:
+                raise ValueError('The universe is missing for the {}!'.format(name))
+        n_rules = len(table)
+        centers = np.zeros((n_rules, len(antecedent_names)))
+        mask = np.zeros((n_rules, len(antecedent_names)), dtype=bool)
+        for j, name in enumerate(antecedent_names):
+            universe = universes[name]
+            k = table.antecedent_names.index(name)
+            term_indices = table.terms[:, k]
+            mapped_centers = np.array(
+                [universe.calc_value(universe.get_term(symbol).center) for symbol in table.term_names[k]]
+            )
+            mask[:, j] = term_indices >= 0
+            centers[mask[:, j], j] = mapped_centers[term_indices[mask[:, j]]]
+        consequent_universe = universes[rulebase.name]
+        consequent_values = np.array([consequent_universe.get_term(symbol).value for symbol in table.consequent_names])
+        ranges = np.array([universes[name].calc_value_range() for name in antecedent_names])
+        compiled = cls.from_tables(
+            rulebase.name, antecedent_names, centers, mask, consequent_values[table.consequents], ranges,
+            table.multiplicities.astype(float)
+        )
+        compiled.bind(rulebase, universes)
+        return compiled
+
+    def bind(self, rulebase, universes):
+        """
+        Declare that the tables reflect the current rules and terms.
+        :param rulebase: the source rule base object
+        :param universes: all available universes in the behavior description
+        :return: None
+        """
+        self._rulebase_revision = rulebase.revision
+        self._universe_revisions = {
+            name: universes[name].revision for name in self._antecedent_names + [self._name]
+        }
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def antecedent_names(self):
+        return self._antecedent_names
+
+    @property
+    def centers(self):
+        return self._centers
+
+    @property
+    def mask(self):
+        return self._mask
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def ranges(self):
+        return self._ranges
+
+    @property
+    def multiplicities(self):
+        return self._multiplicities
+
+    @property
+    def counts(self):
+        return self._counts
+
+    def count_rules(self):
+        """
+        Count the compiled rules.
+        :return: the number of rules
+        """
+        return len(self._values)
+
+    def calc_chunk_size(self):
+        """
+        Calculate the number of observations which are evaluated at once in batch mode.
+        :return: a positive integer
+        """
+        return max(1, self.CHUNK_SIZE // max(1, len(self._values)))
+
+    def is_up_to_date(self, rulebase, universes):
+        """
+        Check that the compiled form reflects the current rules and terms.
+        :param rulebase: the source rule base object
+        :param universes: all available universes in the behavior description
+        :return: True, when no rule or term has added since the compilation, else False
+        """
+        if self._rulebase_revision is None or rulebase.revision != self._rulebase_revision:
+            return False
+        for name, revision in self._universe_revisions.items():
+            if name not in universes or universes[name].revision != revision:
+                return False
+        return True
+
+    def map_observations(self, universes, observations):
+        """
+        Map the observed antecedent values to the value space of their universes.
+        :param universes: all available universes in the behavior description
+        :param observations: a dictionary with antecedent names and values
+        :return: the mapped values in antecedent order
+        :raise ValueError: when the observation is invalid
+        """
+        mapped = np.empty(len(self._antecedent_names))
+        for j, antecedent in enumerate(self._antecedent_names):
+            if antecedent not in observations:
+                raise ValueError('The {} antecedent is missing from the observation!'.format(antecedent))
+            mapped[j] = universes[antecedent].calc_value(observations[antecedent])
+        return mapped
+
+    def map_columns(self, universes, columns):
+        """
+        Map the observed antecedent columns to the value space of their universes.
+        :param universes: all available universes in the behavior description
+        :param columns: a dictionary with antecedent names and arrays of values
+        :return: the mapped values as an observations x antecedents array
+        :raise ValueError: when the observations are invalid
+        """
+        mapped = []
+        for antecedent in self._antecedent_names:
+            if antecedent not in columns:
+                raise ValueError('The {} antecedent is missing from the observation!'.format(antecedent))
+            mapped.append(universes[antecedent].calc_values(columns[antecedent]))
+        if len({len(values) for values in mapped}) > 1:
+            raise ValueError('The observed antecedent columns have different lengths!')
+        return np.column_stack(mapped)
+
+    def calc_distances(self, universes, observations):
+        """
+        Calculate the distances of the observation from all rules.
+        :param universes: all available universes in the behavior description
+        :param observations: a dictionary with antecedent names and values
+        :return: the rule distances in rule order
+        :raise ValueError: when the observation is invalid
+        """
+        mapped = self.map_observations(universes, observations)
+        return self.calc_mapped_distances(mapped[np.newaxis, :])[0]
+
+    def calc_mapped_distances(self, mapped, rule_indices=None):
+        """
+        Calculate the distances of the mapped observations from the rules.
+        :param mapped: the mapped values as an observations x antecedents array
+        :param rule_indices: the indices of the considered rules, all rules when it is None
+        :return: the distances as an observations x rules array
+        """
+        centers = self._centers
+        mask = self._mask
+        counts = self._counts
+        if rule_indices is not None:
+            centers = centers[rule_indices]
+            mask = mask[rule_indices]
+            counts = counts[rule_indices]
+        sums = np.zeros((len(mapped), len(counts)))
+        for j in range(len(self._antecedent_names)):
+            differences = (mapped[:, j, np.newaxis] - centers[:, j]) / self._ranges[j]
+            sums += np.where(mask[:, j], differences ** 2, 0.0)
+        return sums / counts
+
+    def calc_consequence(self, universes, observations):
+        """
+        Calculate the consequence of the rule base.
+        :param universes: all available universes for reasoning
+        :param observations: the values of the antecedents as a dictionary
+        :return: the calculated consequent value as a real number
+        :raise ValueError: when the observation is invalid
+        """
+        if len(self._values) == 0:
+            raise ValueError('The rule base "{}" has no rules!'.format(self._name))
+        distances = self.calc_distances(universes, observations)
+        return float(self.calc_weighted_means(distances[np.newaxis, :])[0])
+
+    def calc_consequences(self, universes, columns):
+        """
+        Calculate the consequences of the rule base for multiple observations.
+        :param universes: all available universes for reasoning
+        :param columns: a dictionary with antecedent names and arrays of values
+        :return: the calculated consequent values as an array
+        :raise ValueError: when the observations are invalid
+        """
+        if len(self._values) == 0:
+            raise ValueError('The rule base "{}" has no rules!'.format(self._name))
+        mapped = self.map_columns(universes, columns)
+        consequences = np.empty(len(mapped))
+        step = self.calc_chunk_size()
+        for start in range(0, len(mapped), step):
+            distances = self.calc_mapped_distances(mapped[start:start + step])
+            consequences[start:start + step] = self.calc_weighted_means(distances)
+        return consequences
+
+    def calc_weighted_means(self, distances, rule_indices=None):
+        """
+        Calculate the inverse distance weighted means of the consequent values.
+        The rows with zero distances result the mean of the matching values.
+        The weights are multiplied by the multiplicities of the rules.
+        :param distances: the distances as an observations x rules array
+        :param rule_indices: the indices of the considered rules, all rules when it is None
+        :return: the means as an array
+        """
+        values = self._values if rule_indices is None else self._values[rule_indices]
+        weights = self.calc_weights(distances, rule_indices)
+        return (weights * values).sum(axis=1) / weights.sum(axis=1)
+
+    def calc_weights(self, distances, rule_indices=None):
+        """
+        Calculate the unnormalized weights of the rules.
+        The weights are the multiplicities per squared distances,
+        or the multiplicities of the matching rules in the rows with zero distances.
+        :param distances: the distances as an observations x rules array
+        :param rule_indices: the indices of the considered rules, all rules when it is None
+        :return: the weights as an observations x rules array
+        """
+        multiplicities = self._multiplicities if rule_indices is None else self._multiplicities[rule_indices]
+        matching = distances == 0.0
+        has_match = matching.any(axis=1)
+        with np.errstate(divide='ignore'):
+            weights = multiplicities / (distances ** 2)
+        weights[has_match] = matching[has_match] * multiplicities
+        return weights
@@ -2,6 +2,21 @@
 Engine class definition
 """
 
+import time
+
+import numpy as np
+
+from fribe.cache import ConsequenceCache
+from fribe.incremental import IncrementalRuleBase
+from fribe.instrumentation import Instrumentation
+from fribe.names import NameTable
+from fribe.scheduler import build_layers
+from fribe.scheduler import collect_dependencies
+from fribe.scheduler import evaluate_consequence
+from fribe.scheduler import find_cycles
+from fribe.state import StateStore
+from fribe.spatial import RuleIndex
+
 
 class Engine(object):
     """Represents the behavior engine."""
@@ -9,7 +24,30 @@ class Engine(object):
     def __init__(self):
         self._universes = {}
         self._rulebases = {}
-        self._states = {}
+        self._names = NameTable()
+        self._states = StateStore()
+        self._compiled = {}
+        self._is_compilation_enabled = False
+        self._layout = 'dense'
+        self._rule_indices = {}
+        self._nearest_rule_count = None
+        self._incremental_evaluators = None
+        self._caches = None
+        self._cache_options = None
+        self._executor = None
+        self._layers = []
+        self._layer_signature = None
+        self._computed_inputs = set()
+        self._cycles = []
+        self._instrumentation = None
+
+    @property
+    def universes(self):
+        return self._universes
+
+    @property
+    def names(self):
+        return self._names
 
     @property
     def universe_names(self):
@@ -17,7 +55,7 @@ class Engine(object):
 
     @property
     def rulebase_names(self):
-        return list(self._rulebase_names.keys())
+        return list(self._rulebases.keys())
 
     def add_universe(self, universe):
         """
@@ -40,6 +78,18 @@ class Engine(object):
         if rulebase.name in self._rulebases:
             raise ValueError('The rulebase "{}" has already added to the engine!'.format(rulebase.name))
         self._rulebases[rulebase.name] = rulebase
+        self._states.add_slot(rulebase.name)
+
+    def get_rulebase(self, name):
+        """
+        Get the rulebase by name.
+        :param name: the name of the rulebase
+        :return: a rulebase object
+        :raise ValueError: when the rulebase has not added to the engine
+        """
+        if name not in self._rulebases:
+            raise ValueError('The rulebase "{}" has not added to the engine!'.format(name))
+        return self._rulebases[name]
 
     def set_state(self, name, value):
         """
@@ -48,24 +98,448 @@ class Engine(object):
         :param value: the float value of the input
         :return: None
         """
-        self._states[name] = value
+        self._states.set(name, value)
+
+    def set_states(self, values):
+        """
+        Set multiple state values at once, the readers see all or none of them.
+        :param values: the state values in a dictionary with state names
+        :return: None
+        """
+        self._states.begin_update()
+        for name, value in values.items():
+            self._states.write(name, value)
+        self._states.commit()
 
     def get_state(self, name):
         """
         Get the given state value by name
         :param name: the name of the input
         :return: the state value as a float
+        :raise KeyError: when the state has not set
+        """
+        return self._states.get(name)
+
+    def get_state_handle(self, name):
+        """
+        Get the handle of the state for the fast accessors.
+        The rule bases have state handles since they have added to the engine.
+        :param name: the name of the state
+        :return: the handle of the state
+        """
+        return self._states.add_slot(name)
+
+    def set_state_by_handle(self, handle, value):
+        """
+        Set the given state value by handle.
+        :param handle: the handle of the state
+        :param value: the float value of the state
+        :return: None
+        """
+        self._states.set_by_handle(handle, value)
+
+    def get_state_by_handle(self, handle):
+        """
+        Get the given state value by handle.
+        :param handle: the handle of the state
+        :return: the state value as a float, None when it has not set
+        """
+        return self._states.get_by_handle(handle)
+
+    def get_states(self):
+        """
+        Get the consistent snapshot of all state values.
+        :return: the state values in a dictionary with state names
+        """
+        return self._states.get_snapshot()
+
+    @property
+    def is_compilation_enabled(self):
+        return self._is_compilation_enabled
+
+    @property
+    def layout(self):
+        return self._layout
+
+    def enable_compilation(self, layout='dense'):
+        """
+        Evaluate the rule bases in compiled matrix form.
+        The compiled rule bases are rebuilt when rules or terms have added.
+        :param layout: 'dense' for rules x antecedents tables,
+            'sparse' for compressed sparse rows when the rules have few of many antecedents
+        :return: None
+        :raise ValueError: when the layout is invalid
+        """
+        if layout not in ('dense', 'sparse'):
+            raise ValueError('Invalid compiled layout "{}"!'.format(layout))
+        self._is_compilation_enabled = True
+        self._layout = layout
+
+    def disable_compilation(self):
+        """
+        Evaluate the rule bases rule by rule.
+        :return: None
+        """
+        self._is_compilation_enabled = False
+
+    def enable_rule_index(self, k=16):
+        """
+        Approximate the consequences of the rule bases by their nearest rules.
+        The rules are searched in spatial indices, which are rebuilt when rules or terms have added.
+        :param k: the number of the nearest rules used for interpolation
+        :return: None
+        :raise ValueError: when the number of the nearest rules is not positive
+        """
+        if k < 1:
+            raise ValueError('The number of the nearest rules should be positive!')
+        if k != self._nearest_rule_count:
+            self._rule_indices = {}
+        self._nearest_rule_count = k
+
+    def disable_rule_index(self):
+        """
+        Evaluate the consequences of the rule bases by all of their rules.
+        :return: None
+        """
+        self._rule_indices = {}
+        self._nearest_rule_count = None
+
+    def enable_incremental_evaluation(self):
+        """
+        Recalculate only the distances of the changed antecedents from tick to tick.
+        :return: None
+        """
+        if self._incremental_evaluators is None:
+            self._incremental_evaluators = {}
+
+    def disable_incremental_evaluation(self):
+        """
+        Recalculate all distances in every tick.
+        :return: None
+        """
+        self._incremental_evaluators = None
+
+    def enable_cache(self, max_size=1024, steps=None):
+        """
+        Cache the consequences of the rule bases by the observations.
+        The caches are cleared when rules or terms have added.
+        :param max_size: the maximal number of the cached consequences per rule base
+        :param steps: the quantization steps of the observations in a dictionary with universe names,
+            the observations are used exactly when it is None
+        :return: None
+        :raise ValueError: when the size or a step is not positive
+        """
+        # NOTE: The cache objects are created on demand, but the options are checked immediately.
+        ConsequenceCache(max_size, steps)
+        self._caches = {}
+        self._cache_options = (max_size, steps)
+
+    def disable_cache(self):
+        """
+        Calculate the consequences without caching.
+        :return: None
         """
-        return self._states[name]
+        self._caches = None
+        self._cache_options = None
+
+    @property
+    def cache_statistics(self):
+        if self._caches is None:
+            return {}
+        return {name: cache.get_statistics() for name, cache in self._caches.items()}
+
+    def enable_instrumentation(self, rule_counters=True):
+        """
+        Collect the timing of the rule base evaluations and the activation counters of the rules.
+        The rule bases of a layer are evaluated serially while the instrumentation is enabled.
+        :param rule_counters: count the exact matches and the top weights of the rules when it is True
+        :return: the instrumentation object
+        """
+        self._instrumentation = Instrumentation(rule_counters)
+        return self._instrumentation
+
+    def disable_instrumentation(self):
+        """
+        Evaluate the rule bases without instrumentation.
+        :return: None
+        """
+        self._instrumentation = None
+
+    @property
+    def instrumentation(self):
+        return self._instrumentation
+
+    def get_evaluator(self, rulebase_name):
+        """
+        Get the object which calculates the consequence of the rule base.
+        :param rulebase_name: the name of the rule base
+        :return: the rule index when it is enabled, the incremental evaluator when it is enabled,
+            the compiled rule base when the compilation is enabled, else the rule base
+        :raise ValueError: when a universe or a term of the rules is missing
+        """
+        if self._nearest_rule_count is not None:
+            return self.get_rule_index(rulebase_name)
+        if self._incremental_evaluators is not None:
+            return self.get_incremental_evaluator(rulebase_name)
+        if not self._is_compilation_enabled:
+            return self._rulebases[rulebase_name]
+        return self.get_compiled_rulebase(rulebase_name)
+
+    def get_compiled_rulebase(self, rulebase_name):
+        """
+        Get the up to date compiled form of the rule base.
+        :param rulebase_name: the name of the rule base
+        :return: a compiled rule base object
+        :raise ValueError: when a universe or a term of the rules is missing
+        """
+        rulebase = self._rulebases[rulebase_name]
+        compiled = self._compiled.get(rulebase_name)
+        if compiled is None or compiled.LAYOUT != self._layout or not compiled.is_up_to_date(rulebase, self._universes):
+            compiled = rulebase.compile(self._universes, self._layout)
+            self._compiled[rulebase_name] = compiled
+        return compiled
+
+    def set_compiled_rulebase(self, compiled):
+        """
+        Use the given compiled form of a rule base until the rules or terms change.
+        :param compiled: a compiled rule base object which is bound to the rule base of the engine
+        :return: None
+        :raise ValueError: when the rulebase has not added to the engine
+        """
+        self.get_rulebase(compiled.name)
+        self._compiled[compiled.name] = compiled
+
+    def get_rule_index(self, rulebase_name):
+        """
+        Get the up to date spatial index of the rule base.
+        :param rulebase_name: the name of the rule base
+        :return: a rule index object
+        :raise ValueError: when a universe or a term of the rules is missing
+        """
+        rulebase = self._rulebases[rulebase_name]
+        rule_index = self._rule_indices.get(rulebase_name)
+        if rule_index is None or not rule_index.is_up_to_date(rulebase, self._universes):
+            compiled = self.get_compiled_rulebase(rulebase_name)
+            rule_index = RuleIndex(compiled, 16 if self._nearest_rule_count is None else self._nearest_rule_count)
+            self._rule_indices[rulebase_name] = rule_index
+        return rule_index
+
+    def get_incremental_evaluator(self, rulebase_name):
+        """
+        Get the up to date incremental evaluator of the rule base.
+        :param rulebase_name: the name of the rule base
+        :return: an incremental rule base object
+        :raise ValueError: when a universe or a term of the rules is missing
+        """
+        rulebase = self._rulebases[rulebase_name]
+        evaluator = self._incremental_evaluators.get(rulebase_name)
+        if evaluator is None or not evaluator.is_up_to_date(rulebase, self._universes):
+            evaluator = IncrementalRuleBase(self.get_compiled_rulebase(rulebase_name))
+            self._incremental_evaluators[rulebase_name] = evaluator
+        return evaluator
+
+    def set_executor(self, executor):
+        """
+        Set the executor which evaluates the independent rule bases of a layer in parallel.
+        :param executor: a thread or process pool executor of concurrent.futures, None for serial evaluation
+        :return: None
+        """
+        self._executor = executor
+
+    def get_layers(self):
+        """
+        Get the evaluation order of the rule bases.
+        A rule base depends on the other rule bases which consequent universes are used in its rules.
+        The rule bases of a cycle (see get_cycles) are in the same layer
+        and they read the consequences of each other from the observations.
+        :return: the list of layers as lists of independent rule base names
+        """
+        signature = tuple((name, rulebase.revision) for name, rulebase in self._rulebases.items())
+        if signature != self._layer_signature:
+            self._layers = build_layers(self._rulebases, allow_cycles=True)
+            self._cycles = find_cycles(self._rulebases)
+            dependencies = collect_dependencies(self._rulebases)
+            cyclic_names = {name for cycle in self._cycles for name in cycle}
+            self._computed_inputs = {
+                name for required in dependencies.values() for name in required if name not in cyclic_names
+            }
+            self._layer_signature = signature
+        return self._layers
+
+    def get_cycles(self):
+        """
+        Get the groups of rule bases which depend on each other.
+        :return: the list of cycles as lists of rule base names
+        """
+        self.get_layers()
+        return [list(cycle) for cycle in self._cycles]
+
+    def check_observations(self, observations):
+        """
+        Check that the observations do not contain the consequences which are calculated in the same tick.
+        :param observations: a dictionary with antecedent names
+        :return: None
+        :raise ValueError: when a consequence of a rule base which is used by other rule bases is observed
+        """
+        self.get_layers()
+        for name in self._computed_inputs:
+            if name in observations:
+                raise ValueError(
+                    'The {} is calculated for the dependent rule bases, it cannot be observed!'.format(name)
+                )
 
     def calc_consequences(self, observations):
         """
         Calculate the consequences of the available rule bases.
+        The consequences of the rule bases are used as observations by the dependent rule bases in the same tick.
         :param observations: the values of the antecedents in a dictionary
         :return: the consequences in a dictionary with rule base names
         :raise ValueError: when there is an invalid antecedent name in the input dictionary
+            or a consequence of a rule base which is used by other rule bases is observed
+        """
+        layers = self.get_layers()
+        if self._computed_inputs:
+            self.check_observations(observations)
+        inputs = observations if len(layers) <= 1 else dict(observations)
+        self._states.begin_update()
+        for layer in layers:
+            consequences = self.calc_layer_consequences(layer, inputs)
+            for name, value in consequences.items():
+                self._states.write(name, value)
+            if inputs is not observations:
+                inputs.update(consequences)
+        self._states.commit()
+
+    def calc_layer_consequences(self, layer, observations):
+        """
+        Calculate the consequences of independent rule bases.
+        :param layer: the list of rule base names
+        :param observations: the values of the antecedents in a dictionary
+        :return: the consequences in a dictionary with rule base names
+        :raise ValueError: when there is an invalid antecedent name in the input dictionary
+        """
+        if self._executor is None or len(layer) == 1 or self._instrumentation is not None:
+            return {name: self.calc_consequence(name, observations) for name in layer}
+        consequences = {}
+        futures = {}
+        for name in layer:
+            evaluator = self.get_evaluator(name)
+            cache, key, consequence = self.find_cached_consequence(name, evaluator, observations)
+            if consequence is None:
+                future = self._executor.submit(evaluate_consequence, evaluator, self._universes, observations)
+                futures[name] = (cache, key, future)
+            else:
+                consequences[name] = consequence
+        for name, (cache, key, future) in futures.items():
+            consequences[name] = future.result()
+            if key is not None:
+                cache.store(key, consequences[name])
+        return consequences
+
+    def calc_consequence(self, rulebase_name, observations):
+        """
+        Calculate the consequence of the given rule base without modifying the states.
+        :param rulebase_name: the name of the rule base
+        :param observations: the values of the antecedents in a dictionary
+        :return: the consequence as a real number
+        :raise ValueError: when there is an invalid antecedent name in the input dictionary
+        """
+        if self._instrumentation is not None:
+            return self.calc_instrumented_consequence(rulebase_name, observations)
+        evaluator = self.get_evaluator(rulebase_name)
+        cache, key, consequence = self.find_cached_consequence(rulebase_name, evaluator, observations)
+        if consequence is None:
+            consequence = evaluator.calc_consequence(self._universes, observations)
+            if key is not None:
+                cache.store(key, consequence)
+        return consequence
+
+    def calc_instrumented_consequence(self, rulebase_name, observations):
+        """
+        Calculate the consequence of the given rule base and record it in the instrumentation.
+        The rule counters are calculated from the compiled rule base after the timed evaluation.
+        :param rulebase_name: the name of the rule base
+        :param observations: the values of the antecedents in a dictionary
+        :return: the consequence as a real number
+        :raise ValueError: when there is an invalid antecedent name in the input dictionary
+        """
+        start = time.perf_counter()
+        evaluator = self.get_evaluator(rulebase_name)
+        cache, key, consequence = self.find_cached_consequence(rulebase_name, evaluator, observations)
+        if consequence is None:
+            consequence = evaluator.calc_consequence(self._universes, observations)
+            if key is not None:
+                cache.store(key, consequence)
+        instrumentation = self._instrumentation
+        record = instrumentation.record_call(rulebase_name, time.perf_counter() - start)
+        record['consequence'] = consequence
+        if instrumentation.has_rule_counters:
+            compiled = self.get_compiled_rulebase(rulebase_name)
+            distances = compiled.calc_distances(self._universes, observations)
+            weights = compiled.calc_weights(distances[np.newaxis, :])[0]
+            instrumentation.record_weights(
+                rulebase_name, self._rulebases[rulebase_name].revision, distances, weights, record
+            )
+        instrumentation.notify(rulebase_name, record)
+        return consequence
+
+    def find_cached_consequence(self, rulebase_name, evaluator, observations):
+        """
+        Find the consequence of the rule base in its cache.
+        :param rulebase_name: the name of the rule base
+        :param evaluator: the current evaluator of the rule base
+        :param observations: the values of the antecedents in a dictionary
+        :return: the cache, the key of the observations and the cached consequence, None values when missing
+        """
+        if self._caches is None:
+            return None, None, None
+        cache = self._caches.get(rulebase_name)
+        if cache is None:
+            cache = ConsequenceCache(*self._cache_options)
+            self._caches[rulebase_name] = cache
+        rulebase = self._rulebases[rulebase_name]
+        antecedent_names = rulebase.collect_antecedent_names()
+        signature = [type(evaluator), rulebase.revision]
+        for name in antecedent_names + [rulebase_name]:
+            signature.append(self._universes[name].revision if name in self._universes else None)
+        cache.validate(tuple(signature))
+        key = cache.create_key(antecedent_names, observations)
+        if key is None:
+            return cache, None, None
+        return cache, key, cache.lookup(key)
+
+    def calc_consequences_batch(self, observations, columns=None):
+        """
+        Calculate the consequences of the available rule bases for multiple observations.
+        The consequences of the rule bases are used as observations by the dependent rule bases.
+        The states of the engine are not modified.
+        :param observations: a dictionary with antecedent names and arrays of values,
+            or an observations x antecedents array when the columns are given
+        :param columns: the antecedent names in the column order of the observations array
+        :return: the consequences in a dictionary with rule base names and arrays of values
+        :raise ValueError: when there is an invalid or missing antecedent in the observations
+            or a consequence of a rule base which is used by other rule bases is observed
         """
-        next_states = self._states.copy()
-        for rulebase_name, rulebase in self._rulebases.items():
-            next_states[rulebase_name] = rulebase.calc_consequence(self._universes, observations)
-        self._states = next_states
+        if columns is not None:
+            observations = np.asarray(observations, dtype=float)
+            if observations.ndim != 2 or observations.shape[1] != len(columns):
+                raise ValueError('The observations array does not match with the columns!')
+            observations = {name: observations[:, j] for j, name in enumerate(columns)}
+        layers = self.get_layers()
+        self.check_observations(observations)
+        if len(layers) > 1:
+            observations = dict(observations)
+        consequences = {}
+        for layer in layers:
+            for rulebase_name in layer:
+                start = time.perf_counter()
+                compiled = self.get_compiled_rulebase(rulebase_name)
+                consequences[rulebase_name] = compiled.calc_consequences(self._universes, observations)
+                if self._instrumentation is not None:
+                    record = self._instrumentation.record_call(
+                        rulebase_name, time.perf_counter() - start, len(consequences[rulebase_name])
+                    )
+                    self._instrumentation.notify(rulebase_name, record)
+            if len(layers) > 1:
+                observations.update({name: consequences[name] for name in layer})
+        return consequences
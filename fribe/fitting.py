@@ -0,0 +1,129 @@
+"""
+Fitting of the consequent term values to observation logs
+
+For fixed observations the consequence is a linear combination of the consequent term values,
+where the coefficients are the normalized weights of the rules with the same consequent term.
+"""
+
+import numpy as np
+
+from fribe.ruletable import RuleTable
+
+
+def collect_consequent_indices(rulebase, term_names):
+    """
+    Collect the consequent term indices of the rules.
+    :param rulebase: a rule base object
+    :param term_names: the names of the consequent terms
+    :return: the term indices in rule order
+    :raise ValueError: when a consequent term is not in the term names
+    """
+    positions = {name: k for k, name in enumerate(term_names)}
+    rules = rulebase.rules
+    if isinstance(rules, RuleTable) and not rules.is_materialized:
+        symbols = rules.consequent_names
+        if any(symbol not in positions for symbol in symbols):
+            raise ValueError('The consequent terms of the rule base "{}" are undefined!'.format(rulebase.name))
+        return np.array([positions[symbol] for symbol in symbols], dtype=int)[rules.consequents]
+    indices = np.empty(len(rules), dtype=int)
+    for i, rule in enumerate(rules):
+        if rule.consequent not in positions:
+            raise ValueError('The term {} has not defined on the universe!'.format(rule.consequent))
+        indices[i] = positions[rule.consequent]
+    return indices
+
+
+def _iterate_weight_chunks(compiled, universes, columns, consequent_indices, n_terms):
+    """
+    Calculate the weight matrix in chunks of observations.
+    :param compiled: the compiled form of the rule base
+    :param universes: all available universes in the behavior description
+    :param columns: a dictionary with antecedent names and arrays of values
+    :param consequent_indices: the consequent term indices of the rules
+    :param n_terms: the number of the consequent terms
+    :return: the generator of the start indices and the observations x terms weight matrices
+    :raise ValueError: when the observations are invalid
+    """
+    if compiled.count_rules() == 0:
+        raise ValueError('The rule base "{}" has no rules!'.format(compiled.name))
+    mapped = compiled.map_columns(universes, columns)
+    indicators = np.zeros((compiled.count_rules(), n_terms))
+    indicators[np.arange(compiled.count_rules()), consequent_indices] = 1.0
+    step = compiled.calc_chunk_size()
+    for start in range(0, len(mapped), step):
+        weights = compiled.calc_weights(compiled.calc_mapped_distances(mapped[start:start + step]))
+        weights /= weights.sum(axis=1)[:, np.newaxis]
+        yield start, weights @ indicators
+
+
+def calc_weight_matrix(engine, rulebase_name, columns):
+    """
+    Calculate the coefficients of the consequent term values for a dataset.
+    The consequences of the observations are the products of the matrix and the term values.
+    :param engine: the engine which contains the rule base
+    :param rulebase_name: the name of the rule base
+    :param columns: a dictionary with antecedent names and arrays of values
+    :return: the weights as an observations x consequent terms array in the order of the terms of the universe
+    :raise ValueError: when the observations are invalid
+    """
+    compiled = engine.get_compiled_rulebase(rulebase_name)
+    terms = engine.universes[rulebase_name].terms
+    consequent_indices = collect_consequent_indices(engine.get_rulebase(rulebase_name), [term.name for term in terms])
+    chunks = [
+        weights for _, weights in _iterate_weight_chunks(
+            compiled, engine.universes, columns, consequent_indices, len(terms)
+        )
+    ]
+    if not chunks:
+        return np.zeros((0, len(terms)))
+    return np.concatenate(chunks)
+
+
+def fit_term_values(engine, rulebase_name, columns, targets, regularization=1e-6, update=True):
+    """
+    Fit the consequent term values of the rule base to the target consequences by regularized least squares.
+    The regularization pulls the values towards their current values.
+    The terms which are not used by the rules keep their values.
+    :param engine: the engine which contains the rule base
+    :param rulebase_name: the name of the rule base
+    :param columns: a dictionary with antecedent names and arrays of values
+    :param targets: the expected consequences of the observations
+    :param regularization: the non-negative weight of the squared changes of the values
+    :param update: write the values back to the terms of the consequent universe when it is True
+    :return: the fitted values in a dictionary with term names
+    :raise ValueError: when the observations or the targets are invalid
+    """
+    if regularization < 0:
+        raise ValueError('The regularization should be non-negative!')
+    universe = engine.universes[rulebase_name]
+    terms = universe.terms
+    compiled = engine.get_compiled_rulebase(rulebase_name)
+    consequent_indices = collect_consequent_indices(engine.get_rulebase(rulebase_name), [term.name for term in terms])
+    targets = np.asarray(targets, dtype=float)
+    current = np.array([term.value for term in terms])
+    normal_matrix = np.zeros((len(terms), len(terms)))
+    normal_vector = np.zeros(len(terms))
+    n_rows = 0
+    for start, weights in _iterate_weight_chunks(compiled, engine.universes, columns, consequent_indices, len(terms)):
+        chunk_targets = targets[start:start + len(weights)]
+        if len(chunk_targets) != len(weights):
+            raise ValueError('The number of the targets does not match with the observations!')
+        normal_matrix += weights.T @ weights
+        normal_vector += weights.T @ chunk_targets
+        n_rows += len(weights)
+    if n_rows != len(targets):
+        raise ValueError('The number of the targets does not match with the observations!')
+    active = np.flatnonzero(np.diag(normal_matrix) > 0.0)
+    values = current.copy()
+    if len(active) > 0:
+        matrix = normal_matrix[np.ix_(active, active)] + regularization * np.eye(len(active))
+        vector = normal_vector[active] + regularization * current[active]
+        try:
+            values[active] = np.linalg.solve(matrix, vector)
+        except np.linalg.LinAlgError:
+            values[active] = np.linalg.lstsq(matrix, vector, rcond=None)[0]
+    if update:
+        for term, value in zip(terms, values.tolist()):
+            term.set_value(value)
+        universe.update_index()
+    return {term.name: value for term, value in zip(terms, values.tolist())}
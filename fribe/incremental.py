@@ -0,0 +1,105 @@
+"""
+Incremental rule base evaluator class definition
+"""
+
+import numpy as np
+
+
+class IncrementalRuleBase(object):
+    """Represents a stateful evaluator which updates only the distances of the changed antecedents."""
+
+    def __init__(self, compiled, refresh_interval=1000):
+        """
+        Initialize the evaluator of the compiled rule base.
+        :param compiled: a compiled rule base object
+        :param refresh_interval: the number of updates after the partial sums are recalculated from scratch
+        """
+        self._compiled = compiled
+        self._refresh_interval = refresh_interval
+        n_rules = compiled.count_rules()
+        n_antecedents = len(compiled.antecedent_names)
+        self._observations = [None] * n_antecedents
+        self._squares = np.zeros((n_rules, n_antecedents))
+        self._sums = np.zeros(n_rules)
+        self._nonzero_counts = np.zeros(n_rules, dtype=int)
+        self._n_updates = 0
+
+    @property
+    def compiled(self):
+        return self._compiled
+
+    def is_up_to_date(self, rulebase, universes):
+        """
+        Check that the evaluated rules reflect the current rules and terms.
+        :param rulebase: the source rule base object
+        :param universes: all available universes in the behavior description
+        :return: True, when no rule or term has added since the compilation, else False
+        """
+        return self._compiled.is_up_to_date(rulebase, universes)
+
+    def update(self, universes, observations):
+        """
+        Update the distance columns of the changed antecedents.
+        :param universes: all available universes in the behavior description
+        :param observations: a dictionary with antecedent names and values
+        :return: the number of the updated columns
+        :raise ValueError: when the observation is invalid
+        """
+        compiled = self._compiled
+        changes = []
+        for j, antecedent in enumerate(compiled.antecedent_names):
+            if antecedent not in observations:
+                raise ValueError('The {} antecedent is missing from the observation!'.format(antecedent))
+            value = observations[antecedent]
+            if value != self._observations[j]:
+                changes.append((j, universes[antecedent].calc_value(value)))
+        for j, mapped in changes:
+            differences = (mapped - compiled.centers[:, j]) / compiled.ranges[j]
+            squares = np.where(compiled.mask[:, j], differences ** 2, 0.0)
+            self._sums += squares - self._squares[:, j]
+            self._nonzero_counts += (squares != 0.0).astype(int) - (self._squares[:, j] != 0.0)
+            self._squares[:, j] = squares
+            self._observations[j] = observations[compiled.antecedent_names[j]]
+        if changes:
+            self._n_updates += 1
+            if self._n_updates >= self._refresh_interval:
+                self.refresh()
+        return len(changes)
+
+    def refresh(self):
+        """
+        Recalculate the partial sums from the distance columns.
+        :return: None
+        """
+        self._sums = np.zeros(len(self._sums))
+        for j in range(self._squares.shape[1]):
+            self._sums += self._squares[:, j]
+        self._nonzero_counts = (self._squares != 0.0).sum(axis=1)
+        self._n_updates = 0
+
+    def calc_distances(self):
+        """
+        Calculate the distances of the last observation from all rules.
+        :return: the rule distances in rule order
+        """
+        sums = self._sums
+        drifted = (self._nonzero_counts > 0) & (sums <= 0.0)
+        if drifted.any():
+            sums = sums.copy()
+            sums[drifted] = self._squares[drifted].sum(axis=1)
+        sums = np.where(self._nonzero_counts > 0, sums, 0.0)
+        return sums / self._compiled.counts
+
+    def calc_consequence(self, universes, observations):
+        """
+        Update the evaluator and calculate the consequence of the rule base.
+        :param universes: all available universes for reasoning
+        :param observations: the values of the antecedents as a dictionary
+        :return: the calculated consequent value as a real number
+        :raise ValueError: when the observation is invalid
+        """
+        if self._compiled.count_rules() == 0:
+            raise ValueError('The rule base "{}" has no rules!'.format(self._compiled.name))
+        self.update(universes, observations)
+        distances = self.calc_distances()
+        return float(self._compiled.calc_weighted_means(distances[np.newaxis, :])[0])
@@ -0,0 +1,124 @@
+"""
+Instrumentation class definition
+"""
+
+import numpy as np
+
+
+class Instrumentation(object):
+    """Collects the timing of the rule base evaluations and the activation counters of the rules."""
+
+    def __init__(self, rule_counters=True):
+        """
+        Initialize the empty statistics.
+        :param rule_counters: count the exact matches and the top weights of the rules when it is True,
+            it costs a compiled distance calculation per evaluation
+        """
+        self._has_rule_counters = rule_counters
+        self._statistics = {}
+        self._rule_counters = {}
+        self._hooks = []
+
+    @property
+    def has_rule_counters(self):
+        return self._has_rule_counters
+
+    def add_hook(self, hook):
+        """
+        Add a callback which is called after every recorded evaluation.
+        :param hook: a function with rule base name and record dictionary parameters,
+            the record has 'observations' and 'duration' keys, single evaluations have 'consequence' key,
+            and 'exact_matches', 'top_rule' keys with rule counters
+        :return: None
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Remove the callback.
+        :param hook: a previously added function
+        :return: None
+        :raise ValueError: when the hook has not added
+        """
+        self._hooks.remove(hook)
+
+    def reset(self):
+        """
+        Drop the collected statistics and counters.
+        :return: None
+        """
+        self._statistics = {}
+        self._rule_counters = {}
+
+    def record_call(self, rulebase_name, duration, n_observations=1):
+        """
+        Record the evaluation of a rule base.
+        :param rulebase_name: the name of the rule base
+        :param duration: the duration of the evaluation in seconds
+        :param n_observations: the number of evaluated observations
+        :return: the record which is passed to the hooks
+        """
+        statistics = self._statistics.get(rulebase_name)
+        if statistics is None:
+            statistics = {'calls': 0, 'observations': 0, 'total_time': 0.0, 'max_time': 0.0}
+            self._statistics[rulebase_name] = statistics
+        statistics['calls'] += 1
+        statistics['observations'] += n_observations
+        statistics['total_time'] += duration
+        statistics['max_time'] = max(statistics['max_time'], duration)
+        return {'observations': n_observations, 'duration': duration}
+
+    def record_weights(self, rulebase_name, revision, distances, weights, record):
+        """
+        Count the exact matches and the top weight of a single evaluation.
+        The counters are reset when the rules of the rule base have changed.
+        :param rulebase_name: the name of the rule base
+        :param revision: the revision of the rule base
+        :param distances: the distances of the observation from the rules
+        :param weights: the weights of the rules
+        :param record: the record of the evaluation which is completed with the counted rules
+        :return: None
+        """
+        counters = self._rule_counters.get(rulebase_name)
+        if counters is None or counters['revision'] != revision or len(counters['exact_matches']) != len(distances):
+            counters = {
+                'revision': revision,
+                'exact_matches': np.zeros(len(distances), dtype=np.int64),
+                'top_weights': np.zeros(len(distances), dtype=np.int64)
+            }
+            self._rule_counters[rulebase_name] = counters
+        matching = np.flatnonzero(distances == 0.0)
+        counters['exact_matches'][matching] += 1
+        top_rule = int(np.argmax(weights))
+        counters['top_weights'][top_rule] += 1
+        record['exact_matches'] = matching.tolist()
+        record['top_rule'] = top_rule
+
+    def notify(self, rulebase_name, record):
+        """
+        Pass the record to the hooks.
+        :param rulebase_name: the name of the rule base
+        :param record: the record of the evaluation
+        :return: None
+        """
+        for hook in self._hooks:
+            hook(rulebase_name, record)
+
+    def get_statistics(self):
+        """
+        Get the timing statistics of the rule bases.
+        :return: a dictionary with rule base names and {'calls', 'observations', 'total_time', 'max_time'} dictionaries
+        """
+        return {name: dict(statistics) for name, statistics in self._statistics.items()}
+
+    def get_rule_counters(self, rulebase_name):
+        """
+        Get the activation counters of the rules.
+        :param rulebase_name: the name of the rule base
+        :return: the exact match and the top weight counts in rule order in a dictionary,
+            empty arrays when no evaluation has counted
+        """
+        counters = self._rule_counters.get(rulebase_name)
+        if counters is None:
+            return {'exact_matches': np.zeros(0, dtype=np.int64), 'top_weights': np.zeros(0, dtype=np.int64)}
+        return {'exact_matches': counters['exact_matches'].copy(), 'top_weights': counters['top_weights'].copy()}
@@ -1,30 +1,212 @@
 from exprail.grammar import Grammar
 from exprail.source import SourceString
 
+from fribe.artifact import calc_files_hash
+from fribe.artifact import load_up_to_date_artifact
+from fribe.artifact import save_artifact
+from fribe.engine import Engine
+from fribe.scanner import Scanner
+from fribe.source import IncludeFilter
+from fribe.source import IncludeGuard
+from fribe.source import StreamSource
 from fribe.tokenizer import CharClassifier
 from fribe.tokenizer import Tokenizer
 from fribe.parser import TokenClassifier
 from fribe.parser import Parser
 
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
 
-def load_engine_from_string(source):
+PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+TOKENIZER_GRAMMAR_PATH = os.path.join(PACKAGE_DIRECTORY, '../grammars/simple/tokenizer.grammar')
+PARSER_GRAMMAR_PATH = os.path.join(PACKAGE_DIRECTORY, '../grammars/simple/parser.grammar')
+
+_grammar_cache = {}
+_grammar_cache_lock = threading.Lock()
+
+
+def load_grammar(path, classifier):
+    """
+    Load the grammar, reuse the already built one while the grammar file has not modified.
+    :param path: the path of the grammar file
+    :param classifier: the token classifier of the grammar
+    :return: a grammar object
+    """
+    path = os.path.normpath(os.path.abspath(path))
+    mtime = os.path.getmtime(path)
+    key = (path, classifier)
+    with _grammar_cache_lock:
+        cached = _grammar_cache.get(key)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, Grammar(filename=path, classifier=classifier))
+            _grammar_cache[key] = cached
+    return cached[1]
+
+
+def clear_grammar_cache():
+    """
+    Drop the built grammars.
+    :return: None
+    """
+    with _grammar_cache_lock:
+        _grammar_cache.clear()
+
+
+class Loader(object):
+    """Loads engines from behavior descriptions with the same grammars."""
+
+    def __init__(self, tokenizer_path=TOKENIZER_GRAMMAR_PATH, parser_path=PARSER_GRAMMAR_PATH, use_scanner=False):
+        """
+        Initialize the loader with the grammars.
+        :param tokenizer_path: the path of the tokenizer grammar
+        :param parser_path: the path of the parser grammar
+        :param use_scanner: tokenize by the Scanner instead of the tokenizer grammar, when it is True
+        """
+        self._use_scanner = use_scanner
+        self._tokenizer_path = tokenizer_path
+        self._parser_path = parser_path
+        self._tokenizer_grammar = None
+        self._parser_grammar = None
+        self._included_paths = []
+        self.reload()
+
+    @property
+    def included_paths(self):
+        return list(self._included_paths)
+
+    def reload(self):
+        """
+        Load the grammars again when their files have modified.
+        :return: None
+        """
+        if not self._use_scanner:
+            self._tokenizer_grammar = load_grammar(self._tokenizer_path, CharClassifier)
+        self._parser_grammar = load_grammar(self._parser_path, TokenClassifier)
+
+    def load_from_string(self, source):
+        """
+        Load the engine from string representation.
+        :param source: the source text of the rulebase
+        :return: an engine object
+        :raise ValueError: when the description is invalid or it contains an include directive
+        """
+        if self._use_scanner:
+            tokenizer = Scanner(source)
+        else:
+            tokenizer = Tokenizer(self._tokenizer_grammar, SourceString(source))
+        parser = Parser(self._parser_grammar, IncludeGuard(tokenizer))
+        parser.parse()
+        return parser.engine
+
+    def create_tokenizer(self, stream):
+        """
+        Create a tokenizer which reads the stream in chunks.
+        :param stream: a text stream
+        :return: a tokenizer or a scanner object
+        """
+        if self._use_scanner:
+            return Scanner(stream)
+        return Tokenizer(self._tokenizer_grammar, StreamSource(stream))
+
+    def load_from_file(self, path):
+        """
+        Load the engine from a behavior description file and its included files.
+        The files are read in chunks, the included paths of the last load are available in the included_paths.
+        :param path: the path of the behavior description
+        :return: an engine object
+        :raise ValueError: when the description or an include directive is invalid
+        """
+        tokens = IncludeFilter(self.create_tokenizer, path)
+        try:
+            parser = Parser(self._parser_grammar, tokens)
+            parser.parse()
+        finally:
+            tokens.close()
+            self._included_paths = tokens.paths[1:]
+        return parser.engine
+
+
+def load_engine_from_string(source, use_scanner=False):
     """
     Load the engine from string representation.
     :param source: the source text of the rulebase
+    :param use_scanner: tokenize by the Scanner instead of the tokenizer grammar, when it is True
     :return: an engine object
+    :raise ValueError: when the description is invalid or it contains an include directive
     """
-    package_directory = os.path.dirname(os.path.abspath(__file__))
-    char_source = SourceString(source)
-    char_classifier = CharClassifier
-    tokenizer_path = os.path.join(package_directory, '../grammars/simple/tokenizer.grammar')
-    tokenizer_grammar = Grammar(filename=tokenizer_path, classifier=char_classifier)
-    tokenizer = Tokenizer(tokenizer_grammar, char_source)
-    token_classifier = TokenClassifier
-    parser_path = os.path.join(package_directory, '../grammars/simple/parser.grammar')
-    parser_grammar = Grammar(filename=parser_path, classifier=token_classifier)
-    parser = Parser(parser_grammar, tokenizer)
-    parser.parse()
-    return parser.engine
+    return Loader(use_scanner=use_scanner).load_from_string(source)
 
+
+def load_engine_from_file(path, artifact_path=None, use_scanner=False):
+    """
+    Load the engine from a behavior description file.
+    The engine is loaded from the compiled artifact when its content hash matches with the file and its included files,
+    else the files are parsed and the artifact is rebuilt.
+    :param path: the path of the behavior description
+    :param artifact_path: the path of the artifact, the path of the description with .artifact suffix when it is None
+    :param use_scanner: tokenize by the Scanner instead of the tokenizer grammar, when it is True
+    :return: an engine object
+    """
+    if artifact_path is None:
+        artifact_path = path + '.artifact'
+    engine = load_up_to_date_artifact(path, artifact_path)
+    if engine is not None:
+        return engine
+    loader = Loader(use_scanner=use_scanner)
+    engine = loader.load_from_file(path)
+    dependencies = loader.included_paths
+    content_hash = calc_files_hash([path] + dependencies)
+    # NOTE: The artifact is replaced atomically, because other processes may load it concurrently.
+    temporary_path = '{}.{}.tmp'.format(artifact_path, os.getpid())
+    try:
+        save_artifact(engine, temporary_path, content_hash, dependencies)
+        os.replace(temporary_path, artifact_path)
+    except (OSError, ValueError):
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    return engine
+
+
+def _load_engine_from_file(path, use_scanner):
+    """
+    Load the engine from a file without artifact in a worker process.
+    :param path: the path of the behavior description
+    :param use_scanner: tokenize by the Scanner instead of the tokenizer grammar, when it is True
+    :return: an engine object
+    """
+    return Loader(use_scanner=use_scanner).load_from_file(path)
+
+
+def merge_engines(engines):
+    """
+    Merge the universes and the rule bases of the engines into a new engine.
+    :param engines: the list of engine objects
+    :return: an engine object
+    :raise ValueError: when a universe or a rule base is defined in multiple engines
+    """
+    merged = Engine()
+    for engine in engines:
+        for universe in engine.universes.values():
+            merged.add_universe(universe)
+        for name in engine.rulebase_names:
+            merged.add_rulebase(engine.get_rulebase(name))
+    return merged
+
+
+def load_engine_from_files(paths, n_workers=None, use_scanner=False):
+    """
+    Parse the behavior description files in parallel worker processes and merge them into one engine.
+    :param paths: the paths of the behavior descriptions
+    :param n_workers: the number of worker processes, the number of processors when it is None
+    :param use_scanner: tokenize by the Scanner instead of the tokenizer grammar, when it is True
+    :return: an engine object
+    :raise ValueError: when a description is invalid or a universe or a rule base is defined in multiple files
+    """
+    if n_workers == 1 or len(paths) <= 1:
+        engines = [_load_engine_from_file(path, use_scanner) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            engines = list(executor.map(_load_engine_from_file, paths, [use_scanner] * len(paths)))
+    return merge_engines(engines)
@@ -0,0 +1,52 @@
+"""
+Name table class definition
+"""
+
+
+class NameTable(object):
+    """Interns the names of the universes and the terms as integer identifiers."""
+
+    __slots__ = ('_names', '_ids')
+
+    def __init__(self):
+        self._names = []
+        self._ids = {}
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def intern(self, name):
+        """
+        Get the identifier of the name, register it at the first occurrence.
+        :param name: a name as a string
+        :return: the identifier as a non-negative integer
+        """
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names.append(name)
+            self._ids[name] = name_id
+        return name_id
+
+    def find(self, name):
+        """
+        Find the identifier of the name.
+        :param name: a name as a string
+        :return: the identifier, None when the name has not interned
+        """
+        return self._ids.get(name)
+
+    def get_name(self, name_id):
+        """
+        Get the name of the identifier.
+        :param name_id: an identifier of the table
+        :return: the shared name object
+        :raise ValueError: when the identifier is invalid
+        """
+        if not 0 <= name_id < len(self._names):
+            raise ValueError('Invalid name identifier {}!'.format(name_id))
+        return self._names[name_id]
@@ -4,6 +4,7 @@ from exprail import parser
 from fribe.engine import Engine
 from fribe.rule import Rule
 from fribe.rulebase import RuleBase
+from fribe.ruletable import RuleTableBuilder
 from fribe.term import Term
 from fribe.universe import Universe
 
@@ -38,6 +39,7 @@ class Parser(parser.Parser):
         self._universe = None
         self._term = None
         self._rulebase = None
+        self._rule_rows = None
         self._rule = None
         self._predicate = None
 
@@ -72,6 +74,7 @@ class Parser(parser.Parser):
             self._engine.add_universe(self._universe)
         elif operation == 'create_rulebase':
             self._rulebase = RuleBase()
+            self._rule_rows = RuleTableBuilder(self._engine.names)
         elif operation == 'set_rulebase_name':
             self._rulebase.set_name(token.value)
         elif operation == 'set_rulebase_description':
@@ -91,8 +94,9 @@ class Parser(parser.Parser):
         elif operation == 'add_predicate':
             self._rule.add_predicate(self._predicate['name'], self._predicate['value'])
         elif operation == 'add_rule':
-            self._rulebase.add_rule(self._rule)
+            self._rule_rows.add_rule(self._rule)
         elif operation == 'add_rulebase':
+            self._rulebase.set_rules(self._rule_rows.build(), self._rule_rows.antecedent_names)
             self._engine.add_rulebase(self._rulebase)
         else:
             raise ValueError('The operation "{}" has not defined!'.format(operation))
@@ -0,0 +1,177 @@
+"""
+Population class definition
+"""
+
+import numpy as np
+
+
+class Population(object):
+    """Represents the states of multiple agents which share the universes and rule bases of an engine."""
+
+    def __init__(self, engine, capacity=64):
+        """
+        Initialize an empty population.
+        :param engine: the engine which contains the universes and the rule bases
+        :param capacity: the initial number of agent slots
+        """
+        self._engine = engine
+        self._capacity = max(1, capacity)
+        self._active = np.zeros(self._capacity, dtype=bool)
+        self._free_slots = list(range(self._capacity - 1, -1, -1))
+        self._states = {}
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def agent_ids(self):
+        return np.flatnonzero(self._active)
+
+    @property
+    def state_names(self):
+        return list(self._states.keys())
+
+    def count_agents(self):
+        """
+        Count the agents of the population.
+        :return: the number of agents
+        """
+        return int(self._active.sum())
+
+    def _grow(self):
+        """
+        Double the number of the agent slots.
+        :return: None
+        """
+        capacity = self._capacity * 2
+        self._active = np.concatenate([self._active, np.zeros(self._capacity, dtype=bool)])
+        for name, column in self._states.items():
+            self._states[name] = np.concatenate([column, np.full(self._capacity, np.nan)])
+        self._free_slots.extend(range(capacity - 1, self._capacity - 1, -1))
+        self._capacity = capacity
+
+    def add_agent(self, states=None):
+        """
+        Add a new agent to the population.
+        :param states: the initial states of the agent in a dictionary
+        :return: the identifier of the agent
+        """
+        if not self._free_slots:
+            self._grow()
+        agent_id = self._free_slots.pop()
+        self._active[agent_id] = True
+        for column in self._states.values():
+            column[agent_id] = np.nan
+        if states is not None:
+            for name, value in states.items():
+                self.set_state(agent_id, name, value)
+        return agent_id
+
+    def remove_agent(self, agent_id):
+        """
+        Remove the agent from the population.
+        Its slot is reused by a later agent.
+        :param agent_id: the identifier of the agent
+        :return: None
+        :raise ValueError: when there is no such agent in the population
+        """
+        self._check_agent(agent_id)
+        self._active[agent_id] = False
+        self._free_slots.append(agent_id)
+
+    def _check_agent(self, agent_id):
+        """
+        Check that the agent is in the population.
+        :param agent_id: the identifier of the agent
+        :return: None
+        :raise ValueError: when there is no such agent in the population
+        """
+        if not (0 <= agent_id < self._capacity and self._active[agent_id]):
+            raise ValueError('The agent {} is not in the population!'.format(agent_id))
+
+    def _get_column(self, name):
+        """
+        Get the state column by name, create it when it is missing.
+        :param name: the name of the state
+        :return: the column as an array of agent slots
+        """
+        if name not in self._states:
+            self._states[name] = np.full(self._capacity, np.nan)
+        return self._states[name]
+
+    def set_state(self, agent_id, name, value):
+        """
+        Set the state value of an agent.
+        :param agent_id: the identifier of the agent
+        :param name: the name of the state
+        :param value: the float value of the state
+        :return: None
+        :raise ValueError: when there is no such agent in the population
+        """
+        self._check_agent(agent_id)
+        self._get_column(name)[agent_id] = value
+
+    def get_state(self, agent_id, name):
+        """
+        Get the state value of an agent.
+        :param agent_id: the identifier of the agent
+        :param name: the name of the state
+        :return: the state value as a float
+        :raise ValueError: when there is no such agent in the population or the state is missing
+        """
+        self._check_agent(agent_id)
+        return float(self._find_column(name)[agent_id])
+
+    def get_states(self, name, agent_ids=None):
+        """
+        Get the state values of the agents.
+        :param name: the name of the state
+        :param agent_ids: the identifiers of the agents, all agents in identifier order when it is None
+        :return: the state values as an array
+        :raise ValueError: when there is no such agent in the population or the state is missing
+        """
+        if agent_ids is None:
+            agent_ids = self.agent_ids
+        else:
+            agent_ids = np.asarray(agent_ids, dtype=int)
+            for agent_id in agent_ids:
+                self._check_agent(agent_id)
+        return self._find_column(name)[agent_ids]
+
+    def _find_column(self, name):
+        """
+        Find the column of an existing state.
+        :param name: the name of the state
+        :return: the column as an array of agent slots
+        :raise ValueError: when the state is missing
+        """
+        if name not in self._states:
+            raise ValueError('The state "{}" is missing!'.format(name))
+        return self._states[name]
+
+    def calc_consequences(self, observations, agent_ids=None):
+        """
+        Calculate the consequences of the rule bases for the agents and update their states.
+        :param observations: a dictionary with antecedent names and arrays of values in agent order
+        :param agent_ids: the identifiers of the agents, all agents in identifier order when it is None
+        :return: None
+        :raise ValueError: when there is an invalid or missing antecedent in the observations
+        """
+        if agent_ids is None:
+            agent_ids = self.agent_ids
+        else:
+            agent_ids = np.asarray(agent_ids, dtype=int)
+            for agent_id in agent_ids:
+                self._check_agent(agent_id)
+        if len(agent_ids) == 0:
+            return
+        consequences = self._engine.calc_consequences_batch(observations)
+        if any(len(values) != len(agent_ids) for values in consequences.values()):
+            raise ValueError('The observations do not match with the agents!')
+        for name, values in consequences.items():
+            self._get_column(name)[agent_ids] = values
@@ -0,0 +1,274 @@
+"""
+Chunked replay of observation logs
+
+The logs are CSV files with a header of antecedent names, or NumPy .npy files
+with structured arrays or with plain 2-D arrays and the given column names.
+Only the selected columns of the CSV logs and the structured arrays are read, when the columns are given.
+The observations are read and evaluated in chunks of rows, so the memory usage
+does not depend on the length of the logs.
+"""
+
+import csv
+import itertools
+import queue
+import threading
+
+import numpy as np
+
+
+# The marker of the end of the chunks in the prefetch queue
+_END = object()
+
+
+def _find_non_numeric_cell(lines, indices):
+    """
+    Find the first cell of the lines which is not a number.
+    :param lines: the CSV lines
+    :param indices: the indices of the checked columns
+    :return: the row offset, the column index and the value of the cell, None when all cells are numbers
+    """
+    for offset, row in enumerate(csv.reader(lines)):
+        for j in indices:
+            if j < len(row):
+                try:
+                    float(row[j])
+                except ValueError:
+                    return offset, j, row[j]
+    return None
+
+
+def read_csv_chunks(stream, chunk_size=65536, columns=None):
+    """
+    Read the observations of a CSV log in chunks.
+    :param stream: a text stream of the CSV data with a header of column names
+    :param chunk_size: the maximal number of rows in a chunk
+    :param columns: the names of the selected columns, all columns are read when it is None
+    :return: the generator of dictionaries with column names and arrays of values
+    :raise ValueError: when the header is missing, a selected column is missing, non-numeric or a row is invalid
+    """
+    if chunk_size < 1:
+        raise ValueError('The chunk size should be positive!')
+    header = next(csv.reader([stream.readline()]), None)
+    if not header:
+        raise ValueError('The header of the observation log is missing!')
+    header = [column.strip() for column in header]
+    if columns is None:
+        names = header
+        indices = list(range(len(header)))
+    else:
+        names = list(columns)
+        for name in names:
+            if name not in header:
+                raise ValueError('The column "{}" is missing from the header of the observation log!'.format(name))
+        indices = [header.index(name) for name in names]
+    row_index = 0
+    while True:
+        lines = list(itertools.islice(stream, chunk_size))
+        if not lines:
+            break
+        try:
+            values = np.loadtxt(lines, delimiter=',', dtype=float, ndmin=2, usecols=indices)
+        except ValueError as error:
+            cell = _find_non_numeric_cell(lines, indices)
+            if cell is not None:
+                offset, j, value = cell
+                raise ValueError('The column "{}" has the non-numeric value "{}" in the row {}!'.format(
+                    header[j], value, row_index + offset
+                ))
+            raise ValueError('Invalid observation after the row {}! ({})'.format(row_index, error))
+        if len(values) == 0:
+            continue
+        if columns is None and values.shape[1] != len(header):
+            raise ValueError('The rows after the row {} have {} columns instead of {}!'.format(
+                row_index, values.shape[1], len(header)
+            ))
+        row_index += len(values)
+        yield {name: values[:, k] for k, name in enumerate(names)}
+
+
+def read_binary_chunks(path, chunk_size=65536, columns=None):
+    """
+    Read the observations of a .npy log in chunks.
+    The file is memory mapped, only the current chunk is copied.
+    :param path: the path of the .npy file
+    :param chunk_size: the maximal number of rows in a chunk
+    :param columns: the column names of a plain 2-D array, the field names are used for structured arrays
+    :return: the generator of dictionaries with column names and arrays of values
+    :raise ValueError: when the columns do not match with the array
+    """
+    if chunk_size < 1:
+        raise ValueError('The chunk size should be positive!')
+    data = np.load(path, mmap_mode='r')
+    if data.dtype.names is not None:
+        names = list(data.dtype.names) if columns is None else list(columns)
+        for start in range(0, len(data), chunk_size):
+            block = data[start:start + chunk_size]
+            yield {name: np.array(block[name], dtype=float) for name in names}
+        return
+    if columns is None or data.ndim != 2 or data.shape[1] != len(columns):
+        raise ValueError('The columns do not match with the observation array of "{}"!'.format(path))
+    for start in range(0, len(data), chunk_size):
+        block = np.array(data[start:start + chunk_size], dtype=float)
+        yield {name: block[:, j] for j, name in enumerate(columns)}
+
+
+def read_log_files(paths, chunk_size=65536, columns=None):
+    """
+    Read the observations of multiple logs one after the other.
+    The files with .npy suffix are binary logs, the others are CSV logs.
+    :param paths: the paths of the log files
+    :param chunk_size: the maximal number of rows in a chunk
+    :param columns: the column names of the plain 2-D binary logs, and the selected columns of the other logs
+    :return: the generator of dictionaries with column names and arrays of values
+    :raise ValueError: when a log is invalid
+    """
+    for path in paths:
+        if path.endswith('.npy'):
+            yield from read_binary_chunks(path, chunk_size, columns)
+        else:
+            with open(path, newline='') as log_file:
+                yield from read_csv_chunks(log_file, chunk_size, columns)
+
+
+def _put(items, item, stopped):
+    """
+    Put the item into the queue while the consumer waits for it.
+    :param items: the queue of the chunks
+    :param item: the next item
+    :param stopped: the event of the stopped consumer
+    :return: True when the item is in the queue, False when the consumer has stopped
+    """
+    while not stopped.is_set():
+        try:
+            items.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def prefetch_chunks(chunks, max_chunks=2):
+    """
+    Read the chunks in a background thread, so the reading overlaps with the evaluation.
+    :param chunks: an iterable of chunks
+    :param max_chunks: the maximal number of the chunks which are read ahead
+    :return: the generator of the chunks in the original order
+    :raise ValueError: when the number of chunks is not positive, the errors of the reader are raised again
+    """
+    if max_chunks < 1:
+        raise ValueError('The number of the prefetched chunks should be positive!')
+    items = queue.Queue(max_chunks)
+    stopped = threading.Event()
+
+    def read():
+        iterator = iter(chunks)
+        try:
+            for chunk in iterator:
+                if not _put(items, chunk, stopped):
+                    return
+            _put(items, _END, stopped)
+        except Exception as error:
+            _put(items, error, stopped)
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+    thread = threading.Thread(target=read, name='fribe-replay-reader', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def replay(engine, chunks, write=None, carry_states=False):
+    """
+    Evaluate the rule bases of the engine for the chunks of observations.
+    :param engine: the engine object
+    :param chunks: an iterable of dictionaries with antecedent names and arrays of values
+    :param write: a function which receives the consequences of the chunks
+        as dictionaries with rule base names and arrays of values, the consequences are dropped when it is None
+    :param carry_states: set the states of the engine to the consequences of the last observation
+        after every chunk when it is True, as the row by row evaluation does
+    :return: the number of the evaluated observations
+    :raise ValueError: when there is an invalid or missing antecedent in the observations
+    """
+    n_rows = 0
+    for columns in chunks:
+        consequences = engine.calc_consequences_batch(columns)
+        n_chunk_rows = len(next(iter(columns.values()), ()))
+        if write is not None:
+            write(consequences)
+        if carry_states and n_chunk_rows > 0:
+            engine.set_states({name: float(values[-1]) for name, values in consequences.items()})
+        n_rows += n_chunk_rows
+    return n_rows
+
+
+def replay_files(engine, paths, write=None, chunk_size=65536, columns=None, carry_states=False, max_chunks=2):
+    """
+    Evaluate the rule bases of the engine for the observation logs while the next chunks are read.
+    :param engine: the engine object
+    :param paths: the paths of the CSV and .npy logs in replay order
+    :param write: a function which receives the consequences of the chunks
+    :param chunk_size: the maximal number of rows in a chunk
+    :param columns: the column names of the plain 2-D binary logs, and the selected columns of the other logs
+    :param carry_states: set the states of the engine to the consequences of the last observation after every chunk
+    :param max_chunks: the maximal number of the chunks which are read ahead
+    :return: the number of the evaluated observations
+    :raise ValueError: when a log is invalid
+    """
+    chunks = prefetch_chunks(read_log_files(paths, chunk_size, columns), max_chunks)
+    try:
+        return replay(engine, chunks, write, carry_states)
+    finally:
+        chunks.close()
+
+
+class CsvWriter(object):
+    """Writes the consequences of the replayed chunks as CSV rows."""
+
+    def __init__(self, stream, names=None, float_format='%.17g'):
+        """
+        Initialize the writer.
+        :param stream: a text stream
+        :param names: the rule base names in column order, the names of the first chunk are used when it is None
+        :param float_format: the format of the values
+        """
+        self._stream = stream
+        self._names = None if names is None else list(names)
+        self._float_format = float_format
+        self._n_rows = 0
+        self._has_header = False
+
+    @property
+    def n_rows(self):
+        return self._n_rows
+
+    def __call__(self, consequences):
+        """
+        Write the consequences of a chunk.
+        :param consequences: a dictionary with rule base names and arrays of values
+        :return: None
+        :raise ValueError: when a rule base is missing from the consequences
+        """
+        if self._names is None:
+            self._names = list(consequences)
+        if not self._has_header:
+            self._stream.write(','.join(self._names) + '\n')
+            self._has_header = True
+        missing = [name for name in self._names if name not in consequences]
+        if missing:
+            raise ValueError('The consequences of {} are missing!'.format(missing))
+        if not self._names:
+            return
+        values = np.column_stack([consequences[name] for name in self._names])
+        np.savetxt(self._stream, values, fmt=self._float_format, delimiter=',')
+        self._n_rows += len(values)
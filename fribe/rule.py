@@ -6,6 +6,8 @@ Rule class definition
 class Rule(object):
     """Represents a rule."""
 
+    __slots__ = ('_description', '_predicates', '_consequent', '_multiplicity')
+
     def __init__(self, predicates=None, consequent=None):
         self._description = ''
         if predicates is None:
@@ -13,6 +15,7 @@ class Rule(object):
         else:
             self._predicates = predicates
         self._consequent = consequent
+        self._multiplicity = 1
 
     @property
     def description(self):
@@ -46,6 +49,21 @@ class Rule(object):
         """
         self._consequent = consequent
 
+    @property
+    def multiplicity(self):
+        return self._multiplicity
+
+    def set_multiplicity(self, multiplicity):
+        """
+        Set the number of the identical rules which are represented by the rule.
+        :param multiplicity: a positive integer
+        :return: None
+        :raise ValueError: when the multiplicity is not a positive integer
+        """
+        if int(multiplicity) != multiplicity or multiplicity < 1:
+            raise ValueError('The multiplicity of the rule should be a positive integer!')
+        self._multiplicity = int(multiplicity)
+
     @property
     def predicates(self):
         return self._predicates
@@ -2,10 +2,16 @@
 Rule base class definition
 """
 
+from fribe.compiled import CompiledRuleBase
+from fribe.ruletable import RuleTable
+from fribe.sparse import SparseCompiledRuleBase
+
 
 class RuleBase(object):
     """Represents a rule base."""
 
+    __slots__ = ('_name', '_description', '_rules', '_revision', '_antecedent_names')
+
     def __init__(self, name=''):
         """
         Initialize a rule base with the given name.
@@ -14,6 +20,8 @@ class RuleBase(object):
         self._name = name
         self._description = ''
         self._rules = []
+        self._revision = 0
+        self._antecedent_names = None
 
     @property
     def name(self):
@@ -39,6 +47,26 @@ class RuleBase(object):
         """
         self._description = description
 
+    @property
+    def rules(self):
+        return self._rules
+
+    @property
+    def revision(self):
+        return self._revision
+
+    def set_rules(self, rules, antecedent_names=None):
+        """
+        Replace the rules of the rule base.
+        :param rules: a list of rule objects or a rule table
+        :param antecedent_names: the antecedent names of the rules in the order of their first occurrence,
+            they are collected from the rules when it is None
+        :return: None
+        """
+        self._rules = rules
+        self._revision += 1
+        self._antecedent_names = list(antecedent_names) if antecedent_names is not None else None
+
     def add_rule(self, rule):
         """
         Add new rule to the rule base.
@@ -46,6 +74,24 @@ class RuleBase(object):
         :return: None
         """
         self._rules.append(rule)
+        self._revision += 1
+        self._antecedent_names = None
+
+    def compile(self, universes, layout='dense'):
+        """
+        Compile the rule base to matrix form for faster evaluation.
+        :param universes: all available universes in the behavior description
+        :param layout: 'dense' for rules x antecedents tables, 'sparse' for compressed sparse rows of the predicates
+        :return: a compiled rule base object
+        :raise ValueError: when a universe or a term of the rules is missing or the layout is invalid
+        """
+        if layout == 'sparse':
+            return SparseCompiledRuleBase(self, universes)
+        if layout != 'dense':
+            raise ValueError('Invalid compiled layout "{}"!'.format(layout))
+        if isinstance(self._rules, RuleTable) and not self._rules.is_materialized:
+            return CompiledRuleBase.from_rule_table(self, universes)
+        return CompiledRuleBase(self, universes)
 
     def calc_consequence(self, universes, observations):
         """
@@ -55,15 +101,16 @@ class RuleBase(object):
         :return: the calculated consequent value as a real number
         """
         distances = self.calc_distances_by_consequences(universes, observations)
+        multiplicities = self.collect_multiplicities_by_consequences()
         consequence = 0.0
         if self.has_zero_distance(distances):
-            consequence = self.calc_matching_mean(universes, distances)
+            consequence = self.calc_matching_mean(universes, distances, multiplicities)
         else:
             weight_sum = 0.0
             for symbol, distances in distances.items():
                 value = universes[self._name].get_term(symbol).value
-                for distance in distances:
-                    weight = 1.0 / (distance ** 2)
+                for distance, multiplicity in zip(distances, multiplicities[symbol]):
+                    weight = multiplicity / (distance ** 2)
                     consequence += value * weight
                     weight_sum += weight
             consequence /= weight_sum
@@ -78,10 +125,64 @@ class RuleBase(object):
         """
         consequence_symbols = self.collect_consequence_symbols()
         distances = {symbol: [] for symbol in consequence_symbols}
+        if isinstance(self._rules, RuleTable) and not self._rules.is_materialized:
+            self._calc_table_distances(universes, observations, distances)
+            return distances
         for rule in self._rules:
             distances[rule.consequent].append(self.calc_distance(universes, observations, rule))
         return distances
 
+    def _calc_table_distances(self, universes, observations, distances):
+        """
+        Calculate the rule distances of an unmaterialized rule table without creating rule views.
+        The predicate distances are calculated once per term, and summed in the order of the source rules,
+        so the results are the same as the ones of the rule objects.
+        :param universes: all available universes in the behavior description
+        :param observations: a dictionary with antecedent names and values
+        :param distances: the dictionary of the empty distance lists with consequent symbols
+        :return: None
+        :raise ValueError: when the observation is invalid
+        """
+        table = self._rules
+        antecedent_names = table.antecedent_names
+        term_names = table.term_names
+        predicate_orders = table.predicate_orders
+        consequent_distances = [distances.get(symbol) for symbol in table.consequent_names]
+        squares = [{} for _ in antecedent_names]
+        rows = zip(table.terms.tolist(), table.consequents.tolist())
+        for i, (row, consequent) in enumerate(rows):
+            columns = predicate_orders.get(i)
+            if columns is None:
+                columns = [j for j, term_index in enumerate(row) if term_index >= 0]
+            predicate_squares = []
+            for j in columns:
+                square = squares[j].get(row[j])
+                if square is None:
+                    distance = self.calc_predicate_distance(
+                        universes, observations, antecedent_names[j], term_names[j][row[j]]
+                    )
+                    square = distance ** 2
+                    squares[j][row[j]] = square
+                predicate_squares.append(square)
+            consequent_distances[consequent].append(sum(predicate_squares) / len(predicate_squares))
+
+    def collect_multiplicities_by_consequences(self):
+        """
+        Collect the multiplicities of the rules grouped by consequence symbols.
+        :return: a dictionary where the keys are the consequent symbols the values are the list of multiplicities
+            in the order of the rule distances
+        """
+        multiplicities = {}
+        if isinstance(self._rules, RuleTable) and not self._rules.is_materialized:
+            consequent_names = self._rules.consequent_names
+            rows = zip(self._rules.consequents.tolist(), self._rules.multiplicities.tolist())
+            for consequent, multiplicity in rows:
+                multiplicities.setdefault(consequent_names[consequent], []).append(multiplicity)
+            return multiplicities
+        for rule in self._rules:
+            multiplicities.setdefault(rule.consequent, []).append(rule.multiplicity)
+        return multiplicities
+
     def calc_distance(self, universes, observations, rule):
         """
         Calculate the distance of the observation from the given rule.
@@ -108,30 +209,59 @@ class RuleBase(object):
         """
         predicate_distances = []
         for antecedent, expected_symbol in rule.predicates.items():
-            if antecedent in universes:
-                if antecedent in observation:
-                    expected_value = universes[antecedent].get_term(expected_symbol).center
-                    universe = universes[antecedent]
-                    value = observation[antecedent]
-                    distance = universe.calc_distance(value, expected_value)
-                    predicate_distances.append(distance)
-                else:
-                    raise ValueError('The {} antecedent is missing from the observation!'.format(antecedent))
-            else:
-                # TODO: It should be checked when the rule has added!
-                raise ValueError('The universe is missing for the {}!'.format(antecedent))
+            distance = RuleBase.calc_predicate_distance(universes, observation, antecedent, expected_symbol)
+            predicate_distances.append(distance)
         return predicate_distances
 
+    @staticmethod
+    def calc_predicate_distance(universes, observation, antecedent, expected_symbol):
+        """
+        Calculate the distance of a predicate from the observation.
+        :param universes: all available universes in the behavior description
+        :param observation: a dictionary with antecedent names and values
+        :param antecedent: the name of the antecedent
+        :param expected_symbol: the term name of the predicate
+        :raise ValueError: when the observation is invalid
+        :return: a floating point value
+        """
+        if antecedent in universes:
+            if antecedent in observation:
+                expected_value = universes[antecedent].get_term(expected_symbol).center
+                universe = universes[antecedent]
+                value = observation[antecedent]
+                return universe.calc_distance(value, expected_value)
+            raise ValueError('The {} antecedent is missing from the observation!'.format(antecedent))
+        # TODO: It should be checked when the rule has added!
+        raise ValueError('The universe is missing for the {}!'.format(antecedent))
+
     def collect_consequence_symbols(self):
         """
         Collect the consequence symbols of the rules.
         :return: the set of consequence symbol names.
         """
         consequence_symbols = set()
+        if isinstance(self._rules, RuleTable) and not self._rules.is_materialized:
+            consequent_names = self._rules.consequent_names
+            for consequent in self._rules.consequents.tolist():
+                consequence_symbols.add(consequent_names[consequent])
+            return consequence_symbols
         for rule in self._rules:
             consequence_symbols.add(rule.consequent)
         return consequence_symbols
 
+    def collect_antecedent_names(self):
+        """
+        Collect the antecedent names of the rules.
+        :return: the list of antecedent names in the order of their first occurrence
+        """
+        if self._antecedent_names is None:
+            names = {}
+            for rule in self._rules:
+                for antecedent in rule.predicates:
+                    names[antecedent] = None
+            self._antecedent_names = list(names)
+        return self._antecedent_names
+
     @staticmethod
     def has_zero_distance(distances):
         """
@@ -144,17 +274,21 @@ class RuleBase(object):
                 return True
         return False
 
-    def calc_matching_mean(self, universes, distances):
+    def calc_matching_mean(self, universes, distances, multiplicities=None):
         """
         Calculate the mean of the matching values.
         :param universes: all available universes in the behavior description
         :param distances: {consequent symbol: [distances]} dictionary
+        :param multiplicities: {consequent symbol: [multiplicities]} dictionary, all rules are single when it is None
         :return: the mean of the values where the distance is zero
         """
         s = 0.0
         n = 0
         for consequent, distance in distances.items():
-            c = distance.count(0.0)
+            if multiplicities is None:
+                c = distance.count(0.0)
+            else:
+                c = sum(m for d, m in zip(distance, multiplicities[consequent]) if d == 0.0)
             if c > 0:
                 s += c * universes[self._name].get_term(consequent).value
                 n += c
@@ -0,0 +1,304 @@
+"""
+Rule table class definition
+"""
+
+from array import array
+
+import numpy as np
+
+from fribe.names import NameTable
+from fribe.rule import Rule
+
+
+class RuleView(object):
+    """Represents a row of a rule table with the read-only interface of the rule objects."""
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        """
+        Initialize the view of the row.
+        :param table: a rule table
+        :param index: the index of the rule in the table
+        """
+        self._table = table
+        self._index = index
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def description(self):
+        return self._table.descriptions.get(self._index, '')
+
+    @property
+    def multiplicity(self):
+        return int(self._table.multiplicities[self._index])
+
+    @property
+    def predicates(self):
+        return self._table.collect_predicates(self._index)
+
+    @property
+    def consequent(self):
+        return self._table.consequent_names[int(self._table.consequents[self._index])]
+
+
+class RuleTable(object):
+    """
+    Represents the rules of a rule base as term index tables.
+    The rows are accessed by read-only views, the rule objects are created when a rule is appended.
+    """
+
+    __slots__ = (
+        '_antecedent_names', '_term_names', '_consequent_names', '_terms', '_consequents', '_descriptions',
+        '_multiplicities', '_predicate_orders', '_rules'
+    )
+
+    def __init__(self, antecedent_names, term_names, consequent_names, terms, consequents, descriptions=None,
+                 multiplicities=None, predicate_orders=None):
+        """
+        Initialize the rule table.
+        :param antecedent_names: the antecedent names in column order
+        :param term_names: the lists of the term names of the antecedent columns
+        :param consequent_names: the term names of the consequent universe
+        :param terms: the term indices as a rules x antecedents array, -1 for the missing predicates
+        :param consequents: the consequent term indices of the rules
+        :param descriptions: the descriptions of the rules in a dictionary with rule indices
+        :param multiplicities: the multiplicities of the rules, all rules are single when it is None
+        :param predicate_orders: the columns of the predicates in the order of the source rules in a dictionary
+            with rule indices, only for the rules where it differs from the column order
+        """
+        self._antecedent_names = list(antecedent_names)
+        self._term_names = [list(names) for names in term_names]
+        self._consequent_names = list(consequent_names)
+        self._terms = terms
+        self._consequents = consequents
+        self._descriptions = descriptions or {}
+        if multiplicities is None:
+            multiplicities = np.ones(len(consequents), dtype=np.int32)
+        self._multiplicities = multiplicities
+        self._predicate_orders = predicate_orders or {}
+        self._rules = None
+
+    @property
+    def antecedent_names(self):
+        return self._antecedent_names
+
+    @property
+    def term_names(self):
+        return self._term_names
+
+    @property
+    def consequent_names(self):
+        return self._consequent_names
+
+    @property
+    def terms(self):
+        return self._terms
+
+    @property
+    def consequents(self):
+        return self._consequents
+
+    @property
+    def descriptions(self):
+        return self._descriptions
+
+    @property
+    def multiplicities(self):
+        return self._multiplicities
+
+    @property
+    def predicate_orders(self):
+        return self._predicate_orders
+
+    @property
+    def is_materialized(self):
+        return self._rules is not None
+
+    def __len__(self):
+        if self._rules is not None:
+            return len(self._rules)
+        return len(self._consequents)
+
+    def __iter__(self):
+        if self._rules is not None:
+            return iter(self._rules)
+        return (RuleView(self, i) for i in range(len(self._consequents)))
+
+    def __getitem__(self, index):
+        if self._rules is not None:
+            return self._rules[index]
+        n_rules = len(self._consequents)
+        if not -n_rules <= index < n_rules:
+            raise IndexError('The rule index {} is out of range!'.format(index))
+        return RuleView(self, index % n_rules)
+
+    def append(self, rule):
+        """
+        Append a rule object after the rules of the table.
+        :param rule: a rule object
+        :return: None
+        """
+        self._materialize().append(rule)
+
+    def get_predicate_columns(self, index):
+        """
+        Get the columns of the predicates of a table row.
+        :param index: the index of the rule
+        :return: the list of column indices in the order of the source rule
+        """
+        columns = self._predicate_orders.get(index)
+        if columns is not None:
+            return list(columns)
+        return [j for j, term_index in enumerate(self._terms[index].tolist()) if term_index >= 0]
+
+    def collect_predicates(self, index):
+        """
+        Collect the predicates of a table row.
+        :param index: the index of the rule
+        :return: a dictionary with antecedent names and term names in the order of the source rule
+        """
+        row = self._terms[index].tolist()
+        return {
+            self._antecedent_names[j]: self._term_names[j][row[j]] for j in self.get_predicate_columns(index)
+        }
+
+    def create_rule(self, index):
+        """
+        Create the rule object of a table row.
+        :param index: the index of the rule
+        :return: a rule object
+        """
+        rule = Rule(self.collect_predicates(index), self._consequent_names[int(self._consequents[index])])
+        if index in self._descriptions:
+            rule.set_description(self._descriptions[index])
+        if self._multiplicities[index] != 1:
+            rule.set_multiplicity(int(self._multiplicities[index]))
+        return rule
+
+    def _materialize(self):
+        """
+        Create the rule objects of all rows at the first access.
+        :return: the list of rule objects
+        """
+        if self._rules is None:
+            self._rules = [self.create_rule(i) for i in range(len(self._consequents))]
+        return self._rules
+
+
+class RuleTableBuilder(object):
+    """
+    Collects rules into a rule table without keeping the rule objects.
+    The antecedent and term names are interned, so the tables of an engine share the name objects.
+    The predicate order is recorded for the rules where it differs from the column order.
+    """
+
+    __slots__ = (
+        '_names', '_columns', '_antecedent_ids', '_term_ids', '_term_positions', '_consequent_ids',
+        '_consequent_positions', '_indptr', '_entries', '_consequents', '_multiplicities', '_descriptions',
+        '_predicate_orders'
+    )
+
+    def __init__(self, names=None):
+        """
+        Initialize an empty builder.
+        :param names: the name table of the engine, a private one is used when it is None
+        """
+        self._names = NameTable() if names is None else names
+        self._columns = {}
+        self._antecedent_ids = []
+        self._term_ids = []
+        self._term_positions = []
+        self._consequent_ids = []
+        self._consequent_positions = {}
+        self._indptr = array('q', [0])
+        self._entries = array('i')
+        self._consequents = array('i')
+        self._multiplicities = array('i')
+        self._descriptions = {}
+        self._predicate_orders = {}
+
+    @property
+    def antecedent_names(self):
+        return [self._names.get_name(name_id) for name_id in self._antecedent_ids]
+
+    def __len__(self):
+        return len(self._consequents)
+
+    def add_rule(self, rule):
+        """
+        Append the row of the rule.
+        :param rule: a rule object or a rule view
+        :return: None
+        """
+        columns = []
+        for antecedent, symbol in rule.predicates.items():
+            antecedent_id = self._names.intern(antecedent)
+            column = self._columns.get(antecedent_id)
+            if column is None:
+                column = len(self._antecedent_ids)
+                self._columns[antecedent_id] = column
+                self._antecedent_ids.append(antecedent_id)
+                self._term_ids.append([])
+                self._term_positions.append({})
+            self._entries.append(column)
+            self._entries.append(self._intern_term(symbol, self._term_ids[column], self._term_positions[column]))
+            columns.append(column)
+        if any(columns[k] > columns[k + 1] for k in range(len(columns) - 1)):
+            self._predicate_orders[len(self._consequents)] = tuple(columns)
+        self._indptr.append(len(self._entries) // 2)
+        self._consequents.append(self._intern_term(rule.consequent, self._consequent_ids, self._consequent_positions))
+        self._multiplicities.append(rule.multiplicity)
+        if rule.description:
+            self._descriptions[len(self._consequents) - 1] = rule.description
+
+    def _intern_term(self, symbol, term_ids, positions):
+        """
+        Get the position of the term name in the term list of a column.
+        :param symbol: the name of the term
+        :param term_ids: the identifiers of the terms of the column
+        :param positions: the positions of the terms in a dictionary with identifiers
+        :return: the position of the term
+        """
+        term_id = self._names.intern(symbol)
+        position = positions.get(term_id)
+        if position is None:
+            position = len(term_ids)
+            positions[term_id] = position
+            term_ids.append(term_id)
+        return position
+
+    def _select_term_type(self):
+        """
+        Select the narrowest integer type of the term indices.
+        :return: a signed numpy integer type
+        """
+        n_terms = max([len(term_ids) for term_ids in self._term_ids], default=0)
+        for dtype in (np.int8, np.int16):
+            if n_terms <= np.iinfo(dtype).max:
+                return dtype
+        return np.int32
+
+    def build(self):
+        """
+        Create the rule table of the collected rows.
+        :return: a rule table with the antecedent columns in the order of their first occurrence
+        """
+        n_rules = len(self._consequents)
+        entries = np.array(self._entries, dtype=np.int32).reshape(-1, 2)
+        rows = np.repeat(np.arange(n_rules), np.diff(np.array(self._indptr, dtype=np.int64)))
+        terms = np.full((n_rules, len(self._antecedent_ids)), -1, dtype=self._select_term_type())
+        terms[rows, entries[:, 0]] = entries[:, 1]
+        return RuleTable(
+            self.antecedent_names,
+            [[self._names.get_name(term_id) for term_id in term_ids] for term_ids in self._term_ids],
+            [self._names.get_name(term_id) for term_id in self._consequent_ids],
+            terms,
+            np.array(self._consequents, dtype=np.int32),
+            dict(self._descriptions),
+            np.array(self._multiplicities, dtype=np.int32),
+            dict(self._predicate_orders)
+        )
@@ -0,0 +1,69 @@
+"""
+Runtime-only entry point of the engine
+
+Only the evaluation core is imported. The parser stack is imported at the first access
+of the loader names, so the workers which evaluate prebuilt models start without it.
+"""
+
+import importlib
+
+from fribe.artifact import load_artifact
+from fribe.artifact import load_up_to_date_artifact
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+# The names which are imported on demand with their modules
+LAZY_NAMES = {
+    'Loader': 'fribe.loader',
+    'load_engine_from_file': 'fribe.loader',
+    'load_engine_from_files': 'fribe.loader',
+    'load_engine_from_string': 'fribe.loader'
+}
+
+__all__ = [
+    'Engine', 'Rule', 'RuleBase', 'Term', 'Universe', 'load_artifact', 'load_engine'
+] + sorted(LAZY_NAMES)
+
+
+def __getattr__(name):
+    """
+    Import the parser stack at the first access of its names.
+    :param name: the name of the attribute
+    :return: the object of the name
+    :raise AttributeError: when the name is not defined
+    """
+    module_name = LAZY_NAMES.get(name)
+    if module_name is None:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_NAMES))
+
+
+def load_engine(path, artifact_path=None):
+    """
+    Load the engine without parsing when possible.
+    The .artifact files and the up to date artifacts of the behavior descriptions are loaded directly,
+    the parser stack is imported only when the description has to be parsed.
+    :param path: the path of an artifact or a behavior description
+    :param artifact_path: the path of the artifact of the description, the path with .artifact suffix when it is None
+    :return: an engine object
+    :raise ValueError: when the artifact or the description is invalid
+    """
+    if path.endswith('.artifact'):
+        return load_artifact(path)
+    if artifact_path is None:
+        artifact_path = path + '.artifact'
+    engine = load_up_to_date_artifact(path, artifact_path)
+    if engine is None:
+        loader = importlib.import_module('fribe.loader')
+        engine = loader.load_engine_from_file(path, artifact_path)
+    return engine
@@ -0,0 +1,205 @@
+"""
+Scanner class definition
+"""
+
+import re
+
+from exprail.token import Token
+
+
+class Scanner(object):
+    """
+    Regular expression based tokenizer of the behavior descriptions.
+    It results the same tokens and errors as the grammar driven Tokenizer.
+    """
+
+    # Runs of ASCII characters which are skipped between the tokens
+    SKIP_PATTERN = re.compile(r'[^A-Za-z0-9"\-.\x80-\U0010ffff]*')
+    LETTER_PATTERN = re.compile(r'[A-Za-z]*')
+    DIGIT_PATTERN = re.compile(r'[0-9]*')
+    TEXT_PATTERN = re.compile(r'[^"\\]*')
+
+    def __init__(self, source, chunk_size=65536):
+        """
+        Initialize the scanner.
+        :param source: the source text as a string, or a text stream which has a read method
+        :param chunk_size: the number of characters which are read from the stream at once
+        """
+        if isinstance(source, str):
+            self._stream = None
+            self._buffer = source
+            self._is_finished = True
+        else:
+            self._stream = source
+            self._buffer = ''
+            self._is_finished = False
+        self._chunk_size = chunk_size
+        self._position = 0
+        self._token = Token('empty', '')
+
+    def get_token(self):
+        """
+        Get the last scanned token.
+        :return: a keyword, text, number or empty token
+        """
+        return self._token
+
+    def parse(self):
+        """
+        Scan the next token.
+        :return: None
+        :raise ValueError: when the source contains an invalid token
+        """
+        while True:
+            result = self._scan()
+            if result is not None:
+                self._token, self._position = result
+                return
+            self._read_chunk()
+
+    def _read_chunk(self):
+        """
+        Drop the scanned part of the buffer and append the next chunk of the stream.
+        :return: None
+        """
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._is_finished = True
+        self._buffer = self._buffer[self._position:] + chunk
+        self._position = 0
+
+    def _match_run(self, position, pattern, predicate):
+        """
+        Find the end of the run of the characters in a class.
+        :param position: the start position in the buffer
+        :param pattern: the pattern of the ASCII characters of the class
+        :param predicate: the string method which checks the other characters
+        :return: the position after the run
+        """
+        buffer = self._buffer
+        while True:
+            position = pattern.match(buffer, position).end()
+            if position < len(buffer) and buffer[position] >= '\x80' and predicate(buffer[position]):
+                position += 1
+            else:
+                return position
+
+    def _is_incomplete(self, position):
+        """
+        Check that the scanning has reached the end of the buffer before the end of the stream.
+        :param position: the current position in the buffer
+        :return: True, when the next chunk is necessary, else False
+        """
+        return position == len(self._buffer) and not self._is_finished
+
+    def _scan(self):
+        """
+        Scan the next token from the buffer.
+        :return: the token and the position after it, or None when the next chunk is necessary
+        :raise ValueError: when the source contains an invalid token
+        """
+        buffer = self._buffer
+        position = self._position
+        while True:
+            position = self.SKIP_PATTERN.match(buffer, position).end()
+            if position < len(buffer):
+                char = buffer[position]
+                if char >= '\x80' and not (char.isalpha() or char.isdigit()):
+                    position += 1
+                    continue
+            break
+        self._position = position
+        if position == len(buffer):
+            if self._is_finished:
+                return Token('empty', ''), position
+            return None
+        char = buffer[position]
+        if char == '"':
+            return self._scan_text(position)
+        elif char == '-' or char == '.' or char.isdigit():
+            return self._scan_number(position)
+        else:
+            return self._scan_keyword(position)
+
+    def _scan_keyword(self, position):
+        """
+        Scan a keyword.
+        :param position: the position of the first letter
+        :return: the token and the position after it, or None when the next chunk is necessary
+        """
+        end = self._match_run(position, self.LETTER_PATTERN, str.isalpha)
+        if self._is_incomplete(end):
+            return None
+        return Token('keyword', self._buffer[position:end]), end
+
+    def _scan_text(self, position):
+        """
+        Scan a quoted text with escaped quotation marks and backslashes.
+        :param position: the position of the opening quotation mark
+        :return: the token and the position after it, or None when the next chunk is necessary
+        :raise ValueError: when the text is unfinished or there is an invalid escape character
+        """
+        buffer = self._buffer
+        parts = []
+        position += 1
+        while True:
+            match = self.TEXT_PATTERN.match(buffer, position)
+            parts.append(match.group())
+            position = match.end()
+            if position == len(buffer):
+                if self._is_finished:
+                    raise ValueError('Unfinished string literal!')
+                return None
+            if buffer[position] == '"':
+                return Token('text', ''.join(parts)), position + 1
+            if position + 1 == len(buffer) and not self._is_finished:
+                return None
+            if position + 1 < len(buffer) and buffer[position + 1] in '\\"':
+                parts.append(buffer[position + 1])
+                position += 2
+            else:
+                raise ValueError('Invalid escape character!')
+
+    def _scan_number(self, position):
+        """
+        Scan an integer or a floating point number with optional sign.
+        :param position: the position of the sign, the first digit or the floating point
+        :return: the token and the position after it, or None when the next chunk is necessary
+        :raise ValueError: when the number is malformed
+        """
+        buffer = self._buffer
+        end = position
+        if buffer[end] == '-':
+            end += 1
+        if self._is_incomplete(end):
+            return None
+        if end < len(buffer) and buffer[end].isdigit():
+            end = self._match_run(end, self.DIGIT_PATTERN, str.isdigit)
+            if self._is_incomplete(end):
+                return None
+            if end < len(buffer) and buffer[end] == '.':
+                end = self._scan_fraction(end)
+        elif end < len(buffer) and buffer[end] == '.':
+            end = self._scan_fraction(end)
+        else:
+            raise ValueError('The - is not a valid number!')
+        if end is None:
+            return None
+        return Token('number', buffer[position:end]), end
+
+    def _scan_fraction(self, position):
+        """
+        Scan the fractional part of a number.
+        :param position: the position of the floating point
+        :return: the position after the number, or None when the next chunk is necessary
+        :raise ValueError: when there is no digit after the floating point
+        """
+        end = position + 1
+        if self._is_incomplete(end):
+            return None
+        if end < len(self._buffer) and self._buffer[end].isdigit():
+            end = self._match_run(end, self.DIGIT_PATTERN, str.isdigit)
+            if self._is_incomplete(end):
+                return None
+            return end
+        raise ValueError('Missing digit after floating point!')
@@ -0,0 +1,129 @@
+"""
+Rule base scheduling functions
+"""
+
+
+def collect_dependencies(rulebases):
+    """
+    Collect the rule bases which consequences are used as antecedents by other rule bases.
+    The rule bases which use their own consequence as antecedent get it from the observations.
+    :param rulebases: a dictionary with rule base names and rule base objects
+    :return: a dictionary with rule base names and the list of their required rule base names
+    """
+    dependencies = {}
+    for name, rulebase in rulebases.items():
+        dependencies[name] = [
+            antecedent for antecedent in rulebase.collect_antecedent_names()
+            if antecedent in rulebases and antecedent != name
+        ]
+    return dependencies
+
+
+def find_components(dependencies):
+    """
+    Find the strongly connected components of the dependency graph.
+    :param dependencies: a dictionary with rule base names and the list of their required rule base names
+    :return: the list of components as lists of rule base names,
+        the components and their members are in the order of the dependencies
+    """
+    indices = {}
+    low_links = {}
+    stack = []
+    on_stack = set()
+    components = []
+    for root in dependencies:
+        if root in indices:
+            continue
+        indices[root] = low_links[root] = len(indices)
+        stack.append(root)
+        on_stack.add(root)
+        path = [(root, iter(dependencies[root]))]
+        while path:
+            name, requirements = path[-1]
+            requirement = next(requirements, None)
+            if requirement is None:
+                path.pop()
+                if path:
+                    parent = path[-1][0]
+                    low_links[parent] = min(low_links[parent], low_links[name])
+                if low_links[name] == indices[name]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == name:
+                            break
+                    components.append(component)
+            elif requirement not in indices:
+                indices[requirement] = low_links[requirement] = len(indices)
+                stack.append(requirement)
+                on_stack.add(requirement)
+                path.append((requirement, iter(dependencies[requirement])))
+            elif requirement in on_stack:
+                low_links[name] = min(low_links[name], indices[requirement])
+    positions = {name: i for i, name in enumerate(dependencies)}
+    components = [sorted(component, key=positions.get) for component in components]
+    return sorted(components, key=lambda component: positions[component[0]])
+
+
+def find_cycles(rulebases):
+    """
+    Find the groups of rule bases which depend on each other.
+    :param rulebases: a dictionary with rule base names and rule base objects
+    :return: the list of cycles as lists of rule base names
+    """
+    return [component for component in find_components(collect_dependencies(rulebases)) if len(component) > 1]
+
+
+def build_layers(rulebases, allow_cycles=False):
+    """
+    Order the rule bases topologically into layers of independent rule bases.
+    The rule bases of a cycle are in the same layer, when the cycles are allowed,
+    and they read the consequences of each other from the observations.
+    :param rulebases: a dictionary with rule base names and rule base objects
+    :param allow_cycles: put the rule bases of the cycles into the same layer instead of raising an error
+    :return: the list of layers as lists of rule base names
+    :raise ValueError: when there is a cycle in the dependencies of the rule bases and the cycles are not allowed
+    """
+    dependencies = collect_dependencies(rulebases)
+    components = find_components(dependencies)
+    cycles = [component for component in components if len(component) > 1]
+    if cycles and not allow_cycles:
+        raise ValueError('There is a cycle in the dependencies of the rule bases {}!'.format(
+            ', '.join(str(cycle) for cycle in cycles)
+        ))
+    component_indices = {name: k for k, component in enumerate(components) for name in component}
+    n_requirements = [0] * len(components)
+    dependents = [[] for _ in components]
+    for name, required in dependencies.items():
+        k = component_indices[name]
+        for requirement in required:
+            requirement_index = component_indices[requirement]
+            if requirement_index != k and k not in dependents[requirement_index]:
+                dependents[requirement_index].append(k)
+                n_requirements[k] += 1
+    layers = []
+    layer = [k for k, n in enumerate(n_requirements) if n == 0]
+    while layer:
+        layers.append([name for k in layer for name in components[k]])
+        next_layer = []
+        for k in layer:
+            for dependent in dependents[k]:
+                n_requirements[dependent] -= 1
+                if n_requirements[dependent] == 0:
+                    next_layer.append(dependent)
+        layer = next_layer
+    return layers
+
+
+def evaluate_consequence(evaluator, universes, observations):
+    """
+    Calculate the consequence of a rule base evaluator.
+    It is a module level function, so it can be submitted to process pools.
+    :param evaluator: a rule base or an evaluator object of a rule base
+    :param universes: all available universes for reasoning
+    :param observations: the values of the antecedents as a dictionary
+    :return: the calculated consequent value as a real number
+    """
+    return evaluator.calc_consequence(universes, observations)
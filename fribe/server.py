@@ -0,0 +1,237 @@
+"""
+Micro-batching decision server and load generator
+"""
+
+import asyncio
+import json
+import time
+
+import numpy as np
+
+
+class BatchingServer(object):
+    """Represents an asyncio server which evaluates the concurrent requests in batches."""
+
+    def __init__(self, engine, max_batch_size=256, max_delay=0.002, max_pending=4096):
+        """
+        Initialize the server.
+        :param engine: the engine which calculates the consequences
+        :param max_batch_size: the maximal number of requests in a batch
+        :param max_delay: the maximal waiting time in seconds for filling a batch
+        :param max_pending: the maximal number of waiting requests, the further requests are rejected
+        """
+        self._engine = engine
+        self._max_batch_size = max_batch_size
+        self._max_delay = max_delay
+        self._max_pending = max_pending
+        self._queue = None
+        self._server = None
+        self._batch_task = None
+        self._writers = set()
+        self._statistics = {'requests': 0, 'rejected': 0, 'batches': 0}
+
+    @property
+    def statistics(self):
+        return dict(self._statistics)
+
+    @property
+    def sockets(self):
+        return self._server.sockets if self._server is not None else []
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """
+        Start serving on a TCP or a Unix socket.
+        :param host: the host name of the TCP socket
+        :param port: the port of the TCP socket, 0 for an arbitrary free port
+        :param path: the path of the Unix socket, the TCP socket is used when it is None
+        :return: None
+        """
+        self._queue = asyncio.Queue(maxsize=self._max_pending)
+        self._batch_task = asyncio.ensure_future(self._process_batches())
+        if path is None:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+        else:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path)
+
+    async def stop(self):
+        """
+        Stop serving and cancel the batch processing.
+        The waiting requests get error responses, then the client connections are closed.
+        :return: None
+        """
+        if self._server is not None:
+            self._server.close()
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+            self._batch_task = None
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._fail_requests(pending, 'The server has stopped!')
+        # NOTE: The answered requests are written before the connections are closed.
+        await asyncio.sleep(0)
+        for writer in list(self._writers):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    @staticmethod
+    def _fail_requests(batch, message):
+        """
+        Answer the requests with an error response.
+        :param batch: the list of (observations, future) pairs
+        :param message: the error message
+        :return: None
+        """
+        for _, future in batch:
+            if not future.done():
+                future.set_result({'error': message})
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Answer the line separated JSON requests of a connection one after the other.
+        :param reader: the stream reader of the connection
+        :param writer: the stream writer of the connection
+        :return: None
+        """
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self._handle_request(line)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _handle_request(self, line):
+        """
+        Queue the request for the next batch and wait for its consequences.
+        :param line: the request as an {"observations": {...}} JSON object
+        :return: the response as a {"consequences": {...}} or an {"error": "..."} dictionary
+        """
+        try:
+            observations = json.loads(line.decode())['observations']
+            if not isinstance(observations, dict):
+                raise ValueError('The observations should be an object!')
+        except (ValueError, KeyError, TypeError) as error:
+            return {'error': 'Invalid request! ({})'.format(error)}
+        if self._batch_task is None:
+            return {'error': 'The server has stopped!'}
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((observations, future))
+        except asyncio.QueueFull:
+            self._statistics['rejected'] += 1
+            return {'error': 'The server is overloaded!'}
+        self._statistics['requests'] += 1
+        return await future
+
+    async def _process_batches(self):
+        """
+        Collect the queued requests into batches and evaluate them.
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_delay
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._statistics['batches'] += 1
+            try:
+                responses = await loop.run_in_executor(None, self.evaluate_batch, [item[0] for item in batch])
+            except asyncio.CancelledError:
+                self._fail_requests(batch, 'The server has stopped!')
+                raise
+            except Exception as error:
+                self._fail_requests(batch, 'The evaluation has failed! ({})'.format(error))
+                continue
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    def evaluate_batch(self, batch):
+        """
+        Evaluate the observations of the requests at once.
+        The requests with the same antecedent names are evaluated together.
+        :param batch: the list of observation dictionaries
+        :return: the list of responses
+        """
+        groups = {}
+        for i, observations in enumerate(batch):
+            groups.setdefault(tuple(sorted(observations)), []).append(i)
+        responses = [None] * len(batch)
+        for names, indices in groups.items():
+            try:
+                columns = {name: np.array([batch[i][name] for i in indices], dtype=float) for name in names}
+                consequences = self._engine.calc_consequences_batch(columns)
+            except (ValueError, TypeError) as error:
+                if len(indices) == 1:
+                    responses[indices[0]] = {'error': str(error)}
+                else:
+                    for i in indices:
+                        responses[i] = self.evaluate_batch([batch[i]])[0]
+                continue
+            for k, i in enumerate(indices):
+                responses[i] = {'consequences': {name: float(values[k]) for name, values in consequences.items()}}
+        return responses
+
+
+async def generate_load(observations, n_requests, concurrency=16, host='127.0.0.1', port=None, path=None):
+    """
+    Send requests to a server over parallel connections and measure the latencies.
+    :param observations: the list of observation dictionaries, which are sent cyclically
+    :param n_requests: the total number of requests
+    :param concurrency: the number of parallel connections
+    :param host: the host name of the TCP socket
+    :param port: the port of the TCP socket
+    :param path: the path of the Unix socket, the TCP socket is used when it is None
+    :return: the latency percentiles in seconds, the throughput in requests per second and the responses
+    """
+    latencies = []
+    responses = [None] * n_requests
+    counter = iter(range(n_requests))
+
+    async def run_client():
+        if path is None:
+            reader, writer = await asyncio.open_connection(host, port)
+        else:
+            reader, writer = await asyncio.open_unix_connection(path)
+        try:
+            for i in counter:
+                request = json.dumps({'observations': observations[i % len(observations)]}).encode() + b'\n'
+                start = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                line = await reader.readline()
+                latencies.append(time.perf_counter() - start)
+                responses[i] = json.loads(line.decode())
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[run_client() for _ in range(concurrency)])
+    duration = time.perf_counter() - start
+    return {
+        'p50': float(np.percentile(latencies, 50)),
+        'p99': float(np.percentile(latencies, 99)),
+        'throughput': n_requests / duration,
+        'responses': responses
+    }
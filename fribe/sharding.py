@@ -0,0 +1,328 @@
+"""
+Shared memory, multi-process evaluation of observation batches
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from fribe.compiled import CompiledRuleBase
+from fribe.universe import Universe
+
+
+class SharedArrays(object):
+    """Represents NumPy arrays in shared memory blocks."""
+
+    def __init__(self):
+        self._blocks = {}
+        self._arrays = {}
+
+    def __contains__(self, key):
+        return key in self._arrays
+
+    def __getitem__(self, key):
+        return self._arrays[key]
+
+    def create(self, key, shape, dtype=float):
+        """
+        Create a new array in a shared memory block.
+        :param key: the key of the array
+        :param shape: the shape of the array
+        :param dtype: the data type of the array
+        :return: the array
+        """
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self._blocks[key] = block
+        self._arrays[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        return self._arrays[key]
+
+    def put(self, key, array):
+        """
+        Copy the array into a new shared memory block.
+        :param key: the key of the array
+        :param array: the array
+        :return: the shared copy of the array
+        """
+        array = np.ascontiguousarray(array)
+        shared = self.create(key, array.shape, array.dtype)
+        shared[...] = array
+        return shared
+
+    def describe(self, keys=None):
+        """
+        Describe the arrays for attaching them in other processes.
+        :param keys: the keys of the described arrays, all arrays when it is None
+        :return: a dictionary with the keys and (block name, shape, data type) tuples
+        """
+        if keys is None:
+            keys = self._arrays.keys()
+        return {key: (self._blocks[key].name, self._arrays[key].shape, self._arrays[key].dtype.str) for key in keys}
+
+    def attach(self, descriptions):
+        """
+        Attach the arrays which are created by an other process.
+        :param descriptions: a dictionary with the keys and (block name, shape, data type) tuples
+        :return: None
+        """
+        for key, (name, shape, dtype) in descriptions.items():
+            block = shared_memory.SharedMemory(name=name)
+            self._blocks[key] = block
+            self._arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+    def release(self, key, unlink=False):
+        """
+        Release the array.
+        :param key: the key of the array
+        :param unlink: destroy the shared memory block, when it is True
+        :return: None
+        """
+        del self._arrays[key]
+        block = self._blocks.pop(key)
+        block.close()
+        if unlink:
+            block.unlink()
+
+    def release_all(self, unlink=False):
+        """
+        Release all arrays.
+        :param unlink: destroy the shared memory blocks, when it is True
+        :return: None
+        """
+        for key in list(self._arrays.keys()):
+            self.release(key, unlink)
+
+
+class SharedUniverse(object):
+    """Represents the lookup tables of a universe in shared memory for the vectorized value calculation."""
+
+    def __init__(self, centers, values):
+        """
+        Initialize the universe.
+        :param centers: the sorted centers of the terms
+        :param values: the values of the terms in the order of the centers
+        """
+        self._center_array = centers
+        self._value_array = values
+        self._min_center = centers[0]
+        self._max_center = centers[-1]
+
+    def get_lookup_tables(self):
+        """
+        Get the centers and the values of the terms in increasing order of the centers.
+        :return: the centers and the values as arrays
+        """
+        return self._center_array, self._value_array
+
+    def calc_domain_mask(self, xs):
+        """
+        Check that the values are on the defined domain.
+        :param xs: an array of real values
+        :return: an array of True, where the x is in the domain, else False
+        """
+        xs = np.asarray(xs, dtype=float)
+        return (xs >= self._min_center) & (xs <= self._max_center)
+
+    def calc_values(self, xs, fill_value=None):
+        """
+        Calculate the values of the universe at the given points.
+        :param xs: an array of real values
+        :param fill_value: the result at the points out of the domain, raise an error when it is None
+        :return: the values of the universe as an array
+        :raise ValueError: when any of the xs is out of the domain of the universe and there is no fill value
+        """
+        xs = np.asarray(xs, dtype=float)
+        inside = self.calc_domain_mask(xs)
+        if fill_value is None and not inside.all():
+            outside = xs[~inside]
+            raise ValueError('The {} values {} are out of the domain!'.format(len(outside), outside[:8].tolist()))
+        ys = Universe.interpolate_values(self._center_array, self._value_array, xs)
+        if fill_value is not None:
+            ys = np.where(inside, ys, fill_value)
+        return ys
+
+
+_worker = {}
+
+
+def _initialize_worker(universe_names, models, descriptions):
+    """
+    Attach the shared lookup tables and rule tables in a worker process.
+    :param universe_names: the names of the universes which are required by the rule bases
+    :param models: a dictionary with rule base names and antecedent name lists
+    :param descriptions: the descriptions of the shared tables
+    :return: None
+    """
+    arrays = SharedArrays()
+    arrays.attach(descriptions)
+    universes = {
+        name: SharedUniverse(arrays['universe:' + name + ':centers'], arrays['universe:' + name + ':values'])
+        for name in universe_names
+    }
+    compiled = {}
+    for name, antecedent_names in models.items():
+        compiled[name] = CompiledRuleBase.from_tables(
+            name, antecedent_names,
+            arrays[name + ':centers'], arrays[name + ':mask'], arrays[name + ':values'], arrays[name + ':ranges'],
+            arrays[name + ':multiplicities']
+        )
+    _worker.update({'universes': universes, 'arrays': arrays, 'compiled': compiled, 'observations': None})
+
+
+def _evaluate_shard(rulebase_name, columns, description, start, end):
+    """
+    Evaluate a rule base for a range of the shared observation rows in a worker process.
+    The consequences are written to the column of the rule base.
+    :param rulebase_name: the name of the rule base
+    :param columns: a dictionary with the names and the indices of the observation columns
+    :param description: the description of the shared observation array
+    :param start: the index of the first row
+    :param end: the index after the last row
+    :return: None
+    :raise ValueError: when the observations are invalid
+    """
+    arrays = _worker['arrays']
+    if _worker['observations'] != description['observations']:
+        if 'observations' in arrays:
+            arrays.release('observations')
+        arrays.attach(description)
+        _worker['observations'] = description['observations']
+    observations = arrays['observations']
+    compiled = _worker['compiled'][rulebase_name]
+    rows = {name: observations[start:end, columns[name]] for name in compiled.antecedent_names}
+    consequences = compiled.calc_consequences(_worker['universes'], rows)
+    observations[start:end, columns[rulebase_name]] = consequences
+
+
+class ShardedEvaluator(object):
+    """Represents the evaluation of observation batches by worker processes on shared memory tables."""
+
+    def __init__(self, engine, n_workers=None, shard_size=None):
+        """
+        Compile the universes and the rule bases of the engine into shared memory and start the worker processes.
+        The consequences are written in place to the columns of the rule bases in the shared observation array.
+        The evaluator should be recreated after the rules or the terms of the engine have changed.
+        :param engine: the engine which contains the universes and the rule bases
+        :param n_workers: the number of worker processes, the number of processors when it is None
+        :param shard_size: the number of observations in a task, an even split between the workers when it is None
+        :raise ValueError: when there is a cycle in the dependencies of the rule bases
+        """
+        self._engine = engine
+        self._layers = engine.get_layers()
+        for layer in self._layers:
+            for rulebase_name in layer:
+                antecedent_names = engine.get_rulebase(rulebase_name).collect_antecedent_names()
+                if any(name in layer and name != rulebase_name for name in antecedent_names):
+                    raise ValueError('The sharded evaluation requires rule bases without cyclic dependencies!')
+        self._n_workers = n_workers or os.cpu_count() or 1
+        self._shard_size = shard_size
+        self._arrays = SharedArrays()
+        self._column_names = []
+        models = {}
+        for rulebase_name in engine.rulebase_names:
+            compiled = engine.get_compiled_rulebase(rulebase_name)
+            models[rulebase_name] = compiled.antecedent_names
+            self._arrays.put(rulebase_name + ':centers', compiled.centers)
+            self._arrays.put(rulebase_name + ':mask', compiled.mask)
+            self._arrays.put(rulebase_name + ':values', compiled.values)
+            self._arrays.put(rulebase_name + ':ranges', compiled.ranges)
+            self._arrays.put(rulebase_name + ':multiplicities', compiled.multiplicities)
+            for name in compiled.antecedent_names + [rulebase_name]:
+                if name not in self._column_names:
+                    self._column_names.append(name)
+        self._models = models
+        self._columns = {name: j for j, name in enumerate(self._column_names)}
+        for name in self._column_names:
+            centers, values = engine.universes[name].get_lookup_tables()
+            self._arrays.put('universe:' + name + ':centers', centers)
+            self._arrays.put('universe:' + name + ':values', values)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._n_workers,
+            initializer=_initialize_worker,
+            initargs=(list(self._column_names), models, self._arrays.describe())
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Stop the workers and destroy the shared memory blocks.
+        :return: None
+        """
+        self._executor.shutdown()
+        self._arrays.release_all(unlink=True)
+
+    def _prepare_observations(self, n_rows):
+        """
+        Provide a shared observation array with at least the given number of rows.
+        :param n_rows: the number of observations
+        :return: the shared observation array
+        """
+        if 'observations' in self._arrays and len(self._arrays['observations']) >= n_rows:
+            return self._arrays['observations']
+        if 'observations' in self._arrays:
+            self._arrays.release('observations', unlink=True)
+        return self._arrays.create('observations', (max(1, n_rows), len(self._column_names)))
+
+    def calc_consequences(self, observations, columns=None):
+        """
+        Calculate the consequences of the rule bases for multiple observations.
+        :param observations: a dictionary with antecedent names and arrays of values,
+            or an observations x antecedents array when the columns are given
+        :param columns: the antecedent names in the column order of the observations array
+        :return: the consequences in a dictionary with rule base names and arrays of values
+        :raise ValueError: when there is an invalid or missing antecedent in the observations
+            or a consequence of a rule base which is used by other rule bases is observed
+        """
+        if columns is not None:
+            observations = np.asarray(observations, dtype=float)
+            if observations.ndim != 2 or observations.shape[1] != len(columns):
+                raise ValueError('The observations array does not match with the columns!')
+            observations = {name: observations[:, j] for j, name in enumerate(columns)}
+        self._engine.check_observations(observations)
+        lengths = {len(values) for values in observations.values()}
+        if len(lengths) > 1:
+            raise ValueError('The observed antecedent columns have different lengths!')
+        n_rows = lengths.pop() if lengths else 0
+        shared = self._prepare_observations(n_rows)
+        available = set()
+        for name in self._column_names:
+            if name in observations:
+                shared[:n_rows, self._columns[name]] = observations[name]
+                available.add(name)
+        for layer in self._layers:
+            for rulebase_name in layer:
+                for antecedent in self._models[rulebase_name]:
+                    if antecedent not in available:
+                        raise ValueError('The {} antecedent is missing from the observation!'.format(antecedent))
+            if n_rows > 0:
+                self._evaluate_layer(layer, n_rows)
+            available.update(layer)
+        return {name: shared[:n_rows, self._columns[name]].copy() for name in self._models}
+
+    def _evaluate_layer(self, layer, n_rows):
+        """
+        Evaluate the rule bases of a layer by the workers.
+        :param layer: the list of rule base names
+        :param n_rows: the number of observations
+        :return: None
+        :raise ValueError: when the observations are invalid
+        """
+        shard_size = self._shard_size or -(-n_rows // self._n_workers)
+        description = self._arrays.describe(['observations'])
+        futures = []
+        for rulebase_name in layer:
+            for start in range(0, n_rows, shard_size):
+                end = min(start + shard_size, n_rows)
+                futures.append(self._executor.submit(
+                    _evaluate_shard, rulebase_name, self._columns, description, start, end
+                ))
+        for future in futures:
+            future.result()
@@ -0,0 +1,155 @@
+"""
+Streaming sources of the behavior descriptions
+"""
+
+import os
+
+from exprail.token import Token
+
+
+class StreamSource(object):
+    """
+    Character source of a text stream, which is read in chunks.
+    It follows the protocol of the exprail SourceString as the tokenizer uses it:
+    the current token is an empty token before the first parse, every parse steps to the next char token,
+    and the parse after the last character sets the empty token again.
+    """
+
+    def __init__(self, stream, chunk_size=65536):
+        """
+        Initialize the source.
+        :param stream: a text stream which has a read method
+        :param chunk_size: the number of characters which are read from the stream at once
+        """
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._chunk = ''
+        self._index = 0
+        self._token = Token('empty', '')
+
+    def get_token(self):
+        """
+        Get the current character.
+        :return: a char token, or an empty token at the end of the stream
+        """
+        return self._token
+
+    def parse(self):
+        """
+        Step to the next character.
+        :return: None
+        """
+        if self._index == len(self._chunk):
+            self._chunk = self._stream.read(self._chunk_size)
+            self._index = 0
+            if not self._chunk:
+                self._token = Token('empty', '')
+                return
+        self._token = Token('char', self._chunk[self._index])
+        self._index += 1
+
+
+class IncludeGuard(object):
+    """Token source which rejects the include directives, when there is no file for resolving their paths."""
+
+    def __init__(self, tokenizer):
+        """
+        Initialize the guard.
+        :param tokenizer: the tokenizer or the scanner of the source
+        """
+        self._tokenizer = tokenizer
+
+    def get_token(self):
+        """
+        Get the last token.
+        :return: a keyword, text, number or empty token
+        """
+        return self._tokenizer.get_token()
+
+    def parse(self):
+        """
+        Read the next token.
+        :return: None
+        :raise ValueError: when the source contains an invalid token or an include directive
+        """
+        self._tokenizer.parse()
+        token = self._tokenizer.get_token()
+        if token.type == 'keyword' and token.value == 'include':
+            raise ValueError('The include directive requires a behavior description file!')
+
+
+class IncludeFilter(object):
+    """
+    Token source which replaces the include "path" directives with the tokens of the included files.
+    The paths are relative to the directory of the including file.
+    """
+
+    def __init__(self, create_tokenizer, path):
+        """
+        Open the main file.
+        :param create_tokenizer: a function which creates a tokenizer from a text stream
+        :param path: the path of the main file
+        :raise OSError: when the file cannot be opened
+        """
+        self._create_tokenizer = create_tokenizer
+        self._files = []
+        self._paths = []
+        self._token = Token('empty', '')
+        self._open(path)
+
+    @property
+    def paths(self):
+        return list(self._paths)
+
+    def _open(self, path):
+        """
+        Open a file and tokenize it until its end.
+        :param path: the path of the file
+        :return: None
+        :raise ValueError: when the file includes itself directly or indirectly
+        """
+        path = os.path.normpath(os.path.abspath(path))
+        if path in [opened_path for opened_path, _, _ in self._files]:
+            raise ValueError('The file "{}" includes itself!'.format(path))
+        stream = open(path, encoding='utf-8')
+        self._files.append((path, stream, self._create_tokenizer(stream)))
+        self._paths.append(path)
+
+    def close(self):
+        """
+        Close the open files.
+        :return: None
+        """
+        while self._files:
+            self._files.pop()[1].close()
+
+    def get_token(self):
+        """
+        Get the last token.
+        :return: a keyword, text, number or empty token
+        """
+        return self._token
+
+    def parse(self):
+        """
+        Read the next token from the innermost open file.
+        :return: None
+        :raise ValueError: when the source contains an invalid token or include directive
+        """
+        while self._files:
+            path, stream, tokenizer = self._files[-1]
+            tokenizer.parse()
+            token = tokenizer.get_token()
+            if token.type == 'keyword' and token.value == 'include':
+                tokenizer.parse()
+                target = tokenizer.get_token()
+                if target.type != 'text':
+                    raise ValueError('Missing path after include in "{}"!'.format(path))
+                self._open(os.path.join(os.path.dirname(path), target.value))
+            elif token.type == 'empty':
+                stream.close()
+                self._files.pop()
+            else:
+                self._token = token
+                return
+        self._token = Token('empty', '')
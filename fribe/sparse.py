@@ -0,0 +1,172 @@
+"""
+Sparse compiled rule base class definition
+"""
+
+import numpy as np
+
+from fribe.compiled import CompiledRuleBase
+from fribe.ruletable import RuleTable
+
+
+class SparseCompiledRuleBase(CompiledRuleBase):
+    """
+    Represents a rule base in compressed sparse row form.
+    The predicates of the i-th rule are the entries from indptr[i] to indptr[i + 1]
+    with the antecedent column indices and the mapped term centers in column order.
+    """
+
+    LAYOUT = 'sparse'
+
+    def __init__(self, rulebase, universes):
+        """
+        Compile the rules of the rule base.
+        :param rulebase: a rule base object
+        :param universes: all available universes in the behavior description
+        :raise ValueError: when a universe or a term of the rules is missing
+        """
+        self._name = rulebase.name
+        self._antecedent_names = list(rulebase.collect_antecedent_names())
+        for name in self._antecedent_names + [self._name]:
+            if name not in universes:
+                raise ValueError('The universe is missing for the {}!'.format(name))
+        rules = rulebase.rules
+        if isinstance(rules, RuleTable) and not rules.is_materialized:
+            self._compile_rule_table(rules, universes)
+        else:
+            self._compile_rules(rules, universes)
+        self._ranges = np.array([universes[name].calc_value_range() for name in self._antecedent_names])
+        self._counts = np.diff(self._indptr)
+        self._centers = None
+        self._mask = None
+        self.bind(rulebase, universes)
+
+    def _compile_rules(self, rules, universes):
+        """
+        Collect the predicates of the rule objects.
+        :param rules: the list of rule objects
+        :param universes: all available universes in the behavior description
+        :return: None
+        :raise ValueError: when a term of the rules is missing
+        """
+        columns = {name: j for j, name in enumerate(self._antecedent_names)}
+        consequent_universe = universes[self._name]
+        indptr = [0]
+        indices = []
+        data = []
+        self._values = np.zeros(len(rules))
+        self._multiplicities = np.ones(len(rules))
+        for i, rule in enumerate(rules):
+            predicates = sorted((columns[antecedent], symbol) for antecedent, symbol in rule.predicates.items())
+            for j, symbol in predicates:
+                universe = universes[self._antecedent_names[j]]
+                indices.append(j)
+                data.append(universe.calc_value(universe.get_term(symbol).center))
+            indptr.append(len(indices))
+            self._values[i] = consequent_universe.get_term(rule.consequent).value
+            self._multiplicities[i] = rule.multiplicity
+        self._indptr = np.array(indptr, dtype=np.int64)
+        self._indices = np.array(indices, dtype=np.int32)
+        self._data = np.array(data, dtype=float)
+
+    def _compile_rule_table(self, table, universes):
+        """
+        Collect the predicates of the term index tables at once.
+        :param table: a rule table
+        :param universes: all available universes in the behavior description
+        :return: None
+        :raise ValueError: when a term of the rules is missing
+        """
+        positions = {name: j for j, name in enumerate(self._antecedent_names)}
+        rows, table_columns = np.nonzero(table.terms >= 0)
+        term_indices = table.terms[rows, table_columns]
+        column_map = np.array([positions.get(name, -1) for name in table.antecedent_names], dtype=np.int32)
+        mapped_centers = []
+        offsets = [0]
+        for k, name in enumerate(table.antecedent_names):
+            if name in positions:
+                universe = universes[name]
+                mapped_centers.extend(universe.calc_value(universe.get_term(symbol).center)
+                                      for symbol in table.term_names[k])
+            offsets.append(len(mapped_centers))
+        columns = column_map[table_columns]
+        order = np.lexsort((columns, rows))
+        self._indices = columns[order].astype(np.int32)
+        center_indices = np.array(offsets[:-1])[table_columns] + term_indices
+        self._data = np.array(mapped_centers, dtype=float)[center_indices[order]]
+        self._indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(table)))]).astype(np.int64)
+        consequent_universe = universes[self._name]
+        consequent_values = np.array([consequent_universe.get_term(symbol).value for symbol in table.consequent_names])
+        self._values = consequent_values[table.consequents]
+        self._multiplicities = table.multiplicities.astype(float)
+
+    @property
+    def indptr(self):
+        return self._indptr
+
+    @property
+    def indices(self):
+        return self._indices
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def centers(self):
+        if self._centers is None:
+            self._centers = np.zeros((len(self._values), len(self._antecedent_names)))
+            self._centers[self._collect_rows(), self._indices] = self._data
+        return self._centers
+
+    @property
+    def mask(self):
+        if self._mask is None:
+            self._mask = np.zeros((len(self._values), len(self._antecedent_names)), dtype=bool)
+            self._mask[self._collect_rows(), self._indices] = True
+        return self._mask
+
+    def _collect_rows(self):
+        """
+        Collect the rule indices of the predicate entries.
+        :return: the array of rule indices
+        """
+        return np.repeat(np.arange(len(self._values)), self._counts)
+
+    def calc_chunk_size(self):
+        """
+        Calculate the number of observations which are evaluated at once in batch mode.
+        :return: a positive integer
+        """
+        return max(1, self.CHUNK_SIZE // max(1, len(self._values), len(self._data)))
+
+    def select_entries(self, rule_indices):
+        """
+        Select the predicate entries of the given rules.
+        :param rule_indices: the indices of the rules
+        :return: the row pointers, the column indices and the mapped centers of the selected rules
+        """
+        counts = self._counts[rule_indices]
+        indptr = np.concatenate([[0], np.cumsum(counts)])
+        positions = np.repeat(self._indptr[rule_indices] - indptr[:-1], counts) + np.arange(indptr[-1])
+        return indptr, self._indices[positions], self._data[positions]
+
+    def calc_mapped_distances(self, mapped, rule_indices=None):
+        """
+        Calculate the distances of the mapped observations from the rules.
+        Only the present predicates are visited.
+        :param mapped: the mapped values as an observations x antecedents array
+        :param rule_indices: the indices of the considered rules, all rules when it is None
+        :return: the distances as an observations x rules array
+        """
+        if rule_indices is None:
+            indptr, indices, data, counts = self._indptr, self._indices, self._data, self._counts
+        else:
+            indptr, indices, data = self.select_entries(rule_indices)
+            counts = self._counts[rule_indices]
+        sums = np.zeros((len(mapped), len(counts)))
+        squares = ((mapped[:, indices] - data) / self._ranges[indices]) ** 2
+        # NOTE: The k-th predicates of the rules are added in the k-th step as in the column order of the dense layout.
+        for k in range(int(counts.max()) if len(counts) > 0 else 0):
+            rules = np.flatnonzero(counts > k)
+            sums[:, rules] += squares[:, indptr[rules] + k]
+        return sums / counts
@@ -0,0 +1,230 @@
+"""
+Spatial index of the rules
+"""
+
+import heapq
+
+import numpy as np
+
+
+class KdTree(object):
+    """Represents a k-d tree of points with bucket leaves."""
+
+    # The maximal number of points in a leaf node
+    LEAF_SIZE = 32
+
+    def __init__(self, points):
+        """
+        Build the tree of the points.
+        :param points: the points as an n x d array
+        """
+        self._points = np.asarray(points, dtype=float)
+        self._order = np.arange(len(self._points))
+        self._nodes = []
+        if len(self._points) > 0:
+            self._build()
+
+    @property
+    def points(self):
+        return self._points
+
+    def _build(self):
+        """
+        Build the nodes of the tree by splitting the points at the median of the widest axis.
+        A node is an [axis, split value, left child, right child, start, end] list,
+        where the axis is -1 for the leaves.
+        :return: None
+        """
+        root = [-1, 0.0, -1, -1, 0, len(self._points)]
+        self._nodes.append(root)
+        stack = [0]
+        while stack:
+            node = self._nodes[stack.pop()]
+            start, end = node[4], node[5]
+            if end - start <= self.LEAF_SIZE:
+                continue
+            indices = self._order[start:end]
+            points = self._points[indices]
+            spreads = points.max(axis=0) - points.min(axis=0)
+            axis = int(np.argmax(spreads))
+            if spreads[axis] == 0.0:
+                continue
+            middle = (end - start) // 2
+            partition = np.argpartition(points[:, axis], middle)
+            self._order[start:end] = indices[partition]
+            node[0] = axis
+            node[1] = self._points[self._order[start + middle], axis]
+            node[2] = len(self._nodes)
+            self._nodes.append([-1, 0.0, -1, -1, start, start + middle])
+            node[3] = len(self._nodes)
+            self._nodes.append([-1, 0.0, -1, -1, start + middle, end])
+            stack.extend([node[2], node[3]])
+
+    def _calc_leaf_distances(self, node, point):
+        """
+        Calculate the squared distances of the points of the leaf.
+        :param node: a leaf node
+        :param point: the query point
+        :return: the point indices and their squared distances
+        """
+        indices = self._order[node[4]:node[5]]
+        differences = self._points[indices] - point
+        return indices, (differences ** 2).sum(axis=1)
+
+    def query_nearest(self, point, k):
+        """
+        Find the nearest points.
+        :param point: the query point
+        :param k: the number of the required points
+        :return: the list of (squared distance, point index) pairs in increasing order of the distances
+        """
+        if not self._nodes or k <= 0:
+            return []
+        point = np.asarray(point, dtype=float)
+        heap = []
+        stack = [(0, 0.0)]
+        while stack:
+            node_index, bound = stack.pop()
+            if len(heap) == k and bound > -heap[0][0]:
+                continue
+            node = self._nodes[node_index]
+            if node[0] < 0:
+                indices, distances = self._calc_leaf_distances(node, point)
+                for index, distance in zip(indices.tolist(), distances.tolist()):
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-distance, index))
+                    elif distance < -heap[0][0]:
+                        heapq.heapreplace(heap, (-distance, index))
+            else:
+                difference = point[node[0]] - node[1]
+                if difference < 0.0:
+                    near, far = node[2], node[3]
+                else:
+                    near, far = node[3], node[2]
+                stack.append((far, max(bound, difference ** 2)))
+                stack.append((near, bound))
+        return sorted((-distance, index) for distance, index in heap)
+
+    def query_radius(self, point, radius):
+        """
+        Find the points in the given distance.
+        :param point: the query point
+        :param radius: the maximal distance
+        :return: the list of the point indices
+        """
+        if not self._nodes:
+            return []
+        point = np.asarray(point, dtype=float)
+        limit = radius ** 2
+        result = []
+        stack = [0]
+        while stack:
+            node = self._nodes[stack.pop()]
+            if node[0] < 0:
+                indices, distances = self._calc_leaf_distances(node, point)
+                result.extend(indices[distances <= limit].tolist())
+            else:
+                difference = point[node[0]] - node[1]
+                if difference <= radius:
+                    stack.append(node[2])
+                if difference >= -radius:
+                    stack.append(node[3])
+        return result
+
+
+class RuleIndex(object):
+    """Represents a spatial index over the rules of a compiled rule base."""
+
+    def __init__(self, compiled, k=16):
+        """
+        Build the index of the rules.
+        The rules with the same antecedents are indexed together in a k-d tree of the normalized centers.
+        :param compiled: a compiled rule base object
+        :param k: the number of the nearest rules used for interpolation
+        """
+        self._compiled = compiled
+        self._k = k
+        self._groups = []
+        patterns = {}
+        for i, row in enumerate(compiled.mask):
+            patterns.setdefault(row.tobytes(), []).append(i)
+        for rule_indices in patterns.values():
+            rule_indices = np.array(rule_indices)
+            columns = np.flatnonzero(compiled.mask[rule_indices[0]])
+            points = compiled.centers[np.ix_(rule_indices, columns)] / compiled.ranges[columns]
+            self._groups.append((columns, rule_indices, KdTree(points)))
+
+    @property
+    def compiled(self):
+        return self._compiled
+
+    @property
+    def k(self):
+        return self._k
+
+    def is_up_to_date(self, rulebase, universes):
+        """
+        Check that the indexed rules reflect the current rules and terms.
+        :param rulebase: the source rule base object
+        :param universes: all available universes in the behavior description
+        :return: True, when no rule or term has added since the compilation, else False
+        """
+        return self._compiled.is_up_to_date(rulebase, universes)
+
+    def find_matching_rules(self, mapped):
+        """
+        Find the rules which have zero distance from the mapped observation.
+        :param mapped: the mapped observation in antecedent order
+        :return: the array of rule indices
+        """
+        candidates = []
+        for columns, rule_indices, tree in self._groups:
+            point = mapped[columns] / self._compiled.ranges[columns]
+            candidates.extend(rule_indices[tree.query_radius(point, 0.0)].tolist())
+        candidates = np.array(candidates, dtype=int)
+        distances = self._compiled.calc_mapped_distances(mapped[np.newaxis, :], candidates)[0]
+        return candidates[distances == 0.0]
+
+    def find_nearest_rules(self, mapped, k):
+        """
+        Find the nearest rules of the mapped observation.
+        :param mapped: the mapped observation in antecedent order
+        :param k: the number of the required rules
+        :return: the array of rule indices
+        """
+        nearest = []
+        for columns, rule_indices, tree in self._groups:
+            point = mapped[columns] / self._compiled.ranges[columns]
+            for distance, index in tree.query_nearest(point, k):
+                nearest.append((distance / len(columns), rule_indices[index]))
+        nearest.sort()
+        return np.array([index for _, index in nearest[:k]], dtype=int)
+
+    def calc_consequence(self, universes, observations):
+        """
+        Approximate the consequence of the rule base by the nearest rules.
+        The result is exact when there are rules with zero distance.
+        :param universes: all available universes for reasoning
+        :param observations: the values of the antecedents as a dictionary
+        :return: the calculated consequent value as a real number
+        :raise ValueError: when the observation is invalid
+        """
+        if self._compiled.count_rules() == 0:
+            raise ValueError('The rule base "{}" has no rules!'.format(self._compiled.name))
+        mapped = self._compiled.map_observations(universes, observations)
+        rule_indices = self.find_matching_rules(mapped)
+        if len(rule_indices) == 0:
+            rule_indices = self.find_nearest_rules(mapped, self._k)
+        distances = self._compiled.calc_mapped_distances(mapped[np.newaxis, :], rule_indices)
+        return float(self._compiled.calc_weighted_means(distances, rule_indices)[0])
+
+    def calc_approximation_error(self, universes, observations):
+        """
+        Calculate the error of the approximation against the evaluation of all rules.
+        :param universes: all available universes for reasoning
+        :param observations: the values of the antecedents as a dictionary
+        :return: the absolute difference of the consequences
+        :raise ValueError: when the observation is invalid
+        """
+        approximation = self.calc_consequence(universes, observations)
+        return abs(approximation - self._compiled.calc_consequence(universes, observations))
@@ -0,0 +1,129 @@
+"""
+State store class definition
+"""
+
+
+class StateStore(object):
+    """
+    Represents double buffered state values in fixed slots.
+    Only the slots which may differ between the buffers are copied at the beginning of the updates.
+    """
+
+    def __init__(self):
+        self._slots = {}
+        self._names = []
+        self._front = []
+        self._back = []
+        self._stale_slots = set()
+        self._written_slots = []
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    def add_slot(self, name):
+        """
+        Assign a slot to the state, when it has not assigned yet.
+        :param name: the name of the state
+        :return: the handle of the state
+        """
+        if name not in self._slots:
+            self._slots[name] = len(self._names)
+            self._names.append(name)
+            self._front.append(None)
+            self._back.append(None)
+        return self._slots[name]
+
+    def get_handle(self, name):
+        """
+        Get the handle of the state.
+        :param name: the name of the state
+        :return: the handle of the state
+        :raise KeyError: when the state has no slot
+        """
+        return self._slots[name]
+
+    def get(self, name):
+        """
+        Get the current value of the state.
+        :param name: the name of the state
+        :return: the state value
+        :raise KeyError: when the state has not set
+        """
+        value = self._front[self._slots[name]]
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def get_by_handle(self, handle):
+        """
+        Get the current value of the state by handle.
+        :param handle: the handle of the state
+        :return: the state value, None when it has not set
+        """
+        return self._front[handle]
+
+    def set(self, name, value):
+        """
+        Set the current value of the state, assign a slot when necessary.
+        :param name: the name of the state
+        :param value: the state value
+        :return: None
+        """
+        handle = self.add_slot(name)
+        self._front[handle] = value
+        self._stale_slots.add(handle)
+
+    def set_by_handle(self, handle, value):
+        """
+        Set the current value of the state by handle.
+        :param handle: the handle of the state
+        :param value: the state value
+        :return: None
+        """
+        self._front[handle] = value
+        self._stale_slots.add(handle)
+
+    def begin_update(self):
+        """
+        Start the calculation of the next values in the back buffer.
+        The slots which have changed since the previous update or written by an unfinished update are synchronized.
+        :return: None
+        """
+        front = self._front
+        back = self._back
+        for handle in self._stale_slots:
+            back[handle] = front[handle]
+        for handle in self._written_slots:
+            back[handle] = front[handle]
+        self._stale_slots.clear()
+        self._written_slots = []
+
+    def write(self, name, value):
+        """
+        Write the next value of the state to the back buffer.
+        :param name: the name of the state
+        :param value: the state value
+        :return: None
+        """
+        handle = self.add_slot(name)
+        self._back[handle] = value
+        self._written_slots.append(handle)
+
+    def commit(self):
+        """
+        Make the next values current by swapping the buffers.
+        The written slots of the new back buffer have the previous values.
+        :return: None
+        """
+        self._front, self._back = self._back, self._front
+        self._stale_slots.update(self._written_slots)
+        self._written_slots = []
+
+    def get_snapshot(self):
+        """
+        Get the current values of all states at once.
+        :return: the set state values in a dictionary with state names
+        """
+        values = list(self._front)
+        return {name: value for name, value in zip(self._names, values) if value is not None}
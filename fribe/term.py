@@ -6,6 +6,8 @@ Term class definition
 class Term(object):
     """Represents a term as a named symbol of the universe."""
 
+    __slots__ = ('_name', '_center', '_value')
+
     def __init__(self, name='', center=0.0, value=0.0):
         """
         Initialize the term object.
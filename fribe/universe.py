@@ -2,15 +2,26 @@
 Universe class definition
 """
 
+import bisect
+
+import numpy as np
+
 
 class Universe(object):
     """Represents the universe of discourse."""
 
+    __slots__ = (
+        '_name', '_description', '_terms', '_revision', '_sorted_terms', '_centers', '_center_array', '_value_array',
+        '_min_center', '_max_center', '_value_range'
+    )
+
     def __init__(self):
         # TODO: Inherit all class with name and description from the Block base class!
         self._name = ''
         self._description = ''
         self._terms = {}
+        self._revision = 0
+        self._invalidate_index()
 
     @property
     def name(self):
@@ -36,6 +47,14 @@ class Universe(object):
         """
         self._description = description
 
+    @property
+    def terms(self):
+        return list(self._terms.values())
+
+    @property
+    def revision(self):
+        return self._revision
+
     def add_term(self, term):
         """
         Add new term to the universe.
@@ -47,6 +66,47 @@ class Universe(object):
             raise ValueError('The term "{}" has already exist in the universe!'.format(term.name))
         # TODO: Check the monotonity of the term values!
         self._terms[term.name] = term
+        self._invalidate_index()
+
+    def _invalidate_index(self):
+        """
+        Drop the sorted lookup tables of the terms.
+        :return: None
+        """
+        self._revision += 1
+        self._sorted_terms = None
+        self._centers = None
+        self._center_array = None
+        self._value_array = None
+        self._min_center = None
+        self._max_center = None
+        self._value_range = None
+
+    def _build_index(self):
+        """
+        Build the sorted lookup tables of the terms.
+        :return: None
+        :raise ValueError: when the universe has no terms
+        """
+        if not self._terms:
+            raise ValueError('The universe "{}" has no terms!'.format(self._name))
+        terms = sorted(self._terms.values(), key=lambda term: term.center)
+        centers = [term.center for term in terms]
+        values = [term.value for term in terms]
+        self._sorted_terms = terms
+        self._centers = centers
+        self._center_array = np.array(centers, dtype=float)
+        self._value_array = np.array(values, dtype=float)
+        self._min_center = min(centers)
+        self._max_center = max(centers)
+        self._value_range = max(values) - min(values)
+
+    def update_index(self):
+        """
+        Update the lookup tables after the terms of the universe have modified directly.
+        :return: None
+        """
+        self._invalidate_index()
 
     def calc_distance(self, a, b):
         """
@@ -60,11 +120,19 @@ class Universe(object):
             a, b = b, a
         distance = self.calc_value(b) - self.calc_value(a)
         # NOTE: The normalization step is necessary!
-        max_value = max([term.value for term in self._terms.values()])
-        min_value = min([term.value for term in self._terms.values()])
-        distance /= max_value - min_value
+        distance /= self._value_range
         return distance
 
+    def calc_value_range(self):
+        """
+        Calculate the length of the range of the universe.
+        :return: the difference of the maximal and the minimal term values
+        :raise ValueError: when the universe has no terms
+        """
+        if self._centers is None:
+            self._build_index()
+        return self._value_range
+
     def calc_value(self, x):
         """
         Calculate the value of the universe at the given point.
@@ -78,21 +146,92 @@ class Universe(object):
         y = self.interpolate(left_term.center, left_term.value, right_term.center, right_term.value, x)
         return y
 
+    def calc_values(self, xs, fill_value=None):
+        """
+        Calculate the values of the universe at the given points.
+        :param xs: an array of real values
+        :param fill_value: the result at the points out of the domain, raise an error when it is None
+        :return: the values of the universe as an array
+        :raise ValueError: when any of the xs is out of the domain of the universe and there is no fill value
+        """
+        xs = np.asarray(xs, dtype=float)
+        inside = self.calc_domain_mask(xs)
+        if fill_value is None and not inside.all():
+            outside = xs[~inside]
+            raise ValueError('The {} values {} are out of the domain!'.format(len(outside), outside[:8].tolist()))
+        ys = self.interpolate_values(self._center_array, self._value_array, xs)
+        if fill_value is not None:
+            ys = np.where(inside, ys, fill_value)
+        return ys
+
+    def get_lookup_tables(self):
+        """
+        Get the centers and the values of the terms in increasing order of the centers.
+        :return: the centers and the values as arrays
+        :raise ValueError: when the universe has no terms
+        """
+        if self._centers is None:
+            self._build_index()
+        return self._center_array, self._value_array
+
+    @staticmethod
+    def interpolate_values(centers, values, xs):
+        """
+        Piecewise linear interpolation of arrays with the arithmetic of the interpolate method
+        :param centers: the sorted centers of the terms
+        :param values: the values of the terms in the order of the centers
+        :param xs: an array of real values in the range of the centers
+        :return: the interpolated values as an array
+        """
+        if len(centers) == 1:
+            return np.full(xs.shape, values[0])
+        indices = np.clip(np.searchsorted(centers, xs, side='left'), 0, len(centers) - 1)
+        right = np.maximum(indices, 1)
+        left = right - 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = (xs - centers[left]) / (centers[right] - centers[left])
+            ys = values[left] + (values[right] - values[left]) * ratio
+        return np.where(centers[indices] == xs, values[indices], ys)
+
+    def calc_distances(self, a, b):
+        """
+        Calculate the distances between the pairs of points on the universe.
+        :param a: an array of real values
+        :param b: an array of real values
+        :return: the distances as an array
+        :raise ValueError: when any of the points is out of the domain of the universe
+        """
+        a = np.asarray(a, dtype=float)
+        b = np.asarray(b, dtype=float)
+        distances = self.calc_values(np.maximum(a, b)) - self.calc_values(np.minimum(a, b))
+        distances /= self._value_range
+        return distances
+
+    def calc_domain_mask(self, xs):
+        """
+        Check that the values are on the defined domain.
+        :param xs: an array of real values
+        :return: an array of True, where the x is in the domain, else False
+        """
+        if self._centers is None:
+            self._build_index()
+        xs = np.asarray(xs, dtype=float)
+        return (xs >= self._min_center) & (xs <= self._max_center)
+
     def find_neighbor_terms(self, x):
         """
         Find the neighbor terms of the given value.
         :param x: a real value
         :return: the two nearest terms at the left and right side of x
         """
-        # TODO: Experimental bug fix. Create test cases!
-        terms = sorted(self._terms.values(), key=lambda term: term.center)
-        i = 0
-        while i < len(terms):
-            if terms[i].center == x:
-                return terms[i], terms[i]
-            elif terms[i].center < x < terms[i + 1].center:
-                return terms[i], terms[i + 1]
-            i += 1
+        if self._centers is None:
+            self._build_index()
+        centers = self._centers
+        i = bisect.bisect_left(centers, x)
+        if i < len(centers) and centers[i] == x:
+            return self._sorted_terms[i], self._sorted_terms[i]
+        elif 0 < i < len(centers):
+            return self._sorted_terms[i - 1], self._sorted_terms[i]
         raise ValueError('The value {} is out of the domain!'.format(x))
 
     @staticmethod
@@ -136,5 +275,6 @@ class Universe(object):
         :param x: a real value
         :return: True, when the x is in the domain, else False
         """
-        centers = [term.center for term in self._terms.values()]
-        return min(centers) <= x <= max(centers)
+        if self._centers is None:
+            self._build_index()
+        return self._min_center <= x <= self._max_center
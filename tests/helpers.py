@@ -0,0 +1,32 @@
+"""
+Common fixtures of the tests
+"""
+
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+def create_universe(name, terms):
+    """
+    Create a universe from term definitions.
+    :param name: the name of the universe
+    :param terms: the list of (name, center, value) tuples
+    :return: a universe object
+    """
+    universe = Universe()
+    universe.set_name(name)
+    for term_name, center, value in terms:
+        universe.add_term(Term(term_name, center, value))
+    return universe
+
+
+def create_universes():
+    """
+    Create the universes of the x and y antecedents and the z consequent.
+    :return: a dictionary with universe names and universe objects
+    """
+    return {
+        'x': create_universe('x', [('low', 0, 0), ('mid', 4, 2), ('high', 10, 10)]),
+        'y': create_universe('y', [('low', -1, 0), ('high', 1, 1)]),
+        'z': create_universe('z', [('low', 0, 0), ('mid', 0.5, 0.7), ('high', 1, 1)])
+    }
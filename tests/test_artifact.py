@@ -0,0 +1,193 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from fribe.artifact import calc_content_hash
+from fribe.artifact import load_artifact
+from fribe.artifact import read_artifact_header
+from fribe.artifact import save_artifact
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.ruletable import RuleTable
+from fribe.ruletable import RuleTableBuilder
+
+from helpers import create_universe
+
+
+def create_engine():
+    engine = Engine()
+    engine.add_universe(create_universe('x', [('low', 0, 0), ('mid', 4, 2), ('high', 10, 10)]))
+    engine.add_universe(create_universe('y', [('low', -1, 0), ('high', 1, 1)]))
+    engine.add_universe(create_universe('z', [('low', 0, 0), ('mid', 0.5, 0.7), ('high', 1, 1)]))
+    engine.universes['x'].set_description('The first antecedent')
+    rulebase = RuleBase('z')
+    rulebase.set_description('The consequent')
+    rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'y': 'low'}, 'low'))
+    rule = Rule({'x': 'mid', 'y': 'high'}, 'mid')
+    rule.set_description('The middle')
+    rulebase.add_rule(rule)
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+class GuardedRuleTable(RuleTable):
+    """Rule table which fails on rule by rule access"""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        raise AssertionError('The rules are iterated!')
+
+    def __getitem__(self, index):
+        raise AssertionError('The rules are iterated!')
+
+
+class ArtifactTest(unittest.TestCase):
+    """Test the binary engine artifacts"""
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._path = os.path.join(self._directory, 'engine.artifact')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_header(self):
+        save_artifact(create_engine(), self._path, calc_content_hash('source'))
+        header = read_artifact_header(self._path)
+        self.assertEqual(calc_content_hash(b'source'), header['content_hash'])
+        self.assertEqual(['x', 'y', 'z'], [universe['name'] for universe in header['universes']])
+        self.assertEqual(['z'], [rulebase['name'] for rulebase in header['rulebases']])
+        self.assertEqual(0, header['data_start'] % 64)
+
+    def test_universes_and_rules(self):
+        engine = create_engine()
+        save_artifact(engine, self._path)
+        loaded = load_artifact(self._path)
+        self.assertEqual(engine.universe_names, loaded.universe_names)
+        self.assertEqual('The first antecedent', loaded.universes['x'].description)
+        self.assertEqual(0.7, loaded.universes['z'].get_term('mid').value)
+        rulebase = loaded.get_rulebase('z')
+        self.assertEqual('The consequent', rulebase.description)
+        self.assertEqual(['x', 'y'], rulebase.collect_antecedent_names())
+        self.assertEqual(4, len(rulebase.rules))
+        expected = engine.get_rulebase('z').rules
+        for rule, expected_rule in zip(rulebase.rules, expected):
+            self.assertEqual(expected_rule.predicates, rule.predicates)
+            self.assertEqual(expected_rule.consequent, rule.consequent)
+            self.assertEqual(expected_rule.description, rule.description)
+
+    def test_saved_rule_table(self):
+        engine = create_engine()
+        rulebase = engine.get_rulebase('z')
+        expected = list(rulebase.rules)
+        rule_rows = RuleTableBuilder(engine.names)
+        for rule in expected:
+            rule_rows.add_rule(rule)
+        rulebase.set_rules(rule_rows.build(), rule_rows.antecedent_names)
+        save_artifact(engine, self._path)
+        self.assertFalse(rulebase.rules.is_materialized)
+        loaded = load_artifact(self._path).get_rulebase('z')
+        for rule, expected_rule in zip(loaded.rules, expected):
+            self.assertEqual(expected_rule.predicates, rule.predicates)
+            self.assertEqual(expected_rule.consequent, rule.consequent)
+            self.assertEqual(expected_rule.description, rule.description)
+
+    def test_saved_predicate_order(self):
+        engine = create_engine()
+        rulebase = engine.get_rulebase('z')
+        rulebase.add_rule(Rule({'y': 'low', 'x': 'mid'}, 'mid'))
+        expected = list(rulebase.rules)
+        for use_table in [False, True]:
+            if use_table:
+                rule_rows = RuleTableBuilder(engine.names)
+                for rule in expected:
+                    rule_rows.add_rule(rule)
+                rulebase.set_rules(rule_rows.build(), rule_rows.antecedent_names)
+            save_artifact(engine, self._path)
+            loaded = load_artifact(self._path)
+            for rule, expected_rule in zip(loaded.get_rulebase('z').rules, expected):
+                self.assertEqual(list(expected_rule.predicates.items()), list(rule.predicates.items()))
+            loaded.disable_compilation()
+            observations = {'x': 3.3, 'y': 0.1}
+            self.assertEqual(
+                rulebase.calc_consequence(engine.universes, observations), loaded.calc_consequence('z', observations)
+            )
+
+    def test_memory_mapped_compiled_tables(self):
+        save_artifact(create_engine(), self._path)
+        loaded = load_artifact(self._path)
+        compiled = loaded.get_compiled_rulebase('z')
+        self.assertIsInstance(compiled.centers.base, np.memmap)
+        self.assertFalse(compiled.centers.flags.writeable)
+        self.assertTrue(compiled.is_up_to_date(loaded.get_rulebase('z'), loaded.universes))
+
+    def test_same_consequences(self):
+        engine = create_engine()
+        save_artifact(engine, self._path)
+        loaded = load_artifact(self._path)
+        for x, y in [(0, -1), (10, 1), (2.5, 0.3), (7, -0.2)]:
+            observations = {'x': x, 'y': y}
+            expected = engine.get_rulebase('z').calc_consequence(engine.universes, observations)
+            self.assertEqual(expected, loaded.calc_consequence('z', observations))
+            loaded.enable_compilation()
+            self.assertAlmostEqual(expected, loaded.calc_consequence('z', observations))
+            loaded.disable_compilation()
+
+    def test_restored_evaluation_mode(self):
+        generator = random.Random(11)
+        samples = [{'x': generator.uniform(0, 10), 'y': generator.uniform(-1, 1)} for _ in range(600)]
+        for use_table in [False, True]:
+            engine = create_engine()
+            if use_table:
+                rulebase = engine.get_rulebase('z')
+                rule_rows = RuleTableBuilder(engine.names)
+                for rule in list(rulebase.rules) + [Rule({'y': 'low', 'x': 'mid'}, 'high')]:
+                    rule_rows.add_rule(rule)
+                rulebase.set_rules(rule_rows.build(), rule_rows.antecedent_names)
+            for layout in [None, 'dense', 'sparse']:
+                if layout is not None:
+                    engine.enable_compilation(layout)
+                save_artifact(engine, self._path)
+                loaded = load_artifact(self._path)
+                self.assertEqual(engine.is_compilation_enabled, loaded.is_compilation_enabled)
+                self.assertEqual(engine.layout, loaded.layout)
+                for observations in samples:
+                    engine.calc_consequences(observations)
+                    loaded.calc_consequences(observations)
+                    self.assertEqual(engine.get_state('z'), loaded.get_state('z'))
+
+    def test_table_evaluation(self):
+        engine = create_engine()
+        save_artifact(engine, self._path)
+        loaded = load_artifact(self._path)
+        self.assertFalse(loaded.is_compilation_enabled)
+        loaded.get_rulebase('z').rules.__class__ = GuardedRuleTable
+        for x, y in [(0, -1), (2.5, 0.3)]:
+            engine.calc_consequences({'x': x, 'y': y})
+            loaded.calc_consequences({'x': x, 'y': y})
+            self.assertEqual(engine.get_state('z'), loaded.get_state('z'))
+        batch = loaded.calc_consequences_batch({'x': [0, 2.5], 'y': [-1, 0.3]})
+        self.assertEqual(2, len(batch['z']))
+
+    def test_rules_added_after_loading(self):
+        save_artifact(create_engine(), self._path)
+        loaded = load_artifact(self._path)
+        rulebase = loaded.get_rulebase('z')
+        rulebase.add_rule(Rule({'x': 'mid'}, 'high'))
+        self.assertEqual(5, len(rulebase.rules))
+        compiled = loaded.get_compiled_rulebase('z')
+        self.assertEqual(5, compiled.count_rules())
+
+    def test_invalid_file(self):
+        with open(self._path, 'wb') as artifact_file:
+            artifact_file.write(b'not an artifact file')
+        with self.assertRaises(ValueError):
+            load_artifact(self._path)
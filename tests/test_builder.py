@@ -0,0 +1,154 @@
+import io
+import random
+import unittest
+
+import numpy as np
+
+from fribe.builder import build_rulebase
+from fribe.builder import build_rulebase_from_csv
+from fribe.builder import build_universe
+from fribe.compiled import CompiledRuleBase
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+
+
+def create_universes():
+    universes = [
+        build_universe('x', ['low', 'mid', 'high'], [0, 4, 10], [0, 2, 10]),
+        build_universe('y', ['low', 'high'], [-1, 1], [0, 1]),
+        build_universe('z', ['low', 'mid', 'high'], [0, 0.5, 1], [0, 0.7, 1])
+    ]
+    return {universe.name: universe for universe in universes}
+
+
+def create_rulebase():
+    rulebase = RuleBase('z')
+    rulebase.add_rule(Rule({'y': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'low', 'y': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'x': 'mid'}, 'mid'))
+    rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'high'))
+    return rulebase
+
+
+TERMS = [[-1, 1], [0, 0], [1, -1], [2, 1]]
+CONSEQUENTS = [2, 0, 1, 2]
+
+CSV_DATA = """x,z,y
+,high,high
+low,low,low
+mid,mid,
+high,high,high
+"""
+
+
+class BuilderTest(unittest.TestCase):
+    """Test the bulk construction of the universes and the rule bases"""
+
+    def test_universe(self):
+        universe = build_universe('x', ['low', 'high'], np.array([0, 10]), [1.5, 3], 'The x')
+        self.assertEqual('The x', universe.description)
+        self.assertEqual(['low', 'high'], [term.name for term in universe.terms])
+        self.assertEqual(3.0, universe.get_term('high').value)
+        self.assertEqual(2.25, universe.calc_value(5))
+
+    def test_invalid_universes(self):
+        with self.assertRaises(ValueError):
+            build_universe('x', ['low', 'high'], [0], [1, 2])
+        with self.assertRaises(ValueError):
+            build_universe('x', ['low', 'low'], [0, 1], [1, 2])
+        with self.assertRaises(ValueError):
+            build_universe('x', ['low', 'high'], [0, float('nan')], [1, 2])
+
+    def test_same_rules(self):
+        universes = create_universes()
+        rulebase = build_rulebase('z', universes, ['x', 'y'], TERMS, CONSEQUENTS)
+        expected = create_rulebase()
+        self.assertEqual(['y', 'x'], rulebase.collect_antecedent_names())
+        self.assertEqual(4, len(rulebase.rules))
+        for rule, expected_rule in zip(rulebase.rules, expected.rules):
+            self.assertEqual(expected_rule.predicates, rule.predicates)
+            self.assertEqual(expected_rule.consequent, rule.consequent)
+
+    def test_same_compiled_tables(self):
+        universes = create_universes()
+        rulebase = build_rulebase('z', universes, ['x', 'y'], TERMS, CONSEQUENTS)
+        compiled = rulebase.compile(universes)
+        self.assertFalse(rulebase.rules.is_materialized)
+        self.assertTrue(compiled.is_up_to_date(rulebase, universes))
+        expected = CompiledRuleBase(create_rulebase(), universes)
+        self.assertEqual(expected.antecedent_names, compiled.antecedent_names)
+        self.assertTrue(np.array_equal(expected.centers, compiled.centers))
+        self.assertTrue(np.array_equal(expected.mask, compiled.mask))
+        self.assertTrue(np.array_equal(expected.values, compiled.values))
+        self.assertTrue(np.array_equal(expected.ranges, compiled.ranges))
+
+    def test_same_consequences(self):
+        universes = create_universes()
+        engine = Engine()
+        for universe in universes.values():
+            engine.add_universe(universe)
+        engine.add_rulebase(build_rulebase('z', universes, ['x', 'y'], TERMS, CONSEQUENTS))
+        expected = create_rulebase()
+        generator = random.Random(0)
+        for _ in range(20):
+            observations = {'x': generator.uniform(0, 10), 'y': generator.uniform(-1, 1)}
+            self.assertEqual(
+                expected.calc_consequence(universes, observations),
+                engine.calc_consequence('z', observations)
+            )
+
+    def test_invalid_rules(self):
+        universes = create_universes()
+        with self.assertRaises(ValueError):
+            build_rulebase('z', universes, ['x', 'y'], [[3, 0]], [0])
+        with self.assertRaises(ValueError):
+            build_rulebase('z', universes, ['x', 'y'], [[0, 0]], [-1])
+        with self.assertRaises(ValueError):
+            build_rulebase('z', universes, ['x', 'y'], [[-1, -1]], [0])
+        with self.assertRaises(ValueError):
+            build_rulebase('z', universes, ['x', 'w'], [[0, 0]], [0])
+        with self.assertRaises(ValueError):
+            build_rulebase('z', universes, ['x', 'y'], [[0.5, 0]], [0])
+
+    def test_out_of_range_int64_indices(self):
+        universes = create_universes()
+        with self.assertRaises(ValueError):
+            build_rulebase('z', universes, ['x', 'y'], np.array([[2 ** 32, 0]], dtype=np.int64), [0])
+        with self.assertRaises(ValueError):
+            build_rulebase('z', universes, ['x', 'y'], [[0, 0]], np.array([2 ** 32 + 1], dtype=np.int64))
+        with self.assertRaises(ValueError):
+            build_rulebase('z', universes, ['x', 'y'], np.array([[-2 ** 32 - 1, 0]], dtype=np.int64), [0])
+        with self.assertRaises(ValueError):
+            build_rulebase('z', universes, ['x', 'y'], np.array([[0, 0]], dtype=np.uint64), [2 ** 63])
+
+    def test_csv(self):
+        universes = create_universes()
+        rulebase = build_rulebase_from_csv('z', universes, io.StringIO(CSV_DATA), chunk_size=3)
+        expected = create_rulebase()
+        self.assertEqual(['y', 'x'], rulebase.collect_antecedent_names())
+        for rule, expected_rule in zip(rulebase.rules, expected.rules):
+            self.assertEqual(expected_rule.predicates, rule.predicates)
+            self.assertEqual(expected_rule.consequent, rule.consequent)
+
+    def test_empty_rulebase(self):
+        universes = create_universes()
+        rulebase = build_rulebase('z', universes, ['x', 'y'], np.zeros((0, 2), dtype=int), [], description='Empty')
+        self.assertEqual(0, len(rulebase.rules))
+        self.assertEqual([], rulebase.collect_antecedent_names())
+        self.assertEqual([], rulebase.rules.antecedent_names)
+        self.assertEqual('Empty', rulebase.description)
+        rulebase = build_rulebase_from_csv('z', universes, io.StringIO('x,y,z\n'))
+        self.assertEqual(0, len(rulebase.rules))
+        self.assertEqual([], rulebase.collect_antecedent_names())
+        rulebase.add_rule(Rule({'x': 'low'}, 'high'))
+        self.assertEqual(['x'], rulebase.collect_antecedent_names())
+
+    def test_invalid_csv(self):
+        universes = create_universes()
+        with self.assertRaises(ValueError):
+            build_rulebase_from_csv('z', universes, io.StringIO('x,y\nlow,low\n'))
+        with self.assertRaises(ValueError):
+            build_rulebase_from_csv('z', universes, io.StringIO('x,z\nmiddle,low\n'))
+        with self.assertRaises(ValueError):
+            build_rulebase_from_csv('z', universes, io.StringIO('x,z\nlow\n'))
@@ -0,0 +1,71 @@
+import unittest
+
+from fribe.cache import ConsequenceCache
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+def create_engine():
+    engine = Engine()
+    for name in ['x', 'y', 'z']:
+        universe = Universe()
+        universe.set_name(name)
+        universe.add_term(Term('low', 0, 0))
+        universe.add_term(Term('high', 1, 1))
+        engine.add_universe(universe)
+    rulebase = RuleBase('z')
+    rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'y': 'low'}, 'low'))
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+class ConsequenceCacheTest(unittest.TestCase):
+    """Test the consequence cache"""
+
+    def test_least_recently_used_eviction(self):
+        cache = ConsequenceCache(max_size=2)
+        cache.store((1,), 1.0)
+        cache.store((2,), 2.0)
+        self.assertEqual(cache.lookup((1,)), 1.0)
+        cache.store((3,), 3.0)
+        self.assertIsNone(cache.lookup((2,)))
+        self.assertEqual(cache.lookup((1,)), 1.0)
+        self.assertEqual(cache.get_statistics(), {'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2})
+
+    def test_quantized_keys(self):
+        cache = ConsequenceCache(steps={'x': 0.1})
+        observations = {'x': 0.42, 'y': 0.42}
+        self.assertEqual(cache.create_key(['x', 'y'], observations), (4, 0.42))
+        self.assertIsNone(cache.create_key(['x', 'z'], observations))
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            ConsequenceCache(max_size=0)
+        with self.assertRaises(ValueError):
+            ConsequenceCache(steps={'x': 0})
+
+    def test_engine_cache(self):
+        engine = create_engine()
+        reference = create_engine()
+        engine.enable_cache(max_size=4)
+        samples = [(0.5, 0.5), (0.25, 0.75), (0.5, 0.5), (1, 1), (0.5, 0.5)]
+        for x, y in samples:
+            engine.calc_consequences({'x': x, 'y': y})
+            reference.calc_consequences({'x': x, 'y': y})
+            self.assertEqual(engine.get_state('z'), reference.get_state('z'))
+        self.assertEqual(engine.cache_statistics['z'], {'hits': 2, 'misses': 3, 'evictions': 0, 'size': 3})
+
+    def test_engine_cache_invalidation(self):
+        engine = create_engine()
+        engine.enable_cache()
+        engine.calc_consequences({'x': 1, 'y': 1})
+        self.assertEqual(engine.get_state('z'), 1.0)
+        engine.get_rulebase('z').add_rule(Rule({'x': 'high'}, 'low'))
+        engine.calc_consequences({'x': 1, 'y': 1})
+        self.assertEqual(engine.get_state('z'), 0.5)
+        self.assertEqual(engine.cache_statistics['z']['hits'], 0)
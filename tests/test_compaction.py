@@ -0,0 +1,106 @@
+import random
+import unittest
+
+import numpy as np
+
+from fribe.builder import build_rulebase
+from fribe.compaction import compact_engine
+from fribe.compaction import compact_rulebase
+from fribe.compaction import find_duplicated_rules
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+
+from helpers import create_universe
+
+
+def create_universes():
+    return {
+        'x': create_universe('x', [('low', 0, 0), ('mid', 4, 2), ('high', 10, 10)]),
+        'y': create_universe('y', [('low', -1, 0), ('high', 1, 1)]),
+        'z': create_universe('z', [('low', 0, 0), ('zero', 0.2, 0), ('mid', 0.5, 0.7), ('high', 1, 1)])
+    }
+
+
+def create_rulebase():
+    rulebase = RuleBase('z')
+    rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'y': 'high', 'x': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'low'}, 'zero'))
+    rulebase.add_rule(Rule({'y': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'mid'))
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    return rulebase
+
+
+class CompactionTest(unittest.TestCase):
+    """Test the merging of the duplicated rules"""
+
+    def test_duplicated_rules(self):
+        indices, multiplicities = find_duplicated_rules(create_rulebase())
+        self.assertEqual([0, 1, 3, 4, 5], indices.tolist())
+        self.assertEqual([2, 2, 1, 1, 1], multiplicities.tolist())
+
+    def test_same_valued_terms(self):
+        universes = create_universes()
+        compacted = compact_rulebase(create_rulebase(), universes)
+        consequents = [rule.consequent for rule in compacted.rules if rule.predicates == {'x': 'low'}]
+        self.assertEqual(['low', 'zero'], consequents)
+        terms = np.array([[0, -1], [0, -1], [0, -1]])
+        rulebase = build_rulebase('z', universes, ['x', 'y'], terms, [0, 1, 0])
+        indices, multiplicities = find_duplicated_rules(rulebase)
+        self.assertEqual([0, 1], indices.tolist())
+        self.assertEqual([2, 1], multiplicities.tolist())
+
+    def test_compacted_rules(self):
+        universes = create_universes()
+        compacted = compact_rulebase(create_rulebase(), universes)
+        self.assertEqual(5, len(compacted.rules))
+        self.assertEqual([2, 2, 1, 1, 1], [rule.multiplicity for rule in compacted.rules])
+        self.assertEqual(['x', 'y'], compacted.collect_antecedent_names())
+        self.assertEqual([2, 2, 1, 1, 1], compacted.compile(universes).multiplicities.tolist())
+
+    def test_same_consequences(self):
+        universes = create_universes()
+        rulebase = create_rulebase()
+        compacted = compact_rulebase(rulebase, universes)
+        generator = random.Random(0)
+        samples = [{'x': 0, 'y': 1}, {'x': 10, 'y': 1}, {'x': 10, 'y': -1}]
+        samples += [{'x': generator.uniform(0, 10), 'y': generator.uniform(-1, 1)} for _ in range(20)]
+        for observations in samples:
+            expected = rulebase.calc_consequence(universes, observations)
+            self.assertAlmostEqual(expected, compacted.calc_consequence(universes, observations))
+            self.assertAlmostEqual(expected, compacted.compile(universes).calc_consequence(universes, observations))
+
+    def test_rule_table(self):
+        universes = create_universes()
+        terms = np.array([[0, -1], [1, 0], [0, -1], [1, 0], [2, 1]])
+        rulebase = build_rulebase('z', universes, ['x', 'y'], terms, [0, 2, 1, 2, 3])
+        compacted = compact_rulebase(rulebase, universes)
+        self.assertFalse(compacted.rules.is_materialized)
+        self.assertEqual(4, len(compacted.rules))
+        self.assertEqual([1, 2, 1, 1], compacted.rules.multiplicities.tolist())
+        observations = {'x': 3, 'y': 0.5}
+        self.assertAlmostEqual(
+            rulebase.calc_consequence(universes, observations),
+            compacted.calc_consequence(universes, observations)
+        )
+
+    def test_engine_report(self):
+        engine = Engine()
+        for universe in create_universes().values():
+            engine.add_universe(universe)
+        engine.add_rulebase(create_rulebase())
+        compacted_engine, report = compact_engine(engine, [{'x': 5, 'y': 0}])
+        self.assertEqual(2, report['z']['removed'])
+        self.assertEqual(7, report['z']['rules'])
+        self.assertGreater(report['z']['speedup'], 0)
+        self.assertEqual(5, len(compacted_engine.get_rulebase('z').rules))
+
+    def test_invalid_multiplicity(self):
+        rule = Rule({'x': 'low'}, 'low')
+        with self.assertRaises(ValueError):
+            rule.set_multiplicity(0)
+        with self.assertRaises(ValueError):
+            rule.set_multiplicity(1.5)
@@ -0,0 +1,121 @@
+import random
+import unittest
+
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+
+from helpers import create_universe
+from helpers import create_universes
+
+
+def create_rulebase():
+    rulebase = RuleBase('z')
+    rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'y': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'y': 'high', 'x': 'mid'}, 'mid'))
+    return rulebase
+
+
+class CompiledRuleBaseTest(unittest.TestCase):
+    """Test the compiled form of the rule bases"""
+
+    def test_matrix_layout(self):
+        universes = create_universes()
+        compiled = create_rulebase().compile(universes)
+        self.assertEqual(compiled.antecedent_names, ['x', 'y'])
+        self.assertEqual(compiled.count_rules(), 4)
+        self.assertEqual(compiled.mask.tolist(), [[True, True], [True, False], [False, True], [True, True]])
+        self.assertEqual(compiled.centers[3].tolist(), [2.0, 1.0])
+        self.assertEqual(compiled.values.tolist(), [1.0, 0.0, 0.0, 0.7])
+
+    def test_same_consequences(self):
+        universes = create_universes()
+        rulebase = create_rulebase()
+        compiled = rulebase.compile(universes)
+        random.seed(0)
+        samples = [{'x': 10, 'y': 1}, {'x': 4, 'y': 1}, {'x': 0, 'y': 0.5}]
+        samples += [{'x': random.uniform(0, 10), 'y': random.uniform(-1, 1)} for _ in range(100)]
+        for observations in samples:
+            expected = rulebase.calc_consequence(universes, observations)
+            self.assertAlmostEqual(expected, compiled.calc_consequence(universes, observations), places=12)
+
+    def test_exact_match_mean(self):
+        universes = create_universes()
+        rulebase = create_rulebase()
+        rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'low'))
+        compiled = rulebase.compile(universes)
+        observations = {'x': 10, 'y': 1}
+        self.assertEqual(rulebase.calc_consequence(universes, observations), 0.5)
+        self.assertEqual(compiled.calc_consequence(universes, observations), 0.5)
+
+    def test_missing_observation(self):
+        universes = create_universes()
+        compiled = create_rulebase().compile(universes)
+        with self.assertRaises(ValueError):
+            compiled.calc_consequence(universes, {'x': 1})
+
+    def test_missing_universe(self):
+        universes = create_universes()
+        rulebase = create_rulebase()
+        rulebase.add_rule(Rule({'w': 'low'}, 'low'))
+        with self.assertRaises(ValueError):
+            rulebase.compile(universes)
+
+    def test_engine_recompilation(self):
+        engine = Engine()
+        for universe in create_universes().values():
+            engine.add_universe(universe)
+        rulebase = create_rulebase()
+        engine.add_rulebase(rulebase)
+        engine.enable_compilation()
+        engine.calc_consequences({'x': 10, 'y': 1})
+        self.assertEqual(engine.get_state('z'), 1.0)
+        rulebase.add_rule(Rule({'x': 'high'}, 'low'))
+        engine.calc_consequences({'x': 10, 'y': 1})
+        self.assertEqual(engine.get_state('z'), 0.5)
+
+    def test_batch_consequences(self):
+        engine = Engine()
+        for universe in create_universes().values():
+            engine.add_universe(universe)
+        engine.add_rulebase(create_rulebase())
+        random.seed(1)
+        rows = [[10, 1], [4, 1], [0, 0.5], [10, -1]]
+        rows += [[random.uniform(0, 10), random.uniform(-1, 1)] for _ in range(200)]
+        consequences = engine.calc_consequences_batch(rows, columns=['x', 'y'])
+        self.assertEqual(list(consequences.keys()), ['z'])
+        self.assertEqual(len(consequences['z']), len(rows))
+        for (x, y), z in zip(rows, consequences['z']):
+            engine.calc_consequences({'x': x, 'y': y})
+            self.assertAlmostEqual(engine.get_state('z'), z, places=12)
+
+    def test_batch_exact_matches(self):
+        universes = create_universes()
+        rulebase = create_rulebase()
+        rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'low'))
+        compiled = rulebase.compile(universes)
+        consequences = compiled.calc_consequences(universes, {'x': [10, 4, 0], 'y': [1, 1, -1]})
+        self.assertEqual(consequences.tolist(), [0.5, 0.7, 0.0])
+
+    def test_batch_chunks(self):
+        universes = create_universes()
+        rulebase = create_rulebase()
+        compiled = rulebase.compile(universes)
+        columns = {'x': [0.5 * i for i in range(21)], 'y': [-1 + 0.1 * i for i in range(21)]}
+        expected = compiled.calc_consequences(universes, columns)
+        compiled.CHUNK_SIZE = 5
+        self.assertEqual(compiled.calc_consequences(universes, columns).tolist(), expected.tolist())
+
+    def test_batch_invalid_columns(self):
+        engine = Engine()
+        for universe in create_universes().values():
+            engine.add_universe(universe)
+        engine.add_rulebase(create_rulebase())
+        with self.assertRaises(ValueError):
+            engine.calc_consequences_batch({'x': [1, 2]})
+        with self.assertRaises(ValueError):
+            engine.calc_consequences_batch({'x': [1, 2], 'y': [0]})
+        with self.assertRaises(ValueError):
+            engine.calc_consequences_batch([[1, 0]], columns=['x'])
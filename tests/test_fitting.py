@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from fribe.engine import Engine
+from fribe.fitting import calc_weight_matrix
+from fribe.fitting import fit_term_values
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+
+from helpers import create_universe
+
+
+def create_engine(values):
+    engine = Engine()
+    engine.add_universe(create_universe('x', [('low', 0, 0), ('mid', 4, 2), ('high', 10, 10)]))
+    engine.add_universe(create_universe('y', [('low', -1, 0), ('high', 1, 1)]))
+    engine.add_universe(create_universe('z', [
+        ('low', 0, values[0]), ('mid', 0.5, values[1]), ('high', 1, values[2]), ('unused', 2, values[3])
+    ]))
+    rulebase = RuleBase('z')
+    rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'y': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'x': 'mid', 'y': 'high'}, 'mid'))
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+def create_columns(n_rows):
+    generator = np.random.default_rng(0)
+    columns = {'x': generator.uniform(0, 10, n_rows), 'y': generator.uniform(-1, 1, n_rows)}
+    columns['x'][:2] = [0, 4]
+    columns['y'][:2] = [0, 1]
+    return columns
+
+
+class FittingTest(unittest.TestCase):
+    """Test the fitting of the consequent term values"""
+
+    def test_weight_matrix(self):
+        engine = create_engine([0, 0.7, 1, 3])
+        columns = create_columns(100)
+        weights = calc_weight_matrix(engine, 'z', columns)
+        self.assertEqual((100, 4), weights.shape)
+        self.assertTrue(np.allclose(weights.sum(axis=1), 1.0))
+        self.assertTrue(np.all(weights[:, 3] == 0.0))
+        expected = engine.calc_consequences_batch(columns)['z']
+        self.assertTrue(np.allclose(weights @ [0, 0.7, 1, 3], expected))
+
+    def test_recovered_values(self):
+        columns = create_columns(500)
+        targets = create_engine([0.1, 0.4, 0.9, 3]).calc_consequences_batch(columns)['z']
+        engine = create_engine([0, 0.7, 1, 3])
+        revision = engine.universes['z'].revision
+        values = fit_term_values(engine, 'z', columns, targets, regularization=0.0)
+        self.assertEqual(['low', 'mid', 'high', 'unused'], list(values.keys()))
+        self.assertTrue(np.allclose([values['low'], values['mid'], values['high']], [0.1, 0.4, 0.9]))
+        self.assertEqual(3, values['unused'])
+        self.assertAlmostEqual(0.4, engine.universes['z'].get_term('mid').value)
+        self.assertNotEqual(revision, engine.universes['z'].revision)
+        self.assertTrue(np.allclose(engine.calc_consequences_batch(columns)['z'], targets))
+
+    def test_regularization(self):
+        columns = create_columns(50)
+        targets = create_engine([0.1, 0.4, 0.9, 3]).calc_consequences_batch(columns)['z']
+        engine = create_engine([0, 0.7, 1, 3])
+        values = fit_term_values(engine, 'z', columns, targets, regularization=1e6, update=False)
+        self.assertAlmostEqual(0.7, values['mid'], places=3)
+        self.assertEqual(0.7, engine.universes['z'].get_term('mid').value)
+
+    def test_invalid_targets(self):
+        engine = create_engine([0, 0.7, 1, 3])
+        with self.assertRaises(ValueError):
+            fit_term_values(engine, 'z', create_columns(10), np.zeros(9))
+        with self.assertRaises(ValueError):
+            fit_term_values(engine, 'z', create_columns(10), np.zeros(10), regularization=-1)
@@ -0,0 +1,75 @@
+import random
+import unittest
+
+from fribe.engine import Engine
+from fribe.incremental import IncrementalRuleBase
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+def create_engine(n_antecedents, n_rules):
+    engine = Engine()
+    names = ['a{}'.format(i) for i in range(n_antecedents)] + ['z']
+    for name in names:
+        universe = Universe()
+        universe.set_name(name)
+        for i in range(5):
+            universe.add_term(Term(str(i), i, i * i))
+        engine.add_universe(universe)
+    rulebase = RuleBase('z')
+    random.seed(7)
+    for _ in range(n_rules):
+        antecedents = random.sample(names[:-1], random.randint(1, n_antecedents))
+        rulebase.add_rule(Rule({name: str(random.randrange(5)) for name in antecedents}, str(random.randrange(5))))
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+class IncrementalRuleBaseTest(unittest.TestCase):
+    """Test the incremental evaluation of the rule bases"""
+
+    def test_changed_columns(self):
+        engine = create_engine(4, 50)
+        evaluator = IncrementalRuleBase(engine.get_compiled_rulebase('z'))
+        observations = {'a0': 1, 'a1': 2, 'a2': 3, 'a3': 4}
+        self.assertEqual(evaluator.update(engine.universes, observations), 4)
+        self.assertEqual(evaluator.update(engine.universes, observations), 0)
+        observations['a2'] = 2.5
+        self.assertEqual(evaluator.update(engine.universes, observations), 1)
+
+    def test_same_consequences(self):
+        engine = create_engine(6, 300)
+        compiled = engine.get_compiled_rulebase('z')
+        evaluator = IncrementalRuleBase(compiled, refresh_interval=50)
+        random.seed(8)
+        observations = {'a{}'.format(i): random.uniform(0, 4) for i in range(6)}
+        for tick in range(200):
+            name = 'a{}'.format(random.randrange(6))
+            observations[name] = random.choice([random.uniform(0, 4), random.randrange(5)])
+            expected = compiled.calc_consequence(engine.universes, observations)
+            self.assertAlmostEqual(evaluator.calc_consequence(engine.universes, observations), expected, places=9)
+
+    def test_exact_matches(self):
+        engine = create_engine(3, 100)
+        compiled = engine.get_compiled_rulebase('z')
+        evaluator = IncrementalRuleBase(compiled)
+        observations = {'a0': 0.5, 'a1': 0.5, 'a2': 0.5}
+        evaluator.calc_consequence(engine.universes, observations)
+        for i in range(5):
+            for name in ['a0', 'a1', 'a2']:
+                observations[name] = i
+                expected = compiled.calc_consequence(engine.universes, observations)
+                self.assertEqual(evaluator.calc_consequence(engine.universes, observations), expected)
+
+    def test_engine_incremental_evaluation(self):
+        engine = create_engine(4, 100)
+        engine.enable_incremental_evaluation()
+        reference = create_engine(4, 100)
+        observations = {'a0': 1, 'a1': 2, 'a2': 3, 'a3': 4}
+        for value in [0, 0.5, 1.5, 4]:
+            observations['a1'] = value
+            engine.calc_consequences(observations)
+            reference.calc_consequences(observations)
+            self.assertAlmostEqual(engine.get_state('z'), reference.get_state('z'), places=9)
@@ -0,0 +1,83 @@
+import unittest
+
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+
+from helpers import create_universe
+
+
+def create_engine():
+    engine = Engine()
+    engine.add_universe(create_universe('x', [('low', 0, 0), ('high', 10, 10)]))
+    engine.add_universe(create_universe('z', [('low', 0, 0), ('mid', 0.5, 0.5), ('high', 1, 1)]))
+    rulebase = RuleBase('z')
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'x': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'high'}, 'mid'))
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+class InstrumentationTest(unittest.TestCase):
+    """Test the timing and the rule counters of the engine"""
+
+    def test_disabled_instrumentation(self):
+        engine = create_engine()
+        self.assertIsNone(engine.instrumentation)
+        engine.calc_consequences({'x': 1})
+        engine.enable_instrumentation()
+        engine.disable_instrumentation()
+        engine.calc_consequences({'x': 1})
+        self.assertIsNone(engine.instrumentation)
+
+    def test_call_statistics(self):
+        engine = create_engine()
+        instrumentation = engine.enable_instrumentation(rule_counters=False)
+        for x in [1, 2, 3]:
+            engine.calc_consequences({'x': x})
+        engine.enable_compilation()
+        engine.calc_consequences_batch({'x': [1, 2, 3, 4]})
+        statistics = instrumentation.get_statistics()['z']
+        self.assertEqual(4, statistics['calls'])
+        self.assertEqual(7, statistics['observations'])
+        self.assertGreater(statistics['total_time'], 0.0)
+        self.assertLessEqual(statistics['max_time'], statistics['total_time'])
+        self.assertEqual(0, len(instrumentation.get_rule_counters('z')['top_weights']))
+        instrumentation.reset()
+        self.assertEqual({}, instrumentation.get_statistics())
+
+    def test_rule_counters(self):
+        engine = create_engine()
+        instrumentation = engine.enable_instrumentation()
+        for x in [0, 1, 10, 9, 8]:
+            engine.calc_consequences({'x': x})
+        counters = instrumentation.get_rule_counters('z')
+        self.assertEqual([1, 1, 1], counters['exact_matches'].tolist())
+        self.assertEqual([2, 3, 0], counters['top_weights'].tolist())
+        engine.get_rulebase('z').add_rule(Rule({'x': 'low'}, 'mid'))
+        engine.calc_consequences({'x': 0})
+        counters = instrumentation.get_rule_counters('z')
+        self.assertEqual([1, 0, 0, 1], counters['exact_matches'].tolist())
+
+    def test_hooks(self):
+        engine = create_engine()
+        instrumentation = engine.enable_instrumentation()
+        records = []
+
+        def hook(rulebase_name, record):
+            records.append((rulebase_name, record))
+
+        instrumentation.add_hook(hook)
+        engine.calc_consequences({'x': 10})
+        instrumentation.remove_hook(hook)
+        engine.calc_consequences({'x': 0})
+        self.assertEqual(1, len(records))
+        name, record = records[0]
+        self.assertEqual('z', name)
+        self.assertEqual(1, record['observations'])
+        self.assertAlmostEqual(0.75, record['consequence'])
+        self.assertEqual([1, 2], record['exact_matches'])
+        self.assertEqual(1, record['top_rule'])
+        with self.assertRaises(ValueError):
+            instrumentation.remove_hook(hook)
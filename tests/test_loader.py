@@ -0,0 +1,194 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from exprail.source import SourceString
+
+from fribe.loader import Loader
+from fribe.loader import PARSER_GRAMMAR_PATH
+from fribe.loader import TOKENIZER_GRAMMAR_PATH
+from fribe.loader import clear_grammar_cache
+from fribe.loader import load_engine_from_file
+from fribe.loader import load_engine_from_files
+from fribe.loader import load_engine_from_string
+from fribe.loader import load_grammar
+from fribe.parser import TokenClassifier
+from fribe.source import StreamSource
+from fribe.tokenizer import CharClassifier
+
+
+GRAMMAR_DIRECTORY = os.path.join(os.path.dirname(__file__), '../grammars/simple')
+
+BEHAVIOR_DESCRIPTION = """
+universe "x"
+    "low" 0 0
+    "high" 1 1
+end
+
+universe "z"
+    "low" 0 0
+    "high" 1 1
+end
+
+rulebase "z"
+    rule "high" when "x" is "low" end
+    rule "low" when "x" is "high" end
+end
+"""
+
+
+def write_files(directory, contents):
+    """
+    Write the behavior descriptions into the directory.
+    :param directory: the path of the directory
+    :param contents: a dictionary with the relative paths and the contents of the files
+    :return: None
+    """
+    for name, content in contents.items():
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as description_file:
+            description_file.write(content)
+
+
+class LoaderTest(unittest.TestCase):
+    """Test the loading of the behavior descriptions"""
+
+    def test_cached_grammars(self):
+        clear_grammar_cache()
+        grammar = load_grammar(TOKENIZER_GRAMMAR_PATH, CharClassifier)
+        self.assertIs(load_grammar(TOKENIZER_GRAMMAR_PATH, CharClassifier), grammar)
+        self.assertIs(load_grammar(os.path.join(GRAMMAR_DIRECTORY, 'tokenizer.grammar'), CharClassifier), grammar)
+        self.assertIsNot(load_grammar(PARSER_GRAMMAR_PATH, TokenClassifier), grammar)
+
+    def test_modified_grammar(self):
+        clear_grammar_cache()
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'parser.grammar')
+            shutil.copyfile(PARSER_GRAMMAR_PATH, path)
+            grammar = load_grammar(path, TokenClassifier)
+            self.assertIs(load_grammar(path, TokenClassifier), grammar)
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+            self.assertIsNot(load_grammar(path, TokenClassifier), grammar)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_repeated_loads(self):
+        loader = Loader()
+        for x, z in [(0, 1), (1, 0), (0.5, 0.5)]:
+            engine = loader.load_from_string(BEHAVIOR_DESCRIPTION)
+            engine.calc_consequences({'x': x})
+            self.assertEqual(engine.get_state('z'), z)
+        engine = load_engine_from_string(BEHAVIOR_DESCRIPTION)
+        self.assertEqual(engine.universe_names, ['x', 'z'])
+
+    def test_include_in_string(self):
+        for use_scanner in [False, True]:
+            with self.assertRaises(ValueError):
+                load_engine_from_string('include "x.txt"\n' + BEHAVIOR_DESCRIPTION, use_scanner=use_scanner)
+
+    def test_stream_source_protocol(self):
+        for source in ['', 'a', 'universe "x"\n', BEHAVIOR_DESCRIPTION]:
+            for chunk_size in [1, 3, 65536]:
+                expected = SourceString(source)
+                stream_source = StreamSource(io.StringIO(source), chunk_size=chunk_size)
+                for i in range(len(source) + 2):
+                    token = stream_source.get_token()
+                    expected_token = expected.get_token()
+                    self.assertEqual((expected_token.type, expected_token.value), (token.type, token.value))
+                    if i <= len(source):
+                        expected.parse()
+                        stream_source.parse()
+
+    def test_scanner_option(self):
+        engine = load_engine_from_string(BEHAVIOR_DESCRIPTION, use_scanner=True)
+        engine.calc_consequences({'x': 0})
+        self.assertEqual(engine.get_state('z'), 1)
+
+    def test_reused_artifact(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'behavior.txt')
+            with open(path, 'w') as source_file:
+                source_file.write(BEHAVIOR_DESCRIPTION)
+            load_engine_from_file(path)
+            self.assertTrue(os.path.exists(path + '.artifact'))
+            mtime = os.path.getmtime(path + '.artifact')
+            engine = load_engine_from_file(path)
+            self.assertEqual(mtime, os.path.getmtime(path + '.artifact'))
+            engine.calc_consequences({'x': 1})
+            self.assertEqual(engine.get_state('z'), 0)
+            with open(path, 'w') as source_file:
+                source_file.write(BEHAVIOR_DESCRIPTION.replace('"low" when "x" is "high"', '"high" when "x" is "high"'))
+            engine = load_engine_from_file(path)
+            engine.calc_consequences({'x': 1})
+            self.assertEqual(engine.get_state('z'), 1)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_same_consequences_from_artifact(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'behavior.txt')
+            with open(path, 'w') as source_file:
+                source_file.write(BEHAVIOR_DESCRIPTION)
+            parsed = load_engine_from_file(path)
+            cached = load_engine_from_file(path)
+            self.assertEqual(parsed.is_compilation_enabled, cached.is_compilation_enabled)
+            for i in range(600):
+                observations = {'x': i / 599}
+                parsed.calc_consequences(observations)
+                cached.calc_consequences(observations)
+                self.assertEqual(parsed.get_state('z'), cached.get_state('z'))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_included_files(self):
+        directory = tempfile.mkdtemp()
+        try:
+            write_files(directory, {
+                'main.txt': (
+                    'include "universes/x.txt"\ninclude "universes/z.txt"\n'
+                    'universe "y" "low" 0 0 "high" 1 1 end\n'
+                    'rulebase "z" rule "high" when "x" is "low" end end\n'
+                ),
+                'universes/x.txt': 'universe "x" "low" 0 0 "high" 1 1 end',
+                'universes/z.txt': 'include "../rules.txt" universe "z" "low" 0 0 "high" 1 1 end',
+                'rules.txt': ''
+            })
+            for use_scanner in [False, True]:
+                loader = Loader(use_scanner=use_scanner)
+                engine = loader.load_from_file(os.path.join(directory, 'main.txt'))
+                self.assertEqual(engine.universe_names, ['x', 'z', 'y'])
+                self.assertEqual(engine.rulebase_names, ['z'])
+                self.assertEqual(len(loader.included_paths), 3)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_recursive_include(self):
+        directory = tempfile.mkdtemp()
+        try:
+            write_files(directory, {'a.txt': 'include "b.txt"', 'b.txt': 'include "a.txt"'})
+            with self.assertRaises(ValueError):
+                Loader().load_from_file(os.path.join(directory, 'a.txt'))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_parallel_files(self):
+        directory = tempfile.mkdtemp()
+        try:
+            parts = BEHAVIOR_DESCRIPTION.split('\n\n')
+            write_files(directory, {'x.txt': parts[0], 'z.txt': parts[1], 'rules.txt': parts[2], 'copy.txt': parts[0]})
+            paths = [os.path.join(directory, name) for name in ['x.txt', 'z.txt', 'rules.txt']]
+            engine = load_engine_from_files(paths, n_workers=2)
+            self.assertEqual(engine.universe_names, ['x', 'z'])
+            engine.calc_consequences({'x': 0})
+            self.assertEqual(engine.get_state('z'), 1)
+            with self.assertRaises(ValueError):
+                load_engine_from_files(paths + [os.path.join(directory, 'copy.txt')], n_workers=2)
+        finally:
+            shutil.rmtree(directory)
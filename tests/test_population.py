@@ -0,0 +1,65 @@
+import unittest
+
+from fribe.engine import Engine
+from fribe.population import Population
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+def create_engine():
+    engine = Engine()
+    for name in ['x', 'z']:
+        universe = Universe()
+        universe.set_name(name)
+        universe.add_term(Term('low', 0, 0))
+        universe.add_term(Term('high', 1, 1))
+        engine.add_universe(universe)
+    rulebase = RuleBase('z')
+    rulebase.add_rule(Rule({'x': 'low'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'high'}, 'low'))
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+class PopulationTest(unittest.TestCase):
+    """Test the population of agents"""
+
+    def test_agent_slots(self):
+        population = Population(create_engine(), capacity=2)
+        a = population.add_agent()
+        b = population.add_agent()
+        self.assertEqual(population.capacity, 2)
+        population.remove_agent(a)
+        c = population.add_agent({'energy': 0.5})
+        self.assertEqual(c, a)
+        self.assertEqual(population.get_state(c, 'energy'), 0.5)
+        with self.assertRaises(ValueError):
+            population.get_state(c, 'mood')
+        with self.assertRaises(ValueError):
+            population.get_states('mood')
+        d = population.add_agent()
+        self.assertEqual(population.capacity, 4)
+        self.assertEqual(population.agent_ids.tolist(), sorted([b, c, d]))
+        self.assertEqual(population.count_agents(), 3)
+        with self.assertRaises(ValueError):
+            population.remove_agent(5)
+
+    def test_consequences(self):
+        population = Population(create_engine())
+        agent_ids = [population.add_agent() for _ in range(3)]
+        population.calc_consequences({'x': [0, 1, 0.5]})
+        self.assertEqual(population.get_states('z').tolist(), [1.0, 0.0, 0.5])
+        population.remove_agent(agent_ids[1])
+        population.calc_consequences({'x': [1, 1]})
+        self.assertEqual(population.get_states('z').tolist(), [0.0, 0.0])
+        self.assertEqual(population.get_states('z', [agent_ids[2], agent_ids[0]]).tolist(), [0.0, 0.0])
+        with self.assertRaises(ValueError):
+            population.get_states('z', agent_ids)
+        with self.assertRaises(ValueError):
+            population.get_states('z', [population.capacity])
+        population.calc_consequences({'x': [0]}, agent_ids=[agent_ids[2]])
+        self.assertEqual(population.get_state(agent_ids[2], 'z'), 1.0)
+        with self.assertRaises(ValueError):
+            population.calc_consequences({'x': [0, 1, 0]})
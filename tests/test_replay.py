@@ -0,0 +1,176 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from fribe.engine import Engine
+from fribe.replay import CsvWriter
+from fribe.replay import prefetch_chunks
+from fribe.replay import read_binary_chunks
+from fribe.replay import read_csv_chunks
+from fribe.replay import replay
+from fribe.replay import replay_files
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+
+from helpers import create_universe
+
+
+def create_engine():
+    engine = Engine()
+    engine.add_universe(create_universe('x', [('low', 0, 0), ('mid', 4, 2), ('high', 10, 10)]))
+    engine.add_universe(create_universe('y', [('low', -1, 0), ('high', 1, 1)]))
+    engine.add_universe(create_universe('a', [('low', 0, 0), ('high', 1, 1)]))
+    engine.add_universe(create_universe('b', [('low', 0, 0), ('high', 1, 2)]))
+    rulebase = RuleBase('a')
+    rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'x': 'mid', 'y': 'low'}, 'high'))
+    engine.add_rulebase(rulebase)
+    rulebase = RuleBase('b')
+    rulebase.add_rule(Rule({'a': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'a': 'low', 'y': 'low'}, 'low'))
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+def create_observations(n_rows):
+    generator = np.random.default_rng(3)
+    return {'x': generator.uniform(0, 10, n_rows), 'y': generator.uniform(-1, 1, n_rows)}
+
+
+def calc_expected(engine, observations):
+    consequences = {'a': [], 'b': []}
+    for x, y in zip(observations['x'].tolist(), observations['y'].tolist()):
+        engine.calc_consequences({'x': x, 'y': y})
+        for name in consequences:
+            consequences[name].append(engine.get_state(name))
+    return consequences
+
+
+def format_csv(observations):
+    lines = ['x, y']
+    for x, y in zip(observations['x'].tolist(), observations['y'].tolist()):
+        lines.append('{!r},{!r}'.format(x, y))
+    return '\n'.join(lines) + '\n'
+
+
+class ReplayTest(unittest.TestCase):
+    """Test the chunked replay of the observation logs"""
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_csv_chunks(self):
+        observations = create_observations(10)
+        chunks = list(read_csv_chunks(io.StringIO(format_csv(observations)), chunk_size=4))
+        self.assertEqual([4, 4, 2], [len(chunk['x']) for chunk in chunks])
+        self.assertEqual(observations['y'].tolist(), np.concatenate([chunk['y'] for chunk in chunks]).tolist())
+        with self.assertRaises(ValueError):
+            list(read_csv_chunks(io.StringIO('x,y\n1,2\n3\n')))
+        with self.assertRaises(ValueError):
+            list(read_csv_chunks(io.StringIO('x,y\n1,a\n')))
+        with self.assertRaises(ValueError):
+            list(read_csv_chunks(io.StringIO('')))
+
+    def test_selected_csv_columns(self):
+        source = 'time,x,label,y\n0,1.5,first,-1\n1,2.5,second,0.5\n'
+        chunks = list(read_csv_chunks(io.StringIO(source), columns=['y', 'x']))
+        self.assertEqual(['y', 'x'], list(chunks[0]))
+        self.assertEqual([-1.0, 0.5], chunks[0]['y'].tolist())
+        self.assertEqual([1.5, 2.5], chunks[0]['x'].tolist())
+        with self.assertRaisesRegex(ValueError, 'column "label" has the non-numeric value "second" in the row 1'):
+            list(read_csv_chunks(io.StringIO(source.replace('first', '3')), chunk_size=1))
+        with self.assertRaisesRegex(ValueError, 'column "label"'):
+            list(read_csv_chunks(io.StringIO(source), columns=['x', 'label']))
+        with self.assertRaises(ValueError):
+            list(read_csv_chunks(io.StringIO(source), columns=['x', 'z']))
+        path = os.path.join(self._directory, 'labelled.csv')
+        with open(path, 'w') as log_file:
+            log_file.write(source)
+        consequences = []
+        self.assertEqual(2, replay_files(create_engine(), [path], consequences.append, columns=['x', 'y']))
+        expected = calc_expected(create_engine(), {'x': np.array([1.5, 2.5]), 'y': np.array([-1.0, 0.5])})
+        self.assertTrue(np.allclose(expected['a'], consequences[0]['a'], rtol=0.0, atol=1e-12))
+
+    def test_binary_chunks(self):
+        observations = create_observations(10)
+        path = os.path.join(self._directory, 'plain.npy')
+        np.save(path, np.column_stack([observations['x'], observations['y']]))
+        chunks = list(read_binary_chunks(path, 3, ['x', 'y']))
+        self.assertEqual([3, 3, 3, 1], [len(chunk['x']) for chunk in chunks])
+        self.assertEqual(observations['x'].tolist(), np.concatenate([chunk['x'] for chunk in chunks]).tolist())
+        with self.assertRaises(ValueError):
+            list(read_binary_chunks(path, 3))
+        records = np.zeros(10, dtype=[('x', 'f8'), ('y', 'f4')])
+        records['x'] = observations['x']
+        records['y'] = observations['y']
+        path = os.path.join(self._directory, 'records.npy')
+        np.save(path, records)
+        chunks = list(read_binary_chunks(path, 6))
+        self.assertEqual(['x', 'y'], sorted(chunks[0]))
+        self.assertEqual(float, chunks[0]['y'].dtype)
+
+    def test_same_consequences(self):
+        engine = create_engine()
+        observations = create_observations(50)
+        expected = calc_expected(create_engine(), observations)
+        output = io.StringIO()
+        writer = CsvWriter(output)
+        n_rows = replay(engine, read_csv_chunks(io.StringIO(format_csv(observations)), chunk_size=16), writer)
+        self.assertEqual(50, n_rows)
+        self.assertEqual(50, writer.n_rows)
+        chunks = list(read_csv_chunks(io.StringIO(output.getvalue())))
+        self.assertEqual(1, len(chunks))
+        for name in ['a', 'b']:
+            self.assertTrue(np.allclose(expected[name], chunks[0][name], rtol=0.0, atol=1e-12))
+        self.assertEqual({}, engine.get_states())
+
+    def test_carried_states(self):
+        engine = create_engine()
+        observations = create_observations(20)
+        expected_engine = create_engine()
+        calc_expected(expected_engine, observations)
+        states = []
+        chunks = read_csv_chunks(io.StringIO(format_csv(observations)), chunk_size=8)
+        replay(engine, chunks, lambda consequences: states.append(engine.get_states()), carry_states=True)
+        self.assertEqual({}, states[0])
+        self.assertEqual(['a', 'b'], sorted(states[1]))
+        for name in ['a', 'b']:
+            self.assertAlmostEqual(expected_engine.get_state(name), engine.get_state(name))
+
+    def test_multiple_files(self):
+        observations = create_observations(30)
+        paths = [os.path.join(self._directory, 'first.csv'), os.path.join(self._directory, 'second.npy')]
+        with open(paths[0], 'w') as log_file:
+            log_file.write(format_csv({name: values[:12] for name, values in observations.items()}))
+        np.save(paths[1], np.column_stack([observations['x'][12:], observations['y'][12:]]))
+        expected = calc_expected(create_engine(), observations)
+        consequences = []
+        n_rows = replay_files(create_engine(), paths, consequences.append, 5, ['x', 'y'], max_chunks=1)
+        self.assertEqual(30, n_rows)
+        self.assertEqual([5, 5, 2, 5, 5, 5, 3], [len(chunk['a']) for chunk in consequences])
+        for name in ['a', 'b']:
+            values = np.concatenate([chunk[name] for chunk in consequences])
+            self.assertTrue(np.allclose(expected[name], values, rtol=0.0, atol=1e-12))
+
+    def test_prefetch_errors(self):
+        def generate_chunks():
+            yield {'x': np.zeros(1)}
+            raise ValueError('Broken log!')
+
+        chunks = prefetch_chunks(generate_chunks())
+        self.assertEqual([0.0], next(chunks)['x'].tolist())
+        with self.assertRaises(ValueError):
+            next(chunks)
+        chunks = prefetch_chunks(({'x': np.full(1, i)} for i in range(100)), max_chunks=2)
+        self.assertEqual([0.0], next(chunks)['x'].tolist())
+        chunks.close()
+        with self.assertRaises(ValueError):
+            next(prefetch_chunks([], max_chunks=0))
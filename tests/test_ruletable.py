@@ -0,0 +1,135 @@
+import pickle
+import random
+import unittest
+
+import numpy as np
+
+from fribe.names import NameTable
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.ruletable import RuleTableBuilder
+
+from helpers import create_universe
+from helpers import create_universes
+
+
+def create_rules():
+    rule = Rule({'y': 'high', 'x': 'mid'}, 'mid')
+    rule.set_description('The middle')
+    rule.set_multiplicity(3)
+    return [Rule({'x': 'high'}, 'high'), rule, Rule({'y': 'low'}, 'low'), Rule({'x': 'low', 'y': 'low'}, 'low')]
+
+
+class NameTableTest(unittest.TestCase):
+    """Test the interning of the names"""
+
+    def test_identifiers(self):
+        names = NameTable()
+        self.assertEqual(0, names.intern('x'))
+        self.assertEqual(1, names.intern('low'))
+        self.assertEqual(0, names.intern('x'))
+        self.assertEqual(1, names.find('low'))
+        self.assertIsNone(names.find('high'))
+        self.assertEqual('low', names.get_name(1))
+        self.assertEqual(['x', 'low'], names.names)
+        self.assertEqual(2, len(names))
+        with self.assertRaises(ValueError):
+            names.get_name(2)
+
+
+class RuleTableTest(unittest.TestCase):
+    """Test the array-backed rule rows"""
+
+    def test_rule_views(self):
+        rules = create_rules()
+        rule_rows = RuleTableBuilder()
+        for rule in rules:
+            rule_rows.add_rule(rule)
+        self.assertEqual(4, len(rule_rows))
+        self.assertEqual(['x', 'y'], rule_rows.antecedent_names)
+        table = rule_rows.build()
+        self.assertEqual(4, len(table))
+        self.assertEqual(np.int8, table.terms.dtype)
+        for rule, expected in zip(table, rules):
+            self.assertEqual(expected.predicates, rule.predicates)
+            self.assertEqual(expected.consequent, rule.consequent)
+            self.assertEqual(expected.description, rule.description)
+            self.assertEqual(expected.multiplicity, rule.multiplicity)
+        self.assertEqual(3, table[-1].index)
+        self.assertEqual({'y': 'low'}, table[2].predicates)
+        self.assertFalse(table.is_materialized)
+        with self.assertRaises(IndexError):
+            table[4]
+        table.append(Rule({'x': 'mid'}, 'high'))
+        self.assertTrue(table.is_materialized)
+        self.assertEqual(5, len(table))
+        self.assertEqual({'x': 'mid'}, table[4].predicates)
+
+    def test_shared_names(self):
+        names = NameTable()
+        tables = []
+        for _ in range(2):
+            rule_rows = RuleTableBuilder(names)
+            for rule in create_rules():
+                rule_rows.add_rule(rule)
+            tables.append(rule_rows.build())
+        self.assertEqual(['x', 'high', 'y', 'mid', 'low'], names.names)
+        self.assertIs(tables[0].term_names[0][0], tables[1].term_names[0][0])
+        self.assertEqual([['high', 'mid', 'low'], ['high', 'low']], tables[0].term_names)
+        self.assertEqual(['high', 'mid', 'low'], tables[0].consequent_names)
+
+    def test_same_consequences(self):
+        universes = create_universes()
+        expected = RuleBase('z')
+        rule_rows = RuleTableBuilder()
+        for rule in create_rules():
+            expected.add_rule(rule)
+            rule_rows.add_rule(rule)
+        rulebase = RuleBase('z')
+        rulebase.set_rules(rule_rows.build(), rule_rows.antecedent_names)
+        for observations in [{'x': 1, 'y': 0}, {'x': 10, 'y': -1}, {'x': 4, 'y': 1}]:
+            self.assertEqual(
+                expected.calc_consequence(universes, observations), rulebase.calc_consequence(universes, observations)
+            )
+            self.assertEqual(
+                expected.compile(universes).calc_consequence(universes, observations),
+                rulebase.compile(universes).calc_consequence(universes, observations)
+            )
+        self.assertFalse(rulebase.rules.is_materialized)
+
+    def test_source_predicate_order(self):
+        generator = random.Random(7)
+        names = ['a', 'b', 'c', 'd']
+        universes = {}
+        for name in names + ['z']:
+            terms = [(str(k), k * 1.37, generator.uniform(0, 3.1)) for k in range(5)]
+            universes[name] = create_universe(name, terms)
+        expected = RuleBase('z')
+        rule_rows = RuleTableBuilder()
+        for _ in range(300):
+            antecedents = generator.sample(names, generator.randint(1, 4))
+            rule = Rule({name: str(generator.randrange(5)) for name in antecedents}, str(generator.randrange(5)))
+            expected.add_rule(rule)
+            rule_rows.add_rule(rule)
+        rulebase = RuleBase('z')
+        rulebase.set_rules(rule_rows.build(), rule_rows.antecedent_names)
+        self.assertTrue(rulebase.rules.predicate_orders)
+        for rule, expected_rule in zip(rulebase.rules, expected.rules):
+            self.assertEqual(list(expected_rule.predicates.items()), list(rule.predicates.items()))
+        for _ in range(100):
+            observations = {name: generator.uniform(0, 5.48) for name in names}
+            self.assertEqual(
+                expected.calc_consequence(universes, observations), rulebase.calc_consequence(universes, observations)
+            )
+        self.assertFalse(rulebase.rules.is_materialized)
+        with self.assertRaises(ValueError):
+            rulebase.calc_consequence(universes, {'a': 1.0})
+
+    def test_slots(self):
+        rule = Rule({'x': 'low'}, 'low')
+        with self.assertRaises(AttributeError):
+            rule.weight = 1.0
+        universe = create_universes()['x']
+        copied = pickle.loads(pickle.dumps(universe))
+        self.assertEqual(2, copied.get_term('mid').value)
+        self.assertEqual(universe.calc_value(5), copied.calc_value(5))
@@ -0,0 +1,101 @@
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import fribe.runtime as runtime
+from fribe.artifact import calc_files_hash
+from fribe.artifact import save_artifact
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+
+from helpers import create_universe
+
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The maximal duration of the import of the runtime module after numpy in seconds
+IMPORT_BUDGET = 0.5
+
+PARSER_MODULES = ['exprail', 'fribe.loader', 'fribe.parser', 'fribe.tokenizer', 'fribe.scanner', 'fribe.source']
+
+
+def create_engine():
+    engine = Engine()
+    engine.add_universe(create_universe('x', [('low', 0, 0), ('high', 10, 10)]))
+    engine.add_universe(create_universe('z', [('low', 0, 0), ('high', 1, 1)]))
+    rulebase = RuleBase('z')
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'x': 'high'}, 'high'))
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+def run_script(script):
+    """
+    Run the script in a new interpreter.
+    :param script: the source of the script which prints a JSON value
+    :return: the printed value
+    """
+    environment = dict(os.environ, PYTHONPATH=REPOSITORY_DIRECTORY)
+    output = subprocess.check_output([sys.executable, '-c', script], env=environment, cwd=REPOSITORY_DIRECTORY)
+    return json.loads(output.decode('utf-8'))
+
+
+class RuntimeTest(unittest.TestCase):
+    """Test the runtime-only entry point"""
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_import_budget(self):
+        result = run_script(
+            'import json, sys, time\n'
+            'import numpy\n'
+            'start = time.perf_counter()\n'
+            'import fribe.runtime\n'
+            'duration = time.perf_counter() - start\n'
+            'print(json.dumps({"duration": duration, "modules": sorted(set(sys.modules) & set(%r))}))\n'
+            % PARSER_MODULES
+        )
+        self.assertEqual([], result['modules'])
+        self.assertLess(result['duration'], IMPORT_BUDGET)
+
+    def test_load_without_parser(self):
+        description_path = os.path.join(self._directory, 'behavior.txt')
+        with open(description_path, 'w') as description_file:
+            description_file.write('# prebuilt')
+        engine = create_engine()
+        save_artifact(engine, os.path.join(self._directory, 'engine.artifact'))
+        save_artifact(engine, description_path + '.artifact', calc_files_hash([description_path]))
+        result = run_script(
+            'import json, sys\n'
+            'from fribe.runtime import load_engine\n'
+            'consequences = []\n'
+            'for path in %r:\n'
+            '    engine = load_engine(path)\n'
+            '    engine.calc_consequences({"x": 10})\n'
+            '    consequences.append(engine.get_state("z"))\n'
+            'print(json.dumps({"consequences": consequences, "modules": sorted(set(sys.modules) & set(%r))}))\n'
+            % ([os.path.join(self._directory, 'engine.artifact'), description_path], PARSER_MODULES)
+        )
+        self.assertEqual([], result['modules'])
+        self.assertEqual([1.0, 1.0], result['consequences'])
+
+    def test_lazy_names(self):
+        self.assertIn('load_engine_from_string', dir(runtime))
+        with self.assertRaises(AttributeError):
+            runtime.parse_engine
+
+    @unittest.skipUnless(importlib.util.find_spec('exprail'), 'the parser stack is not available')
+    def test_lazy_loader(self):
+        engine = runtime.load_engine_from_string('universe "x" "low" 0 0 "high" 10 10 end')
+        self.assertEqual(['x'], engine.universe_names)
@@ -0,0 +1,88 @@
+import io
+import os
+import unittest
+
+from exprail.grammar import Grammar
+from exprail.source import SourceString
+
+from fribe.scanner import Scanner
+from fribe.tokenizer import CharClassifier
+from fribe.tokenizer import Tokenizer
+
+
+SOURCES = [
+    '',
+    '      ',
+    'universe',
+    '     universe     ',
+    'universe description rule when and is end',
+    '"first"  "second"\n\n"third"',
+    '"\\"first\\""  "sec\\\\ond"\n\n"th\\\\\\"\\\\rd"',
+    ' 12 34 \n    -567   \n\n-8\n \n',
+    '.101, 10.20,\n\n -8.9  -7.6  -.888',
+    'universe"x"12.5end-3.25when.5is',
+    '1.5.25 1-2 --- ',
+    'árvíztűrő "tükörfúrógép" ²³ 1²',
+    'universe "distance"\n    description "The distance from the target"\n    "near" 0 0.0\n    "far" 100 1.0\nend\n',
+    '"unfinished',
+    '"invalid \\n escape"',
+    '"escape at the end\\',
+    '- 1',
+    '12. 3',
+    '.',
+    '-.x'
+]
+
+TOKENIZER_GRAMMAR_PATH = os.path.join(os.path.dirname(__file__), '../grammars/simple/tokenizer.grammar')
+
+
+def collect_tokens(parser):
+    """
+    Collect the tokens until the empty token or the first error.
+    :param parser: the tokenizer or the scanner
+    :return: the list of (type, value) pairs and the error message
+    """
+    tokens = []
+    while True:
+        try:
+            parser.parse()
+        except ValueError as error:
+            return tokens, str(error)
+        token = parser.get_token()
+        tokens.append((token.type, token.value))
+        if token.type == 'empty':
+            return tokens, None
+
+
+class ScannerTest(unittest.TestCase):
+    """Tests for the scanner as an alternative of the tokenizer"""
+
+    def setUp(self):
+        self._grammar = Grammar(filename=TOKENIZER_GRAMMAR_PATH, classifier=CharClassifier)
+
+    def assert_same_tokens(self, source, chunk_size=None):
+        expected = collect_tokens(Tokenizer(self._grammar, SourceString(source)))
+        if chunk_size is None:
+            scanner = Scanner(source)
+        else:
+            scanner = Scanner(io.StringIO(source), chunk_size=chunk_size)
+        self.assertEqual(expected, collect_tokens(scanner))
+
+    def test_same_tokens_as_tokenizer(self):
+        for source in SOURCES:
+            with self.subTest(source=source):
+                self.assert_same_tokens(source)
+
+    def test_tokens_across_chunk_boundaries(self):
+        for source in SOURCES:
+            for chunk_size in [1, 2, 3, 7]:
+                with self.subTest(source=source, chunk_size=chunk_size):
+                    self.assert_same_tokens(source, chunk_size)
+
+    def test_empty_token_after_finish(self):
+        scanner = Scanner('end')
+        scanner.parse()
+        self.assertEqual('end', scanner.get_token().value)
+        for _ in range(2):
+            scanner.parse()
+            self.assertEqual('empty', scanner.get_token().type)
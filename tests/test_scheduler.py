@@ -0,0 +1,143 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.scheduler import build_layers
+from fribe.scheduler import find_cycles
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+def create_chain_engine():
+    """
+    Create an engine where the a and b rule bases depend on the observations,
+    the c depends on the a and b, and the d depends on the c.
+    """
+    engine = Engine()
+    for name in ['x', 'a', 'b', 'c', 'd']:
+        universe = Universe()
+        universe.set_name(name)
+        universe.add_term(Term('low', 0, 0))
+        universe.add_term(Term('high', 1, 1))
+        engine.add_universe(universe)
+    dependencies = {'d': ['c'], 'c': ['a', 'b'], 'a': ['x'], 'b': ['x']}
+    for name, antecedents in dependencies.items():
+        rulebase = RuleBase(name)
+        rulebase.add_rule(Rule({antecedent: 'low' for antecedent in antecedents}, 'high'))
+        rulebase.add_rule(Rule({antecedent: 'high' for antecedent in antecedents}, 'low'))
+        engine.add_rulebase(rulebase)
+    return engine
+
+
+class SchedulerTest(unittest.TestCase):
+    """Test the dependency aware evaluation of the rule bases"""
+
+    def test_layers(self):
+        engine = create_chain_engine()
+        self.assertEqual(engine.get_layers(), [['a', 'b'], ['c'], ['d']])
+
+    def test_cycle(self):
+        engine = create_chain_engine()
+        engine.get_rulebase('a').add_rule(Rule({'d': 'low'}, 'low'))
+        rulebases = {name: engine.get_rulebase(name) for name in engine.rulebase_names}
+        with self.assertRaisesRegex(ValueError, r"\['d', 'c', 'a'\]"):
+            build_layers(rulebases)
+        self.assertEqual(find_cycles(rulebases), [['d', 'c', 'a']])
+        self.assertEqual(engine.get_layers(), [['b'], ['d', 'c', 'a']])
+        self.assertEqual(engine.get_cycles(), [['d', 'c', 'a']])
+
+    def test_chain_and_unrelated_cycle(self):
+        engine = Engine()
+        for name in ['x', 'a', 'b', 'c', 'd', 'e']:
+            universe = Universe()
+            universe.set_name(name)
+            universe.add_term(Term('low', 0, 0))
+            universe.add_term(Term('high', 1, 1))
+            engine.add_universe(universe)
+        dependencies = {'a': ['x'], 'b': ['a'], 'c': ['d'], 'd': ['c', 'x'], 'e': ['c']}
+        for name, antecedents in dependencies.items():
+            rulebase = RuleBase(name)
+            rulebase.add_rule(Rule({antecedent: 'low' for antecedent in antecedents}, 'high'))
+            rulebase.add_rule(Rule({antecedent: 'high' for antecedent in antecedents}, 'low'))
+            engine.add_rulebase(rulebase)
+        self.assertEqual(engine.get_layers(), [['a', 'c', 'd'], ['b', 'e']])
+        self.assertEqual(engine.get_cycles(), [['c', 'd']])
+        engine.calc_consequences({'x': 0.0, 'c': 1.0, 'd': 0.0})
+        self.assertEqual(engine.get_state('a'), 1.0)
+        self.assertEqual(engine.get_state('b'), 0.0)
+        self.assertEqual(engine.get_state('c'), 1.0)
+        self.assertEqual(engine.get_state('d'), 0.5)
+        self.assertEqual(engine.get_state('e'), 0.0)
+        with self.assertRaises(ValueError):
+            engine.calc_consequences({'x': 0.0, 'a': 1.0, 'c': 1.0, 'd': 0.0})
+
+    def test_cyclic_consequences(self):
+        engine = create_chain_engine()
+        engine.get_rulebase('a').add_rule(Rule({'d': 'low'}, 'low'))
+        observations = {'x': 0.25, 'a': 0.5, 'c': 0.125, 'd': 1.0}
+        engine.calc_consequences(observations)
+        expected_b = engine.get_rulebase('b').calc_consequence(engine.universes, observations)
+        self.assertEqual(engine.get_state('b'), expected_b)
+        inputs = dict(observations, b=expected_b)
+        for name in 'acd':
+            expected = engine.get_rulebase(name).calc_consequence(engine.universes, inputs)
+            self.assertEqual(engine.get_state(name), expected)
+        with self.assertRaises(ValueError):
+            engine.calc_consequences(dict(observations, b=0.5))
+        consequences = engine.calc_consequences_batch({name: [value] for name, value in observations.items()})
+        for name in 'abcd':
+            self.assertAlmostEqual(consequences[name][0], engine.get_state(name))
+
+    def test_observed_consequences(self):
+        engine = create_chain_engine()
+        with self.assertRaises(ValueError):
+            engine.calc_consequences({'x': 0, 'a': 1})
+        with self.assertRaises(ValueError):
+            engine.calc_consequences_batch({'x': [0], 'c': [1]})
+        engine.calc_consequences({'x': 0, 'd': 0.5})
+        self.assertEqual(engine.get_state('d'), 1.0)
+
+    def test_self_dependency(self):
+        rulebase = RuleBase('a')
+        rulebase.add_rule(Rule({'a': 'low', 'x': 'low'}, 'low'))
+        self.assertEqual(build_layers({'a': rulebase}), [['a']])
+
+    def test_chained_consequences(self):
+        engine = create_chain_engine()
+        engine.calc_consequences({'x': 0})
+        self.assertEqual([engine.get_state(name) for name in 'abcd'], [1.0, 1.0, 0.0, 1.0])
+        engine.calc_consequences({'x': 1})
+        self.assertEqual([engine.get_state(name) for name in 'abcd'], [0.0, 0.0, 1.0, 0.0])
+
+    def test_chained_batch(self):
+        engine = create_chain_engine()
+        consequences = engine.calc_consequences_batch({'x': [0, 1]})
+        self.assertEqual([consequences[name].tolist() for name in 'abcd'], [[1, 0], [1, 0], [0, 1], [1, 0]])
+
+    def test_thread_pool(self):
+        engine = create_chain_engine()
+        reference = create_chain_engine()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            engine.set_executor(executor)
+            engine.enable_cache()
+            for x in [0, 0.25, 0.25, 1]:
+                engine.calc_consequences({'x': x})
+                reference.calc_consequences({'x': x})
+                for name in 'abcd':
+                    self.assertEqual(engine.get_state(name), reference.get_state(name))
+        self.assertEqual(engine.cache_statistics['a']['hits'], 1)
+
+    def test_process_pool(self):
+        engine = create_chain_engine()
+        reference = create_chain_engine()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            engine.set_executor(executor)
+            engine.enable_compilation()
+            for x in [0.5, 0.75]:
+                engine.calc_consequences({'x': x})
+                reference.calc_consequences({'x': x})
+                for name in 'abcd':
+                    self.assertAlmostEqual(engine.get_state(name), reference.get_state(name))
@@ -0,0 +1,154 @@
+import asyncio
+import time
+import unittest
+
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.server import BatchingServer
+from fribe.server import generate_load
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+def create_engine():
+    engine = Engine()
+    for name in ['x', 'y', 'z']:
+        universe = Universe()
+        universe.set_name(name)
+        universe.add_term(Term('low', 0, 0))
+        universe.add_term(Term('high', 1, 1))
+        engine.add_universe(universe)
+    rulebase = RuleBase('z')
+    rulebase.add_rule(Rule({'x': 'high', 'y': 'high'}, 'high'))
+    rulebase.add_rule(Rule({'x': 'low'}, 'low'))
+    rulebase.add_rule(Rule({'y': 'low'}, 'low'))
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+class BatchingServerTest(unittest.TestCase):
+    """Test the micro-batching server"""
+
+    def test_load(self):
+        engine = create_engine()
+        samples = [{'x': i / 10, 'y': 1 - i / 20} for i in range(11)]
+
+        async def run():
+            server = BatchingServer(engine, max_batch_size=32, max_delay=0.001)
+            await server.start()
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await generate_load(samples, 200, concurrency=8, port=port)
+            finally:
+                await server.stop()
+
+        report = asyncio.run(run())
+        self.assertGreater(report['throughput'], 0)
+        self.assertLessEqual(report['p50'], report['p99'])
+        for i, response in enumerate(report['responses']):
+            engine.calc_consequences(samples[i % len(samples)])
+            self.assertAlmostEqual(response['consequences']['z'], engine.get_state('z'))
+
+    def test_batching_and_errors(self):
+        engine = create_engine()
+        server = BatchingServer(engine)
+        responses = server.evaluate_batch([{'x': 0, 'y': 1}, {'x': 2, 'y': 1}, {'x': 1}, {'x': 1, 'y': 1}])
+        self.assertEqual(responses[0], {'consequences': {'z': 0.0}})
+        self.assertIn('error', responses[1])
+        self.assertIn('error', responses[2])
+        self.assertEqual(responses[3], {'consequences': {'z': 1.0}})
+
+    def test_overload(self):
+        engine = create_engine()
+
+        async def run():
+            server = BatchingServer(engine, max_pending=1, max_delay=0.05)
+            await server.start()
+            port = server.sockets[0].getsockname()[1]
+            try:
+                report = await generate_load([{'x': 0, 'y': 0}], 20, concurrency=10, port=port)
+                return server.statistics, report
+            finally:
+                await server.stop()
+
+        statistics, report = asyncio.run(run())
+        rejected = [response for response in report['responses'] if 'error' in response]
+        self.assertGreater(statistics['rejected'], 0)
+        self.assertEqual(len(rejected), statistics['rejected'])
+
+    def test_failing_evaluator(self):
+        engine = create_engine()
+
+        def evaluate_batch(batch):
+            if batch[0]['x'] > 1:
+                raise RuntimeError('Broken evaluator!')
+            return [{'consequences': {'z': 0.0}} for _ in batch]
+
+        async def run():
+            server = BatchingServer(engine, max_delay=0.001)
+            server.evaluate_batch = evaluate_batch
+            await server.start()
+            port = server.sockets[0].getsockname()[1]
+            try:
+                failed = await generate_load([{'x': 2, 'y': 0}], 3, concurrency=1, port=port)
+                answered = await generate_load([{'x': 0, 'y': 0}], 3, concurrency=1, port=port)
+                return failed['responses'], answered['responses']
+            finally:
+                await server.stop()
+
+        failed, answered = asyncio.run(asyncio.wait_for(run(), 5))
+        self.assertTrue(all('Broken evaluator!' in response['error'] for response in failed))
+        self.assertEqual([{'consequences': {'z': 0.0}}] * 3, answered)
+
+    def test_pending_requests_at_stop(self):
+        engine = create_engine()
+
+        def evaluate_batch(batch):
+            time.sleep(0.2)
+            return [{'consequences': {'z': 0.0}} for _ in batch]
+
+        async def run():
+            server = BatchingServer(engine, max_batch_size=1, max_delay=0.001)
+            server.evaluate_batch = evaluate_batch
+            await server.start()
+            line = b'{"observations": {"x": 0, "y": 0}}'
+            requests = [asyncio.ensure_future(server._handle_request(line)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            await server.stop()
+            responses = await asyncio.wait_for(asyncio.gather(*requests), 1)
+            return responses + [await server._handle_request(line)]
+
+        responses = asyncio.run(run())
+        self.assertTrue(all(response == {'error': 'The server has stopped!'} for response in responses))
+
+    def test_stop_with_connected_clients(self):
+        engine = create_engine()
+
+        def evaluate_batch(batch):
+            time.sleep(0.2)
+            return [{'consequences': {'z': 0.0}} for _ in batch]
+
+        async def run():
+            server = BatchingServer(engine, max_batch_size=1, max_delay=0.001)
+            server.evaluate_batch = evaluate_batch
+            await server.start()
+            port = server.sockets[0].getsockname()[1]
+            idle_reader, idle_writer = await asyncio.open_connection('127.0.0.1', port)
+            readers = []
+            for _ in range(2):
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(b'{"observations": {"x": 0, "y": 0}}\n')
+                await writer.drain()
+                readers.append((reader, writer))
+            await asyncio.sleep(0.05)
+            await asyncio.wait_for(server.stop(), 2)
+            lines = [await asyncio.wait_for(reader.readline(), 1) for reader, _ in readers]
+            idle_line = await asyncio.wait_for(idle_reader.readline(), 1)
+            for _, writer in readers + [(idle_reader, idle_writer)]:
+                writer.close()
+            return lines, idle_line
+
+        lines, idle_line = asyncio.run(run())
+        self.assertEqual([b'{"error": "The server has stopped!"}\n'] * 2, lines)
+        self.assertEqual(b'', idle_line)
@@ -0,0 +1,79 @@
+import random
+import unittest
+
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.sharding import ShardedEvaluator
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+def create_engine():
+    engine = Engine()
+    for name in ['x', 'y', 'a', 'b']:
+        universe = Universe()
+        universe.set_name(name)
+        for i in range(4):
+            universe.add_term(Term(str(i), i, i * i / 3))
+        engine.add_universe(universe)
+    random.seed(9)
+    for name, antecedents in [('a', ['x', 'y']), ('b', ['a', 'x'])]:
+        rulebase = RuleBase(name)
+        for _ in range(30):
+            predicates = {antecedent: str(random.randrange(4)) for antecedent in antecedents}
+            rulebase.add_rule(Rule(predicates, str(random.randrange(4))))
+        engine.add_rulebase(rulebase)
+    return engine
+
+
+class ShardedEvaluatorTest(unittest.TestCase):
+    """Test the multi-process evaluation"""
+
+    def test_same_consequences(self):
+        engine = create_engine()
+        random.seed(10)
+        columns = {'x': [random.uniform(0, 3) for _ in range(101)], 'y': [random.uniform(0, 3) for _ in range(101)]}
+        expected = engine.calc_consequences_batch(columns)
+        with ShardedEvaluator(engine, n_workers=2, shard_size=16) as evaluator:
+            for _ in range(2):
+                consequences = evaluator.calc_consequences(columns)
+                for name in ['a', 'b']:
+                    self.assertEqual(consequences[name].tolist(), expected[name].tolist())
+            consequences = evaluator.calc_consequences([[1, 2], [0, 3]], columns=['x', 'y'])
+            expected = engine.calc_consequences_batch({'x': [1, 0], 'y': [2, 3]})
+            self.assertEqual(consequences['a'].tolist(), expected['a'].tolist())
+
+    def test_invalid_observations(self):
+        engine = create_engine()
+        with ShardedEvaluator(engine, n_workers=1) as evaluator:
+            with self.assertRaises(ValueError):
+                evaluator.calc_consequences({'x': [1, 2]})
+            with self.assertRaises(ValueError):
+                evaluator.calc_consequences({'x': [1, 2], 'y': [1, 5]})
+
+    def test_observed_consequences(self):
+        engine = create_engine()
+        with ShardedEvaluator(engine, n_workers=1) as evaluator:
+            with self.assertRaises(ValueError):
+                evaluator.calc_consequences({'x': [1, 2], 'y': [1, 2], 'a': [0, 0]})
+            with self.assertRaises(ValueError):
+                evaluator.calc_consequences([[1, 1, 0], [2, 2, 0]], columns=['x', 'y', 'a'])
+            consequences = evaluator.calc_consequences({'x': [1, 2], 'y': [1, 2], 'b': [0, 0]})
+        expected = engine.calc_consequences_batch({'x': [1, 2], 'y': [1, 2], 'b': [0, 0]})
+        self.assertEqual(expected['b'].tolist(), consequences['b'].tolist())
+
+    def test_cyclic_rulebases(self):
+        engine = create_engine()
+        engine.get_rulebase('a').add_rule(Rule({'b': '1', 'x': '2'}, '3'))
+        with self.assertRaises(ValueError):
+            ShardedEvaluator(engine, n_workers=1)
+
+    def test_out_of_domain_observations(self):
+        engine = create_engine()
+        with ShardedEvaluator(engine, n_workers=1) as evaluator:
+            with self.assertRaises(ValueError):
+                evaluator.calc_consequences({'x': [1, 4], 'y': [1, 2]})
+            consequences = evaluator.calc_consequences({'x': [0, 3], 'y': [3, 0]})
+        expected = engine.calc_consequences_batch({'x': [0, 3], 'y': [3, 0]})
+        self.assertEqual(consequences['b'].tolist(), expected['b'].tolist())
@@ -0,0 +1,105 @@
+import random
+import unittest
+
+import numpy as np
+
+from fribe.builder import build_rulebase
+from fribe.builder import build_universe
+from fribe.compiled import CompiledRuleBase
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.sparse import SparseCompiledRuleBase
+
+
+def create_universes(n_antecedents):
+    universes = [build_universe('x{}'.format(j), ['low', 'mid', 'high'], [0, 4, 10], [0, 2, 10])
+                 for j in range(n_antecedents)]
+    universes.append(build_universe('z', ['low', 'mid', 'high'], [0, 0.5, 1], [0, 0.7, 1]))
+    return {universe.name: universe for universe in universes}
+
+
+def create_rulebase(n_antecedents, n_rules, seed=0):
+    generator = random.Random(seed)
+    symbols = ['low', 'mid', 'high']
+    rulebase = RuleBase('z')
+    for _ in range(n_rules):
+        names = generator.sample(range(n_antecedents), generator.randint(1, 4))
+        predicates = {'x{}'.format(j): generator.choice(symbols) for j in names}
+        rulebase.add_rule(Rule(predicates, generator.choice(symbols)))
+    return rulebase
+
+
+def create_columns(n_antecedents, n_rows):
+    generator = np.random.default_rng(0)
+    return {'x{}'.format(j): generator.uniform(0, 10, n_rows) for j in range(n_antecedents)}
+
+
+class SparseCompiledRuleBaseTest(unittest.TestCase):
+    """Test the compressed sparse row layout of the compiled rule bases"""
+
+    def test_layout(self):
+        universes = create_universes(3)
+        rulebase = RuleBase('z')
+        rulebase.add_rule(Rule({'x2': 'high', 'x0': 'mid'}, 'high'))
+        rulebase.add_rule(Rule({'x1': 'low'}, 'low'))
+        sparse = rulebase.compile(universes, 'sparse')
+        self.assertEqual(['x2', 'x0', 'x1'], sparse.antecedent_names)
+        self.assertEqual([0, 2, 3], sparse.indptr.tolist())
+        self.assertEqual([0, 1, 2], sparse.indices.tolist())
+        self.assertEqual([10.0, 2.0, 0.0], sparse.data.tolist())
+        self.assertEqual([2, 1], sparse.counts.tolist())
+        dense = rulebase.compile(universes)
+        self.assertTrue(np.array_equal(dense.centers, sparse.centers))
+        self.assertTrue(np.array_equal(dense.mask, sparse.mask))
+
+    def test_same_distances(self):
+        universes = create_universes(30)
+        rulebase = create_rulebase(30, 200)
+        dense = CompiledRuleBase(rulebase, universes)
+        sparse = SparseCompiledRuleBase(rulebase, universes)
+        mapped = dense.map_columns(universes, create_columns(30, 50))
+        self.assertTrue(np.array_equal(dense.calc_mapped_distances(mapped), sparse.calc_mapped_distances(mapped)))
+        rule_indices = np.array([5, 0, 199, 17])
+        self.assertTrue(np.array_equal(
+            dense.calc_mapped_distances(mapped, rule_indices), sparse.calc_mapped_distances(mapped, rule_indices)
+        ))
+
+    def test_same_consequences(self):
+        universes = create_universes(30)
+        rulebase = create_rulebase(30, 200)
+        columns = create_columns(30, 100)
+        dense = CompiledRuleBase(rulebase, universes)
+        sparse = SparseCompiledRuleBase(rulebase, universes)
+        self.assertTrue(np.array_equal(
+            dense.calc_consequences(universes, columns), sparse.calc_consequences(universes, columns)
+        ))
+        observations = {name: values[0] for name, values in columns.items()}
+        self.assertEqual(dense.calc_consequence(universes, observations),
+                         sparse.calc_consequence(universes, observations))
+
+    def test_rule_table(self):
+        universes = create_universes(4)
+        terms = np.array([[-1, 2, -1, 0], [1, -1, -1, -1], [-1, -1, 2, 2]])
+        rulebase = build_rulebase('z', universes, ['x0', 'x1', 'x2', 'x3'], terms, [2, 0, 1])
+        sparse = rulebase.compile(universes, 'sparse')
+        self.assertFalse(rulebase.rules.is_materialized)
+        expected = CompiledRuleBase(build_rulebase('z', universes, ['x0', 'x1', 'x2', 'x3'], terms, [2, 0, 1]),
+                                    universes)
+        self.assertEqual(expected.antecedent_names, sparse.antecedent_names)
+        self.assertTrue(np.array_equal(expected.centers, sparse.centers))
+        self.assertTrue(np.array_equal(expected.values, sparse.values))
+
+    def test_engine_layout(self):
+        engine = Engine()
+        for universe in create_universes(10).values():
+            engine.add_universe(universe)
+        engine.add_rulebase(create_rulebase(10, 50))
+        observations = {'x{}'.format(j): 3.0 for j in range(10)}
+        engine.enable_compilation()
+        expected = engine.calc_consequence('z', observations)
+        engine.enable_compilation(layout='sparse')
+        self.assertIsInstance(engine.get_compiled_rulebase('z'), SparseCompiledRuleBase)
+        self.assertEqual(expected, engine.calc_consequence('z', observations))
+        with self.assertRaises(ValueError):
+            engine.enable_compilation(layout='diagonal')
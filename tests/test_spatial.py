@@ -0,0 +1,96 @@
+import random
+import unittest
+
+import numpy as np
+
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.spatial import KdTree
+from fribe.spatial import RuleIndex
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+def create_grid_engine(size):
+    engine = Engine()
+    for name in ['x', 'y', 'z']:
+        universe = Universe()
+        universe.set_name(name)
+        for i in range(size):
+            universe.add_term(Term(str(i), i, i * i / size))
+        engine.add_universe(universe)
+    rulebase = RuleBase('z')
+    random.seed(3)
+    for i in range(size):
+        for j in range(size):
+            rulebase.add_rule(Rule({'x': str(i), 'y': str(j)}, str(random.randrange(size))))
+    for i in range(size):
+        rulebase.add_rule(Rule({'x': str(i)}, str(random.randrange(size))))
+    engine.add_rulebase(rulebase)
+    return engine
+
+
+class KdTreeTest(unittest.TestCase):
+    """Test the k-d tree"""
+
+    def test_nearest_points(self):
+        random.seed(4)
+        points = np.array([[random.random(), random.random(), random.random()] for _ in range(500)])
+        tree = KdTree(points)
+        for _ in range(20):
+            point = np.array([random.random(), random.random(), random.random()])
+            distances = ((points - point) ** 2).sum(axis=1)
+            expected = np.argsort(distances)[:7].tolist()
+            nearest = tree.query_nearest(point, 7)
+            self.assertEqual([index for _, index in nearest], expected)
+
+    def test_points_in_radius(self):
+        points = np.array([[i % 10, i // 10] for i in range(100)], dtype=float)
+        tree = KdTree(points)
+        self.assertEqual(tree.query_radius([3, 4], 0.0), [43])
+        self.assertEqual(sorted(tree.query_radius([3, 4], 1.0)), [33, 42, 43, 44, 53])
+        self.assertEqual(tree.query_radius([3.5, 4], 0.0), [])
+
+
+class RuleIndexTest(unittest.TestCase):
+    """Test the nearest rule approximation"""
+
+    def test_exact_matches(self):
+        engine = create_grid_engine(8)
+        compiled = engine.get_compiled_rulebase('z')
+        rule_index = RuleIndex(compiled, k=4)
+        for observations in [{'x': 2, 'y': 5}, {'x': 7, 'y': 0}, {'x': 3, 'y': 3}]:
+            expected = compiled.calc_consequence(engine.universes, observations)
+            self.assertEqual(rule_index.calc_consequence(engine.universes, observations), expected)
+
+    def test_all_rules_approximation(self):
+        engine = create_grid_engine(6)
+        compiled = engine.get_compiled_rulebase('z')
+        rule_index = RuleIndex(compiled, k=compiled.count_rules())
+        random.seed(5)
+        for _ in range(20):
+            observations = {'x': random.uniform(0, 5), 'y': random.uniform(0, 5)}
+            self.assertAlmostEqual(rule_index.calc_approximation_error(engine.universes, observations), 0.0)
+
+    def test_engine_rule_index(self):
+        engine = create_grid_engine(10)
+        random.seed(6)
+        samples = [{'x': random.uniform(0, 9), 'y': random.uniform(0, 9)} for _ in range(20)]
+        expected = []
+        for observations in samples:
+            engine.calc_consequences(observations)
+            expected.append(engine.get_state('z'))
+        engine.enable_rule_index(k=40)
+        for observations, z in zip(samples, expected):
+            engine.calc_consequences(observations)
+            self.assertAlmostEqual(engine.get_state('z'), z, delta=0.5)
+        rule_index = engine.get_rule_index('z')
+        errors = [rule_index.calc_approximation_error(engine.universes, observations) for observations in samples]
+        self.assertLess(max(errors), 0.5)
+
+    def test_invalid_nearest_rule_count(self):
+        engine = create_grid_engine(3)
+        with self.assertRaises(ValueError):
+            engine.enable_rule_index(k=0)
+        self.assertNotIsInstance(engine.get_evaluator('z'), RuleIndex)
@@ -0,0 +1,85 @@
+import unittest
+
+from fribe.engine import Engine
+from fribe.rule import Rule
+from fribe.rulebase import RuleBase
+from fribe.state import StateStore
+from fribe.term import Term
+from fribe.universe import Universe
+
+
+class StateStoreTest(unittest.TestCase):
+    """Test the double buffered state store"""
+
+    def test_slots(self):
+        store = StateStore()
+        self.assertEqual(store.add_slot('a'), 0)
+        self.assertEqual(store.add_slot('b'), 1)
+        self.assertEqual(store.add_slot('a'), 0)
+        self.assertEqual(store.get_handle('b'), 1)
+        with self.assertRaises(KeyError):
+            store.get('a')
+        with self.assertRaises(KeyError):
+            store.get_handle('c')
+
+    def test_buffer_swap(self):
+        store = StateStore()
+        store.set('a', 1.0)
+        store.set('b', 2.0)
+        store.begin_update()
+        store.write('a', 3.0)
+        self.assertEqual(store.get_snapshot(), {'a': 1.0, 'b': 2.0})
+        store.commit()
+        self.assertEqual(store.get_snapshot(), {'a': 3.0, 'b': 2.0})
+        store.begin_update()
+        store.write('b', 4.0)
+        store.commit()
+        self.assertEqual(store.get_snapshot(), {'a': 3.0, 'b': 4.0})
+
+    def test_unfinished_update(self):
+        store = StateStore()
+        store.set('a', 1.0)
+        store.begin_update()
+        store.write('a', 2.0)
+        store.begin_update()
+        store.write('b', 3.0)
+        store.commit()
+        self.assertEqual(store.get_snapshot(), {'a': 1.0, 'b': 3.0})
+        store.set_by_handle(store.get_handle('b'), 5.0)
+        store.begin_update()
+        store.write('a', 6.0)
+        store.commit()
+        self.assertEqual(store.get_snapshot(), {'a': 6.0, 'b': 5.0})
+        store.begin_update()
+        store.commit()
+        self.assertEqual(store.get_snapshot(), {'a': 6.0, 'b': 5.0})
+
+
+class EngineStateTest(unittest.TestCase):
+    """Test the states of the engine"""
+
+    def test_state_handles(self):
+        engine = Engine()
+        for name in ['x', 'z']:
+            universe = Universe()
+            universe.set_name(name)
+            universe.add_term(Term('low', 0, 0))
+            universe.add_term(Term('high', 1, 1))
+            engine.add_universe(universe)
+        rulebase = RuleBase('z')
+        rulebase.add_rule(Rule({'x': 'low'}, 'high'))
+        rulebase.add_rule(Rule({'x': 'high'}, 'low'))
+        engine.add_rulebase(rulebase)
+        handle = engine.get_state_handle('z')
+        self.assertIsNone(engine.get_state_by_handle(handle))
+        with self.assertRaises(KeyError):
+            engine.get_state('z')
+        engine.set_state('energy', 0.25)
+        engine.calc_consequences({'x': 0})
+        self.assertEqual(engine.get_state_by_handle(handle), 1.0)
+        engine.calc_consequences({'x': 1})
+        self.assertEqual(engine.get_state('z'), 0.0)
+        self.assertEqual(engine.get_states(), {'z': 0.0, 'energy': 0.25})
+        with self.assertRaises(ValueError):
+            engine.calc_consequences({'x': 2})
+        self.assertEqual(engine.get_states(), {'z': 0.0, 'energy': 0.25})
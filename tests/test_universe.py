@@ -41,3 +41,84 @@ class UniverseTest(unittest.TestCase):
         universe.add_term(b)
         distance = universe.calc_distance(2, 7)
         self.assertEqual(distance, 0.5)
+
+    def test_unordered_terms(self):
+        universe = Universe()
+        universe.add_term(Term('c', 20, 2))
+        universe.add_term(Term('a', 0, 0))
+        universe.add_term(Term('b', 10, 6))
+        self.assertEqual(universe.calc_value(5), 3)
+        self.assertEqual(universe.calc_value(15), 4)
+        self.assertEqual(universe.calc_value(20), 2)
+
+    def test_neighbor_terms(self):
+        universe = Universe()
+        a = Term('a', 0, 0)
+        b = Term('b', 10, 1)
+        c = Term('c', 20, 2)
+        for term in [c, a, b]:
+            universe.add_term(term)
+        self.assertEqual(universe.find_neighbor_terms(0), (a, a))
+        self.assertEqual(universe.find_neighbor_terms(3), (a, b))
+        self.assertEqual(universe.find_neighbor_terms(10), (b, b))
+        self.assertEqual(universe.find_neighbor_terms(19.5), (b, c))
+        with self.assertRaises(ValueError):
+            universe.find_neighbor_terms(-1)
+        with self.assertRaises(ValueError):
+            universe.find_neighbor_terms(21)
+
+    def test_out_of_domain(self):
+        universe = Universe()
+        universe.add_term(Term('a', 0, 5))
+        universe.add_term(Term('b', 10, 8))
+        self.assertTrue(universe.is_in_domain(10))
+        self.assertFalse(universe.is_in_domain(10.5))
+        with self.assertRaises(ValueError):
+            universe.calc_value(-0.5)
+
+    def test_index_invalidation(self):
+        universe = Universe()
+        universe.add_term(Term('a', 0, 0))
+        universe.add_term(Term('b', 10, 10))
+        self.assertEqual(universe.calc_distance(0, 5), 0.5)
+        self.assertFalse(universe.is_in_domain(20))
+        universe.add_term(Term('c', 20, 40))
+        self.assertTrue(universe.is_in_domain(20))
+        self.assertEqual(universe.calc_value(15), 25)
+        self.assertEqual(universe.calc_distance(0, 5), 0.125)
+        universe.get_term('c').set_value(20)
+        universe.update_index()
+        self.assertEqual(universe.calc_distance(0, 5), 0.25)
+
+    def test_value_array_calculation(self):
+        universe = Universe()
+        universe.add_term(Term('a', 0, 5))
+        universe.add_term(Term('b', 10, 8))
+        universe.add_term(Term('c', 4, 7))
+        xs = [0, 1.5, 4, 7.25, 10]
+        values = universe.calc_values(xs)
+        self.assertEqual(values.tolist(), [universe.calc_value(x) for x in xs])
+        with self.assertRaises(ValueError):
+            universe.calc_values([1, 11])
+
+    def test_value_array_out_of_domain(self):
+        universe = Universe()
+        universe.add_term(Term('a', 0, 5))
+        universe.add_term(Term('b', 10, 8))
+        xs = [-1, 0, 5, 10, 12]
+        self.assertEqual(universe.calc_domain_mask(xs).tolist(), [False, True, True, True, False])
+        values = universe.calc_values(xs, fill_value=-1.0)
+        self.assertEqual(values.tolist(), [-1.0, 5.0, 6.5, 8.0, -1.0])
+        with self.assertRaises(ValueError) as context:
+            universe.calc_values(xs)
+        self.assertIn('The 2 values', str(context.exception))
+
+    def test_distance_array_calculation(self):
+        universe = Universe()
+        universe.add_term(Term('a', 0, 5))
+        universe.add_term(Term('b', 4, 7))
+        universe.add_term(Term('c', 10, 8))
+        a = [2, 7, 0, 10, 3.5]
+        b = [7, 2, 10, 0, 3.5]
+        distances = universe.calc_distances(a, b)
+        self.assertEqual(distances.tolist(), [universe.calc_distance(x, y) for x, y in zip(a, b)])